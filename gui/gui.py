@@ -10,8 +10,10 @@ from PyQt6.QtWidgets import (
 GUI_DIR = Path(__file__).parent
 GUI_SRC = GUI_DIR / "gui_src"
 PROJECT_DIR = GUI_DIR.parent
-sys.path.append(str(PROJECT_DIR))
-sys.path.append(str(GUI_SRC))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+if str(GUI_SRC) not in sys.path:
+    sys.path.append(str(GUI_SRC))
 
 from gui.gui_src.gui_semantix import SemantixWidget
 from gui.gui_src.gui_feature_flow import FeatureFlowWidget
@@ -38,7 +40,7 @@ class MainWindow(QMainWindow):
     def _set_tables(self, main_window: QWidget):
         tab_widget = QTabWidget(main_window)
 
-        autosem_tab = SemantixWidget()
+        autosem_tab = SemantixWidget(self._process_pool)
         feature_validator_tab = FeatureFlowWidget(self._process_pool)
         jakkar_validator_tab = SimFyzerWidget(self._process_pool)
 
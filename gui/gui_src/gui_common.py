@@ -34,9 +34,13 @@ from PyQt6.QtCore import (
 GUI_DIR = Path(__file__).parent.parent
 PROJECT_DIR = GUI_DIR.parent
 
-sys.path.append(str(GUI_DIR))
+if str(GUI_DIR) not in sys.path:
+    sys.path.append(str(GUI_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from config.measures_config.config_parser import CONFIG, MEASURE, DATA, UNIT
+from src.data_io import preview_table
 
 
 class RunButtonStatus(object):
@@ -481,7 +485,7 @@ class CommonGUI(QWidget):
             self,
             "Выберите файл",
             "",
-            "Excel (*.xlsx *.csv)",
+            "Таблицы (*.xlsx *.csv *.parquet *.feather)",
         )
 
         if file_path:
@@ -489,12 +493,7 @@ class CommonGUI(QWidget):
             self.upload_file_data(file_path)
 
     def upload_file_data(self, file_path: str) -> None:
-        if ".xlsx" in file_path:
-            data = pd.read_excel(file_path, nrows=5)
-        elif ".csv" in file_path:
-            data = pd.read_excel(file_path, nrows=5)
-        else:
-            raise ValueError("File should be Excel or csv")
+        data = preview_table(file_path, rows=5)
 
         self.table_view.setModel(PandasModel(data))
 
@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QCheckBox,
 )
 from PyQt6.QtCore import QThread
 
@@ -16,17 +17,24 @@ GUI_DIR = Path(__file__).parent.parent
 GUI_SRC = GUI_DIR / "gui_src"
 PROJECT_DIR = GUI_DIR.parent
 CONFIG_PATH = PROJECT_DIR / "config" / "measures_config" / "setups"
+FEATURE_CACHE_PATH = PROJECT_DIR / ".cache" / "feature_flow.sqlite"
 
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from gui_common import CommonGUI, RunButtonStatus
 from src.feature_flow.main import (
-    FeatureGenerator,
     FeatureFlow,
     FeatureFlowGracefullExit,
 )
+from src.feature_flow.feature_plan import FeaturePlanCache
+from src.feature_flow.feature_cache import FeatureCache
+from src.row_cache import MAX_BYTES
+from src.feature_flow.feature_output import FeatureOutputMode, save_columnar
+from src.data_io import read_table, write_table, output_path
 
 OUTPUT_FILENAME = "FeatureFlow_output.xlsx"
+COLUMNAR_OUTPUT_FILENAME = "FeatureFlow_output.parquet"
 FEATURE_FLOW_CLIENT_COL = "Название товара"
 FEATURE_FLOW_SOURCE_COL = "Сырые данные"
 
@@ -46,13 +54,21 @@ class FeatureFlowProcessRunner(QThread):
         status_callback: Callable = None,
         progress_callback: Callable = None,
         run_button_callback: Callable = None,
+        cache_path: str | Path = FEATURE_CACHE_PATH,
+        cache_max_bytes: int = MAX_BYTES,
+        output_mode: FeatureOutputMode = FeatureOutputMode.OBJECTS,
+        project_columns: bool = False,
     ) -> None:
         super().__init__()
 
         self.data_path = data_path
+        # only client and source columns are read (and written)
+        self.text_columns = [client_column, source_column]
+        self.read_columns = self.text_columns if project_columns else None
+        self.output_mode = FeatureOutputMode.checkout(output_mode)
 
-        self.feature_generator = FeatureGenerator()
-        features = self.feature_generator.generate(config)
+        self.feature_plans = FeaturePlanCache()
+        features = self.feature_plans.generate(config)
 
         self._process_pool = process_pool
 
@@ -60,22 +76,21 @@ class FeatureFlowProcessRunner(QThread):
         self.progress_callback = progress_callback
         self.run_button_callback = run_button_callback
 
+        self.feature_cache = FeatureCache(cache_path, cache_max_bytes)
         self.validator = FeatureFlow(
             client_column,
             source_column,
             features,
             status_callback=self.status_callback,
             progress_callback=self.progress_callback,
+            feature_cache=self.feature_cache,
+            output_mode=self.output_mode,
         )
 
     def upload_data(self):
-        if ".csv" in self.data_path:
-            data = pd.read_csv(self.data_path)
-        elif ".xlsx" in self.data_path:
-            data = pd.read_excel(self.data_path)
-        else:
-            raise ValueError("File should be Excel or csv")
-        return data
+        return read_table(
+            self.data_path, self.read_columns, text_columns=self.text_columns
+        )
 
     def stop_callback(self) -> None:
         self.run_button_callback(RunButtonStatus.STOPPING)
@@ -102,6 +117,18 @@ class FeatureFlowProcessRunner(QThread):
         except FeatureFlowGracefullExit:
             raise FeatureFlowGUIGracefullExit
 
+    def save_data(self, data: pd.DataFrame) -> None:
+        if self.output_mode == FeatureOutputMode.COLUMNAR:
+            save_columnar(
+                data,
+                self.validator.features_table,
+                PROJECT_DIR / COLUMNAR_OUTPUT_FILENAME,
+            )
+        else:
+            write_table(
+                data, output_path(PROJECT_DIR / OUTPUT_FILENAME, self.data_path)
+            )
+
     def run(self) -> None:
         try:
             self.call_status("Загружаю данные")
@@ -110,7 +137,7 @@ class FeatureFlowProcessRunner(QThread):
             data = self.run_validator(data, self._process_pool)
 
             self.call_status("Сохраняю результат")
-            data.to_excel(PROJECT_DIR / OUTPUT_FILENAME, index=False)
+            self.save_data(data)
 
             self.call_status("Сохранено")
             self.call_progress(0)
@@ -124,6 +151,9 @@ class FeatureFlowProcessRunner(QThread):
             if self.run_button_callback is not None:
                 self.run_button_callback(RunButtonStatus.STOPPED)
 
+        finally:
+            self.feature_cache.close()
+
 
 class FeatureFlowWidget(CommonGUI):
     CONFIG_PATH = CONFIG_PATH
@@ -160,8 +190,20 @@ class FeatureFlowWidget(CommonGUI):
         source_box.addWidget(source_col_label)
         source_box.addWidget(self.source_col_display)
 
+        self.columnar_output = QCheckBox("Таблица признаков в parquet")
+        self.columnar_output.setChecked(False)
+
+        self.use_feature_cache = QCheckBox("Кэш признаков на диске")
+        self.use_feature_cache.setChecked(True)
+
+        self.project_columns = QCheckBox("Читать только столбцы названий")
+        self.project_columns.setChecked(False)
+
         runner_layout.addLayout(client_box)
         runner_layout.addLayout(source_box)
+        runner_layout.addWidget(self.columnar_output)
+        runner_layout.addWidget(self.use_feature_cache)
+        runner_layout.addWidget(self.project_columns)
 
         main_layout.addLayout(runner_layout)
 
@@ -171,6 +213,10 @@ class FeatureFlowWidget(CommonGUI):
         config_path = self.CONFIG_PATH / self.config_combobox.currentText()
         config = self.read_config(config_path)
 
+        output_mode = FeatureOutputMode.OBJECTS
+        if self.columnar_output.isChecked():
+            output_mode = FeatureOutputMode.COLUMNAR
+
         self.validator = FeatureFlowProcessRunner(
             config,
             self.file_path_display.text(),
@@ -180,6 +226,11 @@ class FeatureFlowWidget(CommonGUI):
             self.status_callback,
             self.progress_callback,
             self.run_button_status,
+            cache_path=(
+                FEATURE_CACHE_PATH if self.use_feature_cache.isChecked() else None
+            ),
+            output_mode=output_mode,
+            project_columns=self.project_columns.isChecked(),
         )
 
         self.validator_stop: callable = self.validator.stop_callback
@@ -1,5 +1,6 @@
 import sys
 import time
+import multiprocessing
 import pandas as pd
 
 from pathlib import Path
@@ -19,16 +20,31 @@ GUI_DIR = Path(__file__).parent.parent
 GUI_SRC = GUI_DIR / "gui_src"
 PROJECT_DIR = GUI_DIR.parent
 CONFIG_PATH = PROJECT_DIR / "config" / "measures_config" / "setups"
+ROW_CACHE_PATH = PROJECT_DIR / ".cache" / "row_results.sqlite"
 
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from gui_common import CommonGUI, RunButtonStatus
-from src.semantix.measures_extraction import MeasuresExtractor, MeasuresGracefullExit
-from src.semantix.cross_semantic import CrosserPro, LanguageRules, CrosserGracefullExit
+from src.semantix.measures_extraction import (
+    MeasuresExtractor,
+    MeasuresGracefullExit,
+    EXTRACTION_MODULES,
+)
+from src.semantix.cross_semantic import (
+    CrosserPro,
+    LanguageRules,
+    CrosserGracefullExit,
+    setup_language_rules,
+)
+from src.semantix.semantix_stream import SemantixStream
+from src.data_io import read_table, write_table, output_path
+from src.row_cache import RowCache, run_incremental, run_hash
 
 
 SEMANTIX_CLIENT_COL = "Название клиента"
 OUTPUT_FILENAME = "Semantix_output.xlsx"
+STREAM_OUTPUT_FILENAME = "Semantix_output.parquet"
 
 
 class SemantixGUIGracefullExit(Exception):
@@ -45,11 +61,22 @@ class SemantixProcessRunner(QThread):
         status_callback: Callable = None,
         progress_callback: Callable = None,
         run_button_callback: Callable = None,
+        process_pool: multiprocessing.Pool = None,
+        streaming: bool = False,
+        project_columns: bool = False,
+        row_cache_path: str | Path = None,
     ) -> None:
         super().__init__()
 
         self.data_path = data_path
         self.column = column
+        self.config = config
+        # measures of unchanged rows are taken from cache, if path is set
+        self.row_cache_path = row_cache_path
+        # only processed column is read (and written)
+        self.read_columns = [column] if project_columns else None
+        self._process_pool = process_pool
+        self.streaming = streaming
 
         self.extractor = MeasuresExtractor(
             config,
@@ -62,61 +89,35 @@ class SemantixProcessRunner(QThread):
         self.crosser = CrosserPro(
             crosser_lang_rules,
             delete_rx=True,
-            process_nearest=250,
             status_callback=status_callback,
             progress_callback=progress_callback,
         )
 
+        self.stream = SemantixStream(
+            self.extractor,
+            self.crosser,
+            status_callback=status_callback,
+        )
+
         self.status_callback = status_callback
         self.progress_callback = progress_callback
         self.run_button_callback = run_button_callback
 
     def upload_data(self):
-        if ".csv" in self.data_path:
-            data = pd.read_csv(self.data_path)
-        elif ".xlsx" in self.data_path:
-            data = pd.read_excel(self.data_path)
-        else:
-            raise ValueError("File should be Excel or csv")
-        return data
+        return read_table(
+            self.data_path, self.read_columns, text_columns=[self.column]
+        )
 
     def setup_crosser_lang_rules(
         self,
         use_languages: list[str],
     ) -> list[LanguageRules]:
-        langs = []
-
-        if "ru" in use_languages:
-            langs.append(
-                LanguageRules(
-                    "russian",
-                    check_letters=True,
-                    with_numbers=True,
-                    min_lenght=3,
-                    stemming=True,
-                    symbols="",
-                )
-            )
-
-        if "eng" in use_languages:
-            langs.append(
-                LanguageRules(
-                    "english",
-                    check_letters=True,
-                    with_numbers=True,
-                    min_lenght=3,
-                    stemming=True,
-                    symbols="",
-                )
-            )
-
-        return langs
+        return setup_language_rules(use_languages)
 
     def stop_callback(self):
         self.run_button_callback(RunButtonStatus.STOPPING)
 
-        self.extractor.stop_callback()
-        self.crosser.stop_callback()
+        self.stream.stop_callback()
 
     def call_status(self, message: str) -> None:
         if self.status_callback is not None:
@@ -126,10 +127,34 @@ class SemantixProcessRunner(QThread):
         if self.progress_callback:
             self.progress_callback(progress)
 
+    def extract_measures(self, data: pd.DataFrame) -> pd.DataFrame:
+        return self.extractor.extract(
+            data,
+            self.column,
+            concat_regex=True,
+            match_plan=True,
+        )
+
     def run_measure_extraction(self, data: pd.DataFrame) -> pd.DataFrame:
         try:
             self.call_status("Запускаю извлечение величин")
-            data = self.extractor.extract(data, self.column, concat_regex=True)
+            if self.row_cache_path is None:
+                return self.extract_measures(data)
+
+            # cross-semantic is found between all rows, only measures are cached
+            cache = RowCache(self.row_cache_path)
+            try:
+                data = run_incremental(
+                    data,
+                    [self.column],
+                    self.extract_measures,
+                    cache,
+                    "semantix",
+                    run_hash(self.config, modules=EXTRACTION_MODULES),
+                    self.status_callback,
+                )
+            finally:
+                cache.close()
             return data
 
         except MeasuresGracefullExit:
@@ -138,22 +163,40 @@ class SemantixProcessRunner(QThread):
     def run_cross_semantic(self, data: pd.DataFrame) -> pd.DataFrame:
         try:
             self.call_status("Запускаю извлечение кросс-семантики")
-            data = self.crosser.extract(data, self.column)
+            data = self.crosser.extract(data, self.column, self._process_pool)
             return data
 
         except CrosserGracefullExit:
             raise SemantixGUIGracefullExit
 
+    def run_stream(self) -> None:
+        try:
+            self.stream.run(
+                self.data_path,
+                self.column,
+                PROJECT_DIR / STREAM_OUTPUT_FILENAME,
+                self._process_pool,
+            )
+
+        except (MeasuresGracefullExit, CrosserGracefullExit):
+            raise SemantixGUIGracefullExit
+
     def run(self) -> None:
         try:
-            self.call_status("Загружаю данные")
-            data = self.upload_data()
+            if self.streaming:
+                self.run_stream()
+
+            else:
+                self.call_status("Загружаю данные")
+                data = self.upload_data()
 
-            data = self.run_measure_extraction(data)
-            data = self.run_cross_semantic(data)
+                data = self.run_measure_extraction(data)
+                data = self.run_cross_semantic(data)
 
-            self.call_status("Сохраняю результат")
-            data.to_excel(PROJECT_DIR / OUTPUT_FILENAME, index=False)
+                self.call_status("Сохраняю результат")
+                write_table(
+                    data, output_path(PROJECT_DIR / OUTPUT_FILENAME, self.data_path)
+                )
 
             self.call_status("Сохранено")
             self.call_progress(0)
@@ -171,8 +214,9 @@ class SemantixProcessRunner(QThread):
 class SemantixWidget(CommonGUI):
     CONFIG_PATH = CONFIG_PATH
 
-    def __init__(self):
+    def __init__(self, process_pool=None):
         super().__init__()
+        self._process_pool = process_pool
 
         self.extractor: QThread = None
         main_layout = QVBoxLayout(self)
@@ -196,7 +240,19 @@ class SemantixWidget(CommonGUI):
         workcol_layout.addWidget(workcol_label)
         workcol_layout.addWidget(self.workcol_display)
 
+        self.streaming = QCheckBox("Потоковый режим (parquet)")
+        self.streaming.setChecked(False)
+
+        self.row_cache = QCheckBox("Кэш строк (обрабатывать только измененные строки)")
+        self.row_cache.setChecked(False)
+
+        self.project_columns = QCheckBox("Читать только столбец для обработки")
+        self.project_columns.setChecked(False)
+
         main_layout.addLayout(workcol_layout)
+        main_layout.addWidget(self.streaming)
+        main_layout.addWidget(self.row_cache)
+        main_layout.addWidget(self.project_columns)
         return self.workcol_display
 
     def _setup_cross_sem(self, main_layout: QVBoxLayout) -> list[QCheckBox]:
@@ -239,6 +295,10 @@ class SemantixWidget(CommonGUI):
             status_callback=self.status_callback,
             progress_callback=self.progress_callback,
             run_button_callback=self.run_button_status,
+            process_pool=self._process_pool,
+            streaming=self.streaming.isChecked(),
+            project_columns=self.project_columns.isChecked(),
+            row_cache_path=ROW_CACHE_PATH if self.row_cache.isChecked() else None,
         )
 
         self.extractor_stop: callable = self.extractor.stop_callback
@@ -250,8 +310,9 @@ class SemantixWidget(CommonGUI):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = SemantixWidget()
-    window.show()
+    with multiprocessing.Pool(4) as process_pool:
+        app = QApplication(sys.argv)
+        window = SemantixWidget(process_pool)
+        window.show()
 
-    sys.exit(app.exec())
+        sys.exit(app.exec())
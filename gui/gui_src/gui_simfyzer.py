@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QCheckBox,
 )
 from PyQt6.QtCore import QThread
 
@@ -17,10 +18,12 @@ GUI_SRC = GUI_DIR / "gui_src"
 PROJECT_DIR = GUI_DIR.parent
 CONFIG_PATH = PROJECT_DIR / "config" / "simfyzer_config" / "setups"
 
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from gui_common import CommonGUI, RunButtonStatus
 from src.simfyzer.main import SimFyzer, setup_SimFyzer, SimFyzerGracefullExit
+from src.data_io import read_table, write_table, output_path
 
 
 SIMFYZER_CLIENT_COL = "Название товара"
@@ -45,11 +48,16 @@ class SimFyzerProcessRunner(QThread):
         status_callback: Callable = None,
         progress_callback: Callable = None,
         run_button_callback: Callable = None,
+        project_columns: bool = False,
     ) -> None:
         super().__init__()
 
         self.client_column = client_column
         self.source_column = source_column
+        # only client and source columns are read (and written)
+        self.read_columns = (
+            [client_column, source_column] if project_columns else None
+        )
 
         self._process_pool = process_pool
 
@@ -67,13 +75,11 @@ class SimFyzerProcessRunner(QThread):
         )
 
     def upload_data(self):
-        if ".csv" in self.data_path:
-            data = pd.read_csv(self.data_path)
-        elif ".xlsx" in self.data_path:
-            data = pd.read_excel(self.data_path)
-        else:
-            raise ValueError("File should be Excel or csv")
-        return data
+        return read_table(
+            self.data_path,
+            self.read_columns,
+            text_columns=[self.client_column, self.source_column],
+        )
 
     def stop_callback(self) -> None:
         self.run_button_callback(RunButtonStatus.STOPPING)
@@ -114,7 +120,9 @@ class SimFyzerProcessRunner(QThread):
             data = self.run_validator(data, self._process_pool)
 
             self.call_status("Сохраняю данные")
-            data.to_excel(PROJECT_DIR / OUTPUT_FILENAME, index=False)
+            write_table(
+                data, output_path(PROJECT_DIR / OUTPUT_FILENAME, self.data_path)
+            )
 
             self.call_status("Сохранено")
             self.call_progress(0)
@@ -180,9 +188,13 @@ class SimFyzerWidget(CommonGUI):
         source_box.addWidget(source_col_label)
         source_box.addWidget(self.source_col_display)
 
+        self.project_columns = QCheckBox("Читать только столбцы названий")
+        self.project_columns.setChecked(False)
+
         runner_layout.addLayout(params_box)
         runner_layout.addLayout(client_box)
         runner_layout.addLayout(source_box)
+        runner_layout.addWidget(self.project_columns)
 
         main_layout.addLayout(runner_layout)
 
@@ -203,6 +215,7 @@ class SimFyzerWidget(CommonGUI):
             self.status_callback,
             self.progress_callback,
             self.run_button_status,
+            project_columns=self.project_columns.isChecked(),
         )
 
         self.validator_stop = self.validator.stop_callback
@@ -1,10 +1,12 @@
 import sys
 import multiprocessing
 
-from PyQt6.QtWidgets import QApplication
-from gui.gui import MainWindow
-
 if __name__ == "__main__":
+    # GUI is imported here, so spawned pool workers, which import
+    # this module as __mp_main__, don't load PyQt and GUI modules
+    from PyQt6.QtWidgets import QApplication
+    from gui.gui import MainWindow
+
     with multiprocessing.Pool() as process_pool:
         app = QApplication(sys.argv)
         window = MainWindow(process_pool)
@@ -0,0 +1 @@
+"""Skylark: headless entry points of product matching engines"""
@@ -0,0 +1,413 @@
+"""
+Headless command line interface of Skylark engines.
+
+    python -m skylark semantix data.xlsx --config main.json
+    python -m skylark featureflow pairs.parquet --workers 4
+    python -m skylark simfyzer pairs.csv --fuzzy-threshold 0.75
+    python -m skylark regex-validate semantic.xlsx validation.xlsx
+    python -m skylark cache clear --pipeline semantix
+
+Engines are imported by subcommands only and GUI isn't imported at all,
+so command starts without PyQt and heavy dependencies.
+
+Row-wise results (SemantiX measures regexes, RegexValidator marks) are cached
+between runs, so re-run computes only changed and new rows.
+"""
+
+import sys
+import argparse
+import multiprocessing
+from pathlib import Path
+from contextlib import contextmanager
+
+PROJECT_DIR = Path(__file__).parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+MEASURES_CONFIG = PROJECT_DIR / "config" / "measures_config" / "setups" / "main.json"
+SIMFYZER_CONFIG = PROJECT_DIR / "config" / "simfyzer_config" / "setups" / "main.json"
+FEATURE_CACHE_PATH = PROJECT_DIR / ".cache" / "feature_flow.sqlite"
+FEATURE_CACHE_MAX_MB = 1024
+ROW_CACHE_PATH = PROJECT_DIR / ".cache" / "row_results.sqlite"
+ROW_CACHE_MAX_MB = 1024
+
+SEMANTIX_COLUMN = "Название клиента"
+CLIENT_COLUMN = "Название товара"
+SOURCE_COLUMN = "Сырые данные"
+
+SEMANTIX_OUTPUT = "Semantix_output.xlsx"
+FEATURE_FLOW_OUTPUT = "FeatureFlow_output.xlsx"
+SIMFYZER_OUTPUT = "SimFyzer_output.xlsx"
+REGEX_VALIDATOR_OUTPUT = "RegexValidator_output.xlsx"
+
+
+def status(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+@contextmanager
+def process_pool(workers: int):
+    """Process pool of workers (there isn't any pool for one worker)"""
+
+    if workers <= 1:
+        yield None
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            yield pool
+
+
+def read_json(path: str | Path) -> dict:
+    import json
+
+    with open(path, "rb") as file:
+        return json.loads(file.read())
+
+
+def row_cache(args: argparse.Namespace):
+    """Persistent row results cache (None, if it is disabled)"""
+
+    from src.row_cache import RowCache
+
+    if not args.row_cache:
+        return None
+    return RowCache(args.row_cache, args.row_cache_max_mb << 20)
+
+
+def run_semantix(args: argparse.Namespace) -> Path:
+    from src.data_io import read_table, write_table, output_path
+    from src.row_cache import run_incremental, run_hash
+    from src.semantix.measures_extraction import MeasuresExtractor, EXTRACTION_MODULES
+    from src.semantix.cross_semantic import CrosserPro, setup_language_rules
+    from src.semantix.semantix_stream import SemantixStream
+
+    config = read_json(args.config)
+    extractor = MeasuresExtractor(config, True, status)
+    crosser = CrosserPro(
+        setup_language_rules(args.langs),
+        delete_rx=True,
+        status_callback=status,
+    )
+
+    output = Path(args.output or output_path(SEMANTIX_OUTPUT, args.input))
+    with process_pool(args.workers) as pool:
+        if args.stream:
+            stream = SemantixStream(extractor, crosser, status_callback=status)
+            return stream.run(args.input, args.column, output, pool)
+
+        columns = [args.column] if args.project_columns else None
+        data = read_table(args.input, columns, text_columns=[args.column])
+
+        def extract(chunk):
+            return extractor.extract(chunk, args.column, match_plan=True)
+
+        cache = row_cache(args)
+        if cache is None:
+            data = extract(data)
+        else:
+            # cross-semantic is found between all rows, only measures are cached
+            data = run_incremental(
+                data,
+                [args.column],
+                extract,
+                cache,
+                "semantix",
+                run_hash(config, modules=EXTRACTION_MODULES),
+                status,
+            )
+            cache.close()
+        data = crosser.extract(data, args.column, pool)
+
+    write_table(data, output, status)
+    return output
+
+
+def run_featureflow(args: argparse.Namespace) -> Path:
+    from src.data_io import read_table, write_table, output_path
+    from src.feature_flow.main import FeatureFlow
+    from src.feature_flow.feature_plan import FeaturePlanCache
+    from src.feature_flow.feature_cache import FeatureCache
+    from src.feature_flow.feature_output import FeatureOutputMode, save_columnar
+
+    features = FeaturePlanCache().generate(read_json(args.config))
+    validator = FeatureFlow(
+        args.client_column,
+        args.source_column,
+        features,
+        status_callback=status,
+        feature_cache=FeatureCache(args.cache or None, args.cache_max_mb << 20),
+        output_mode=args.output_mode,
+        pattern_timeout=args.timeout,
+    )
+
+    columns = [args.client_column, args.source_column]
+    data = read_table(
+        args.input,
+        columns if args.project_columns else None,
+        text_columns=columns,
+    )
+    with process_pool(args.workers) as pool:
+        data = validator.validate(data, pool)
+
+    if args.output_mode == FeatureOutputMode.COLUMNAR:
+        output = Path(args.output or Path(FEATURE_FLOW_OUTPUT).with_suffix(".parquet"))
+        save_columnar(data, validator.features_table, output)
+    else:
+        output = Path(args.output or output_path(FEATURE_FLOW_OUTPUT, args.input))
+        write_table(data, output, status)
+    return output
+
+
+def run_simfyzer(args: argparse.Namespace) -> Path:
+    from src.data_io import read_table, write_table, output_path
+    from src.simfyzer.main import setup_SimFyzer
+
+    validator = setup_SimFyzer(
+        read_json(args.config),
+        args.fuzzy_threshold,
+        args.validation_threshold,
+        status,
+    )
+
+    columns = [args.client_column, args.source_column]
+    data = read_table(
+        args.input,
+        columns if args.project_columns else None,
+        text_columns=columns,
+    )
+    with process_pool(args.workers) as pool:
+        data = validator.validate(data, args.client_column, args.source_column, pool)
+
+    output = Path(args.output or output_path(SIMFYZER_OUTPUT, args.input))
+    write_table(data, output, status)
+    return output
+
+
+def run_regex_validate(args: argparse.Namespace) -> Path:
+    import pandas as pd
+    from src.data_io import read_table, write_table, output_path
+    from src.regx.regex_validator import RegexValidator
+    from src.regx.validation_engine import PatternStats
+    from src.row_cache import run_incremental, run_hash
+
+    checks = [args.plus_column, args.minus_column, args.regex_column]
+    semantic = read_table(args.semantic, text_columns=[args.semantic_merge_by, *checks])
+    validation = read_table(
+        args.validation,
+        text_columns=[args.validation_merge_by, args.validate_by],
+    )
+    stats = PatternStats()  # it isn't changed if all rows are cached
+
+    def validate(rows):
+        nonlocal stats
+        validator = RegexValidator(
+            semantic,
+            rows,
+            plus_column=args.plus_column,
+            minus_column=args.minus_column,
+            regex_column=args.regex_column,
+            validate_by=args.validate_by,
+            semantic_merge_by=args.semantic_merge_by,
+            validation_merge_by=args.validation_merge_by,
+            process_pool=pool,
+            pattern_timeout=args.timeout,
+        )
+        stats = validator.pattern_stats
+        return validator.validate()
+
+    cache = row_cache(args)
+    if cache is not None and semantic[args.semantic_merge_by].duplicated().any():
+        status("Названия семантики повторяются, кэш строк не используется")
+        cache = None
+
+    with process_pool(args.workers) as pool:
+        if cache is None:
+            data = validate(validation)
+        else:
+            # every validation row is keyed by its string and semantic row checks
+            keys = validation[[args.validation_merge_by, args.validate_by]].merge(
+                semantic[[args.semantic_merge_by, *checks]],
+                how="left",
+                left_on=args.validation_merge_by,
+                right_on=args.semantic_merge_by,
+            )
+            keys.index = validation.index
+            data = run_incremental(
+                pd.concat([validation, keys[checks].add_prefix("key: ")], axis=1),
+                [args.validation_merge_by, args.validate_by]
+                + ["key: " + column for column in checks],
+                lambda rows: validate(rows[validation.columns]),
+                cache,
+                "regex-validate",
+                run_hash(
+                    modules=("src.regx.regex_validator", "src.regx.validation_engine"),
+                    semantic_merge_by=args.semantic_merge_by,
+                    validate_by=args.validate_by,
+                ),
+                status,
+                cacheable=lambda: not stats.quarantined,
+            )
+            data = data.drop(columns=["key: " + column for column in checks])
+            cache.close()
+
+    if stats.quarantined:
+        status(f"Отключены медленные регулярные выражения: {len(stats.quarantined)}")
+        status(f"Строк без оценки: {data['validation_mark'].isna().sum()}")
+    if args.stats:
+        write_table(stats.report(), args.stats)
+
+    output = Path(args.output or output_path(REGEX_VALIDATOR_OUTPUT, args.validation))
+    write_table(data, output, status)
+    return output
+
+
+def run_cache(args: argparse.Namespace) -> None:
+    from src.row_cache import RowCache
+
+    if not Path(args.row_cache).exists():
+        status("Кэш строк пуст")
+    else:
+        cache = RowCache(args.row_cache)
+        if args.action == "stats":
+            print(cache.stats().to_string(index=False))
+            status(f"Размер кэша строк: {cache.size >> 20} МБ")
+        elif args.action == "prune":
+            status(f"Удалено строк: {cache.prune(args.max_mb << 20)}")
+        else:
+            status(f"Удалено строк: {cache.invalidate(args.pipeline)}")
+        cache.close()
+
+    if not Path(args.cache).exists():
+        return
+
+    from src.feature_flow.feature_cache import FeatureCache
+
+    cache = FeatureCache(args.cache)
+    if args.action == "stats":
+        status(f"Размер кэша признаков: {cache.size >> 20} МБ")
+    elif args.action == "prune":
+        status(f"Удалено признаков: {cache.prune(args.max_mb << 20)}")
+    elif args.pipeline in {None, "featureflow"}:
+        cache.clear()
+        status("Кэш признаков FeatureFlow очищен")
+    cache.close()
+
+
+def _timeout(value: str) -> float | None:
+    return None if value.lower() == "none" else float(value)
+
+
+def _common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-o", "--output", help="output file (by input format)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processes")
+
+
+def _row_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--row-cache",
+        default=ROW_CACHE_PATH,
+        help="persistent row results cache ('' - without cache)",
+    )
+    parser.add_argument("--row-cache-max-mb", type=int, default=ROW_CACHE_MAX_MB)
+
+
+def _pairs_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("input", help="csv, xlsx, parquet or feather file")
+    parser.add_argument("--client-column", default=CLIENT_COLUMN)
+    parser.add_argument("--source-column", default=SOURCE_COLUMN)
+    parser.add_argument(
+        "--project-columns",
+        action="store_true",
+        help="read (and write) client and source columns only",
+    )
+    _common_arguments(parser)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="skylark", description=__doc__.split("\n")[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    semantix = subparsers.add_parser("semantix", help="measures and cross-semantic")
+    semantix.add_argument("input", help="csv, xlsx, parquet or feather file")
+    semantix.add_argument("--config", default=MEASURES_CONFIG)
+    semantix.add_argument("--column", default=SEMANTIX_COLUMN)
+    semantix.add_argument("--langs", nargs="+", default=["ru", "eng"])
+    semantix.add_argument("--stream", action="store_true", help="chunked pipeline")
+    semantix.add_argument(
+        "--project-columns",
+        action="store_true",
+        help="read (and write) processed column only",
+    )
+    _common_arguments(semantix)
+    _row_cache_arguments(semantix)
+    semantix.set_defaults(run=run_semantix)
+
+    featureflow = subparsers.add_parser("featureflow", help="validation by features")
+    _pairs_arguments(featureflow)
+    featureflow.add_argument("--config", default=MEASURES_CONFIG)
+    featureflow.add_argument(
+        "--output-mode",
+        choices=["objects", "columnar"],
+        default="objects",
+    )
+    featureflow.add_argument(
+        "--cache",
+        default=FEATURE_CACHE_PATH,
+        help="persistent features cache ('' - in memory)",
+    )
+    featureflow.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=FEATURE_CACHE_MAX_MB,
+        help="features cache size, least recently used records are pruned",
+    )
+    featureflow.add_argument("--timeout", type=_timeout, default=1.0)
+    featureflow.set_defaults(run=run_featureflow)
+
+    simfyzer = subparsers.add_parser("simfyzer", help="validation by similarity")
+    _pairs_arguments(simfyzer)
+    simfyzer.add_argument("--config", default=SIMFYZER_CONFIG)
+    simfyzer.add_argument("--fuzzy-threshold", type=float, default=0.75)
+    simfyzer.add_argument("--validation-threshold", type=float, default=0.5)
+    simfyzer.set_defaults(run=run_simfyzer)
+
+    regex = subparsers.add_parser("regex-validate", help="validation by semantic")
+    regex.add_argument("semantic", help="semantic file (SemantiX output)")
+    regex.add_argument("validation", help="validation file")
+    regex.add_argument("--plus-column", default="Плюс-слова")
+    regex.add_argument("--minus-column", default="Минус-слова")
+    regex.add_argument("--regex-column", default="Regex")
+    regex.add_argument("--validate-by", default="Строка валидации")
+    regex.add_argument("--semantic-merge-by", default="Название")
+    regex.add_argument("--validation-merge-by", default="Наименование")
+    regex.add_argument("--timeout", type=_timeout, default=1.0)
+    regex.add_argument("--stats", help="file of patterns time stats")
+    _common_arguments(regex)
+    _row_cache_arguments(regex)
+    regex.set_defaults(run=run_regex_validate)
+
+    cache = subparsers.add_parser("cache", help="row results cache management")
+    cache.add_argument("action", choices=["stats", "prune", "clear"])
+    cache.add_argument(
+        "--pipeline",
+        choices=["semantix", "regex-validate", "featureflow"],
+        help="clear results of pipeline only",
+    )
+    cache.add_argument("--max-mb", type=int, default=ROW_CACHE_MAX_MB)
+    cache.add_argument("--row-cache", default=ROW_CACHE_PATH)
+    cache.add_argument("--cache", default=FEATURE_CACHE_PATH, help="features cache")
+    cache.set_defaults(run=run_cache)
+
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    args = make_parser().parse_args(argv)
+    try:
+        output = args.run(args)
+    except KeyboardInterrupt:
+        status("Остановлено")
+        return 130
+
+    if output is not None:
+        status(f"Сохранено: {output}")
+    return 0
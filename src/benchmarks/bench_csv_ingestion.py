@@ -0,0 +1,104 @@
+"""
+Benchmark of chunked csv ingestion (pyarrow reader, projected string columns)
+against pandas default reader on synthetic scrape export.
+
+    python src/benchmarks/bench_csv_ingestion.py --size-mb 5120
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import pandas as pd
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.benchmarks.bench_data import product_names, BRANDS
+from src.data_io import read_csv_chunks, CSV_CHUNK_ROWS
+
+CLIENT_COLUMN = "Название товара"
+SOURCE_COLUMN = "Сырые данные"
+BLOCK_ROWS = 50_000
+
+
+def scrape_block(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Rows of scrape export: matching columns and columns, which aren't used"""
+
+    rnd = random.Random(seed)
+    return pd.DataFrame(
+        {
+            "url": [
+                f"https://shop.example/item/{rnd.randrange(10**9)}" for _ in range(rows)
+            ],
+            CLIENT_COLUMN: product_names(rows, seed=seed),
+            SOURCE_COLUMN: product_names(rows, seed=seed + 1),
+            "description": [
+                " ".join(product_names(3, seed=index)) for index in range(rows)
+            ],
+            "price": [round(rnd.uniform(10, 5000), 2) for _ in range(rows)],
+            "brand": [rnd.choice(BRANDS) for _ in range(rows)],
+            "in_stock": [rnd.random() < 0.8 for _ in range(rows)],
+        }
+    )
+
+
+def make_export(path: Path, size_mb: int) -> int:
+    """Write csv of about size_mb megabytes, return rows count"""
+
+    block = scrape_block(BLOCK_ROWS).to_csv(index=False)
+    header, body = block.split("\n", 1)
+
+    rows = 0
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(header + "\n")
+        while file.tell() < size_mb << 20:
+            file.write(body)
+            rows += BLOCK_ROWS
+    return rows
+
+
+def ingestion_time(read) -> tuple[float, int]:
+    start = time.perf_counter()
+    rows = sum(len(chunk) for chunk in read())
+    return time.perf_counter() - start, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=5120)
+    parser.add_argument("--path", type=str, default=None)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    path = Path(args.path or Path(tempfile.gettempdir()) / "scrape_export.csv")
+    rows = make_export(path, args.size_mb)
+    size_mb = os.path.getsize(path) / (1 << 20)
+
+    try:
+        default, _ = ingestion_time(lambda: pd.read_csv(path, chunksize=CSV_CHUNK_ROWS))
+        chunked, read_rows = ingestion_time(
+            lambda: read_csv_chunks(
+                path,
+                [CLIENT_COLUMN, SOURCE_COLUMN],
+                categorical=[SOURCE_COLUMN],
+            )
+        )
+    finally:
+        if not args.keep:
+            path.unlink()
+
+    assert read_rows == rows
+    print(f"rows: {rows}, size: {size_mb:.0f} MB")
+    print(f"pandas default: {default:.2f}s ({size_mb / default:.0f} MB/s)")
+    print(f"pyarrow chunks: {chunked:.2f}s ({size_mb / chunked:.0f} MB/s)")
+    print(f"speedup: {default / chunked:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
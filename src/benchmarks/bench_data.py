@@ -0,0 +1,105 @@
+import random
+import pandas as pd
+
+PRODUCTS = [
+    "Шампунь",
+    "Кофе молотый",
+    "Сок яблочный",
+    "Аспирин таблетки",
+    "Крем для рук",
+    "Чай черный",
+    "Смартфон",
+    "Флешка",
+    "Кабель USB",
+    "Футболка",
+    "Корм для кошек",
+    "Вода минеральная",
+    "Шоколад молочный",
+    "Сироп от кашля",
+    "Плитка керамическая",
+]
+
+BRANDS = [
+    "Head&Shoulders",
+    "Jacobs",
+    "Добрый",
+    "Bayer",
+    "Nivea",
+    "Lipton",
+    "Samsung",
+    "Kingston",
+    "Ugreen",
+    "Adidas",
+    "Whiskas",
+    "Borjomi",
+    "Alpen Gold",
+    "Pharmstandard",
+    "Kerama Marazzi",
+]
+
+EXTRAS = [
+    "новинка",
+    "original",
+    "для всей семьи",
+    "premium",
+    "эко",
+    "classic",
+    "в ассортименте",
+    "арт. 4607001",
+    "black edition",
+    "синий",
+    "красный",
+]
+
+MEASURES = [
+    "{} мл",
+    "{}мл",
+    "{} л",
+    "{} г",
+    "{}гр",
+    "{} кг",
+    "{} шт",
+    "№{}",
+    "{} мг",
+    "{}GB",
+    "{} см",
+    "{}мм",
+    "{}%",
+]
+
+VALUES = ["1", "2", "5", "10", "20", "50", "100", "250", "500", "0.5", "1,5", "64"]
+
+
+def product_name(rnd: random.Random) -> str:
+    parts = [rnd.choice(PRODUCTS), rnd.choice(BRANDS)]
+
+    for _ in range(rnd.choice([0, 1, 1, 1, 2])):
+        parts.append(rnd.choice(MEASURES).format(rnd.choice(VALUES)))
+
+    if rnd.random() < 0.5:
+        parts.append(rnd.choice(EXTRAS))
+    return " ".join(parts)
+
+
+def product_names(count: int, unique: int = 0, seed: int = 0) -> list[str]:
+    """Generate product names, 'unique' limits count of distinct names"""
+
+    rnd = random.Random(seed)
+    unique = unique if unique else count
+    names = [product_name(rnd) for _ in range(unique)]
+    return [rnd.choice(names) for _ in range(count)] if unique < count else names
+
+
+def matching_pairs(
+    count: int,
+    client: str,
+    source: str,
+    unique: int = 0,
+    seed: int = 0,
+) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            client: product_names(count, unique, seed),
+            source: product_names(count, unique, seed + 1),
+        }
+    )
@@ -0,0 +1,76 @@
+"""
+Benchmark of regex fragments deletion (del_rx) in cross-semantic.
+
+    python src/benchmarks/bench_del_rx.py --rows 20000
+
+Legacy deletion is row-wise DataFrame.apply with re.sub of every fragment.
+re.sub compiles fragments through the re module cache (512 patterns), so
+compilation isn't the main cost of it: del_rx gains by plain loop over rows,
+grouped by fragments lists, and by patterns, which aren't looked up per call.
+Both ways delete fragments one by one, so rows are identical.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import pandas as pd
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.benchmarks.bench_data import product_names
+from src.semantix.common import PatternCache, del_rx, parse_rx
+from src.semantix.measures_extraction import MeasuresExtractor
+
+CONFIG_PATH = PROJECT_DIR / "config" / "measures_config" / "setups" / "main.json"
+
+
+def legacy_del_rx(data: pd.DataFrame, col: str) -> pd.DataFrame:
+    def _del(row):
+        for rx in row["rx_to_del"]:
+            row["row"] = re.sub(rx, "", row["row"], flags=re.IGNORECASE)
+        return row
+
+    data["row"] = data[col].astype(str) + " "
+    data = parse_rx(data)
+    data = data.apply(_del, axis=1)
+    data.drop("rx_to_del", axis=1, inplace=True)
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH, "rb") as file:
+        config = json.loads(file.read())
+
+    # comma decimals with some units break numeric values of extractor
+    names = [name for name in product_names(args.rows) if "," not in name]
+    data = pd.DataFrame({"name": names})
+    data = MeasuresExtractor(config).extract(data, "name", concat_regex=True)
+
+    start = time.perf_counter()
+    legacy = legacy_del_rx(data.copy(), "name")
+    legacy_time = time.perf_counter() - start
+
+    patterns = PatternCache()
+    start = time.perf_counter()
+    grouped = del_rx(data.copy(), "name", patterns)
+    grouped_time = time.perf_counter() - start
+
+    assert legacy["row"].to_list() == grouped["row"].to_list()
+    print(f"rows: {len(data)}, fragments lists: {patterns.misses}")
+    print(f"legacy apply with re.sub: {legacy_time:.2f}s")
+    print(f"grouped del_rx: {grouped_time:.2f}s")
+    print(f"speedup: {legacy_time / grouped_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
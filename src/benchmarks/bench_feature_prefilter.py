@@ -0,0 +1,57 @@
+"""
+Benchmark of units literal prefilter in FeatureFlow extraction.
+
+    python src/benchmarks/bench_feature_prefilter.py --rows 20000
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.benchmarks.bench_data import product_names
+from src.feature_flow.main import FeatureFlow
+from src.feature_flow.feature_generator import FeatureGenerator
+from src.feature_flow import feature_prefilter
+
+CONFIG_PATH = PROJECT_DIR / "config" / "measures_config" / "setups" / "main.json"
+
+
+def extraction_time(names: list[str], use_prefilter: bool) -> tuple[float, FeatureFlow]:
+    with open(CONFIG_PATH, "rb") as file:
+        config = json.loads(file.read())
+
+    features = FeatureGenerator().generate(config)
+    flow = FeatureFlow("client", "source", features, use_prefilter=use_prefilter)
+
+    start = time.perf_counter()
+    flow._extract_names(names)
+    return time.perf_counter() - start, flow
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    names = list(dict.fromkeys(product_names(args.rows)))
+    engine = "aho-corasick" if feature_prefilter.ahocorasick else "substring"
+
+    plain, _ = extraction_time(names, use_prefilter=False)
+    filtered, flow = extraction_time(names, use_prefilter=True)
+
+    print(f"names: {len(names)}, units: {len(flow.units)}, engine: {engine}")
+    print(f"skip rate: {flow.prefilter.skip_rate:.1%}")
+    print(f"without prefilter: {plain:.2f}s")
+    print(f"with prefilter: {filtered:.2f}s")
+    print(f"speedup: {plain / filtered:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
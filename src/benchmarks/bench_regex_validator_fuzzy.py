@@ -0,0 +1,91 @@
+"""
+Benchmark of batched fuzzy scoring in RegexValidatorPro
+(rapidfuzz cdist by patterns groups against fuzzywuzzy row by row).
+Marks of the modes differ: rapidfuzz partial_ratio finds the best alignment,
+fuzzywuzzy one uses difflib blocks, so marks difference is reported too.
+
+    python src/benchmarks/bench_regex_validator_fuzzy.py --rows 1000000
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.benchmarks.bench_data import product_names, PRODUCTS
+from src.regx.regex_validator import RegexValidatorPro
+from src.regx.modes import PlusFuzzy, MinusFuzzy
+
+PLUS_WORDS = "молот|яблоч|черн|таблет|минерал"
+MINUS_WORDS = "зерн|груш|зелен|шипуч|газир"
+
+
+def bench_data(rows: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    semantic = pd.DataFrame(
+        {
+            "Название": PRODUCTS,
+            "Плюс-слова": PLUS_WORDS,
+            "Минус-слова": MINUS_WORDS,
+            "Regex": r"(?=.*(\d+\s*(?:мл|л|г|кг)))",
+        }
+    )
+
+    names = product_names(rows)
+    validation = pd.DataFrame(
+        {
+            "Название": [PRODUCTS[index % len(PRODUCTS)] for index in range(rows)],
+            "Строка валидации": names,
+        }
+    )
+    return semantic, validation
+
+
+def validation_time(
+    semantic: pd.DataFrame,
+    validation: pd.DataFrame,
+    batch: bool,
+) -> tuple[float, pd.Series]:
+    validator = RegexValidatorPro(
+        semantic.copy(),
+        validation.copy(),
+        plus_weight=1,
+        minus_weight=1,
+        regex_weight=1,
+        use_fuzzy=[PlusFuzzy, MinusFuzzy],
+        batch=batch,
+    )
+
+    start = time.perf_counter()
+    output = validator.validate()
+    return time.perf_counter() - start, output["validation_mark"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    semantic, validation = bench_data(args.rows)
+
+    apply_time, apply_marks = validation_time(semantic, validation, batch=False)
+    batch_time, batch_marks = validation_time(semantic, validation, batch=True)
+
+    difference = np.abs(apply_marks.to_numpy() - batch_marks.to_numpy())
+    print(f"rows: {len(validation)}, semantic rows: {len(semantic)}")
+    print(f"fuzzywuzzy apply: {apply_time:.2f}s")
+    print(f"rapidfuzz cdist: {batch_time:.2f}s")
+    print(f"speedup: {apply_time / batch_time:.2f}x")
+    print(f"max mark difference: {difference.max():.4f}")
+    print(f"mean mark difference: {difference.mean():.4f}")
+    print(f"rows with different marks: {(difference > 1e-9).mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import hashlib
+import importlib
+from pathlib import Path
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _module_hash(module_name: str) -> str:
+    module = importlib.import_module(module_name)
+    path = getattr(module, "__file__", None)
+    if path is None or not Path(path).exists():
+        return module_name
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def code_version(*modules: str) -> str:
+    """
+    Version of engine code: hash of modules sources, so results cached
+    by previous code aren't used after any change of these modules
+
+    - modules - names of modules, which results depend on
+    """
+
+    signature = "|".join(_module_hash(module) for module in modules)
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
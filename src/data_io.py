@@ -0,0 +1,346 @@
+import csv
+import time
+import numbers
+import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from pathlib import Path
+from typing import Callable, Iterator
+
+CSV = ".csv"
+EXCEL = ".xlsx"
+PARQUET = ".parquet"
+FEATHER = ".feather"
+
+COLUMNAR_FORMATS = {PARQUET, FEATHER}
+TABLE_FORMATS = {CSV, EXCEL} | COLUMNAR_FORMATS
+
+CSV_CHUNK_ROWS = 100_000
+CSV_BLOCK_SIZE = 16 << 20  # bytes, parsed by pyarrow threads
+
+EXCEL_MAX_ROWS = 1_048_576  # header row included
+EXCEL_CHUNK_ROWS = 50_000
+
+SPLIT_SHEETS = "sheets"
+SPLIT_FILES = "files"
+
+EXCEL_TYPES = (str, numbers.Number, datetime.datetime, datetime.date, datetime.time)
+
+
+def table_format(path: str | Path) -> str:
+    """Return table file format by path suffix"""
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in TABLE_FORMATS:
+        raise ValueError("File should be Excel, csv, parquet or feather")
+    return suffix
+
+
+def arrow_strings(data: pd.DataFrame) -> pd.DataFrame:
+    """Convert text columns to arrow backed strings"""
+
+    for column in data.columns:
+        if data[column].dtype == object or pd.api.types.is_string_dtype(data[column]):
+            data[column] = data[column].astype("string[pyarrow]")
+    return data
+
+
+def _arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(
+        types_mapper=lambda t: pd.StringDtype("pyarrow") if t == pa.string() else None
+    )
+
+
+def _csv_options(
+    path: str | Path,
+    columns: list[str] = None,
+    categorical: list[str] = (),
+    encoding: str = "utf-8",
+) -> tuple[pa_csv.ReadOptions, pa_csv.ConvertOptions]:
+    """
+    Options of multi-threaded pyarrow reader: columns are strings or categories
+    (types aren't inferred by pyarrow, it infers them by the first block only)
+    """
+
+    if columns is None:
+        with open(path, newline="", encoding=encoding) as file:
+            columns = next(csv.reader(file), [])
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        block_size=CSV_BLOCK_SIZE,
+        encoding=encoding,
+    )
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={
+            column: category if column in categorical else pa.string()
+            for column in columns
+        },
+        strings_can_be_null=True,
+    )
+    return read_options, convert_options
+
+
+def _infer_numbers(table: pa.Table, text_columns: list[str] = ()) -> pa.Table:
+    """Cast string columns to int64 or float64, if all their values are numbers"""
+
+    for index, field in enumerate(table.schema):
+        column = table.column(index)
+        if (
+            field.name in text_columns
+            or field.type != pa.string()
+            or column.null_count == len(column)
+        ):
+            continue
+
+        for number_type in (pa.int64(), pa.float64()):
+            try:
+                numbers = column.cast(number_type)
+            except pa.ArrowInvalid:
+                continue
+            table = table.set_column(index, field.with_type(number_type), numbers)
+            break
+    return table
+
+
+def read_csv_chunks(
+    path: str | Path,
+    columns: list[str] = None,
+    chunk_size: int = CSV_CHUNK_ROWS,
+    categorical: list[str] = (),
+    encoding: str = "utf-8",
+) -> Iterator[pd.DataFrame]:
+    """
+    Read csv by chunks of chunk_size rows (pyarrow streaming reader).
+    Only columns are read (all, if they aren't set) as arrow strings,
+    categorical columns are read as categories. Empty values are NA.
+    Numbers aren't inferred: types of chunks would differ, cast them by chunk.
+    """
+
+    read_options, convert_options = _csv_options(path, columns, categorical, encoding)
+    reader = pa_csv.open_csv(path, read_options, convert_options=convert_options)
+
+    batches, rows = [], 0
+    for batch in reader:
+        batches.append(batch)
+        rows += batch.num_rows
+        while rows >= chunk_size:
+            table = pa.Table.from_batches(batches, reader.schema)
+            yield _arrow_to_pandas(table.slice(0, chunk_size))
+
+            rest = table.slice(chunk_size)
+            batches, rows = rest.to_batches(), rest.num_rows
+
+    if rows:
+        yield _arrow_to_pandas(pa.Table.from_batches(batches, reader.schema))
+
+
+def read_table(
+    path: str | Path,
+    columns: list[str] = None,
+    categorical: list[str] = (),
+    text_columns: list[str] = (),
+    encoding: str = "utf-8",
+) -> pd.DataFrame:
+    """
+    Read table file. Only columns are read, if they are set.
+    Parquet and feather text columns are read as arrow strings,
+    so tables written by write_table are read back unchanged.
+    Csv is read by multi-threaded pyarrow reader (in encoding) as strings,
+    categorical columns as categories, other columns, which values
+    are all numbers, are cast to int64 or float64 (like pandas),
+    except text_columns (e.g. codes with leading zeros).
+    """
+
+    file_format = table_format(path)
+    if file_format == PARQUET:
+        return arrow_strings(pd.read_parquet(path, columns=columns))
+    if file_format == FEATHER:
+        return arrow_strings(pd.read_feather(path, columns=columns))
+    if file_format == CSV:
+        read_options, convert_options = _csv_options(
+            path, columns, categorical, encoding
+        )
+        table = pa_csv.read_csv(path, read_options, convert_options=convert_options)
+        return _arrow_to_pandas(_infer_numbers(table, text_columns))
+    return pd.read_excel(path, usecols=columns)
+
+
+def preview_table(path: str | Path, rows: int = 5) -> pd.DataFrame:
+    """Read the first rows of table file"""
+
+    file_format = table_format(path)
+    if file_format == PARQUET:
+        batches = pq.ParquetFile(path).iter_batches(batch_size=rows)
+        return next(batches).to_pandas()
+    if file_format == FEATHER:
+        return feather.read_table(path).slice(0, rows).to_pandas()
+    if file_format == CSV:
+        return pd.read_csv(path, nrows=rows)
+    return pd.read_excel(path, nrows=rows)
+
+
+def _excel_value(value):
+    if value is None or isinstance(value, EXCEL_TYPES):
+        return value
+    return str(value)
+
+
+class ExcelStreamWriter(object):
+    """
+    Constant-memory Excel writer (openpyxl write-only workbook),
+    which is fed chunk by chunk. Rows over Excel limit go to the next sheet
+    (or to the next file '<name>_2.xlsx' etc.), header is written to every one.
+
+    - path - output path
+    - split - SPLIT_SHEETS or SPLIT_FILES
+    - max_rows - rows of sheet with header
+    - status_callback - throughput is reported after every chunk
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        split: str = SPLIT_SHEETS,
+        max_rows: int = EXCEL_MAX_ROWS,
+        status_callback: Callable = None,
+    ) -> None:
+        if split not in {SPLIT_SHEETS, SPLIT_FILES}:
+            raise ValueError(f"Split should be '{SPLIT_SHEETS}' or '{SPLIT_FILES}'")
+
+        self.path = Path(path)
+        self.split = split
+        self.max_rows = max_rows
+        self.status_callback = status_callback
+
+        self.paths: list[Path] = []
+        self.rows = 0
+        self.seconds = 0.0
+
+        self._workbook = None
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheets = 0
+        self._header: list[str] = None
+
+    def call_status(self, message: str) -> None:
+        if self.status_callback is not None:
+            self.status_callback(message)
+
+    def _new_workbook(self) -> None:
+        from openpyxl import Workbook
+
+        self._close_workbook()
+        self._workbook = Workbook(write_only=True)
+        self._sheets = 0
+
+        number = len(self.paths) + 1
+        suffix = f"_{number}" if number > 1 else ""
+        self.paths.append(self.path.with_name(self.path.stem + suffix + EXCEL))
+
+    def _new_sheet(self) -> None:
+        if self._workbook is None or self.split == SPLIT_FILES:
+            self._new_workbook()
+
+        self._sheets += 1
+        title = "Sheet" if self._sheets == 1 else f"Sheet{self._sheets}"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self._header)
+        self._sheet_rows = 1
+
+    def _close_workbook(self) -> None:
+        if self._workbook is not None:
+            self._workbook.save(self.paths[-1])
+            self._workbook = None
+
+    def _chunk_rows(self, chunk: pd.DataFrame) -> list[tuple]:
+        columns = []
+        for column in chunk.columns:
+            series = chunk[column]
+            values = series.astype(object).where(series.notna(), None).to_list()
+            if series.dtype == object:
+                values = [_excel_value(value) for value in values]
+            columns.append(values)
+        return list(zip(*columns))
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        start = time.perf_counter()
+        if self._header is None:
+            self._header = [str(column) for column in chunk.columns]
+
+        for row in self._chunk_rows(chunk):
+            if self._sheet is None or self._sheet_rows == self.max_rows:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+
+        self.rows += len(chunk)
+        self.seconds += time.perf_counter() - start
+        self.call_status(f"Записано строк: {self.rows} ({self.throughput:.0f} строк/с)")
+
+    def close(self) -> list[Path]:
+        """Save workbook and return paths of written files"""
+
+        start = time.perf_counter()
+        if self._sheet is None and self._header is not None:
+            self._new_sheet()  # header only
+        self._close_workbook()
+        self.seconds += time.perf_counter() - start
+        return self.paths
+
+    @property
+    def throughput(self) -> float:
+        """Written rows per second"""
+
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __enter__(self) -> "ExcelStreamWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def write_table(
+    data: pd.DataFrame,
+    path: str | Path,
+    status_callback: Callable = None,
+) -> None:
+    """
+    Write table file, text columns of parquet and feather are arrow strings,
+    Excel file is written by chunks (it is split, if data is over Excel limit)
+    """
+
+    file_format = table_format(path)
+    if file_format in COLUMNAR_FORMATS:
+        data = arrow_strings(data.reset_index(drop=True))
+        if file_format == PARQUET:
+            data.to_parquet(path, index=False)
+        else:
+            data.to_feather(path)
+    elif file_format == CSV:
+        data.to_csv(path, index=False)
+    else:
+        with ExcelStreamWriter(path, status_callback=status_callback) as writer:
+            for start in range(0, len(data), EXCEL_CHUNK_ROWS):
+                writer.write(data.iloc[start : start + EXCEL_CHUNK_ROWS])
+            if data.empty:
+                writer.write(data)
+
+
+def output_path(path: str | Path, data_path: str | Path) -> Path:
+    """
+    Return output path, which has the format of input data
+    for columnar formats (Excel path is kept for others)
+    """
+
+    path = Path(path)
+    file_format = table_format(data_path)
+    if file_format in COLUMNAR_FORMATS:
+        return path.with_suffix(file_format)
+    return path
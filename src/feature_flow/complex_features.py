@@ -7,7 +7,8 @@ from pathlib import Path
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
 
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 from src.feature_flow.feature_functool import AbstractFeature, FeatureUnit
 
 
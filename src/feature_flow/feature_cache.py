@@ -0,0 +1,228 @@
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.code_version import code_version
+from src.row_cache import MAX_BYTES
+from src.feature_flow.feature_functool import AbstractFeature
+
+# extraction code: units search and features values
+EXTRACTION_MODULES = ("src.feature_flow.main", "src.feature_flow.feature_functool")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Cache key of product name, it is extraction input too
+    (it isn't stripped: units regexes depend on padding)
+    """
+    return str(name)
+
+
+def features_hash(features: Iterable[AbstractFeature]) -> str:
+    """
+    Hash of everything that affects extraction:
+    features order, their units, units regexes and weights, extraction code
+    """
+
+    signature = [
+        [
+            feature.NAME,
+            [[unit.name, unit.regex, str(unit.weight)] for unit in feature.units],
+        ]
+        for feature in features
+    ]
+    signature = [code_version(*EXTRACTION_MODULES), signature]
+    signature = json.dumps(signature, ensure_ascii=False)
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+
+class FeatureCache(object):
+    """
+    Content-addressed cache of extracted features.
+
+    Key is normalized product name, namespace is features config hash.
+    Record is dict {feature name: [[unit index, extracted value], ...]},
+    so it can be stored as json and converted back to features objects.
+    Records of sqlite file over max_bytes are pruned, least recently used first
+    (the same as RowCache ones).
+
+    - path - sqlite file for persistence between runs (memory only if not set)
+    - max_bytes - records size limit of sqlite file
+    """
+
+    TABLE = "features"
+    COLUMNS = ["config_hash", "name", "record", "size", "used"]
+    SQL_CHUNK_SIZE = 500
+
+    def __init__(self, path: str | Path = None, max_bytes: int = MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: dict[tuple[str, str], dict] = {}
+        self._connection = self._connect(path) if path else None
+
+    def _connect(self, path: str | Path) -> sqlite3.Connection:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # runners use cache from QThread, so connection can't be thread bound
+        connection = sqlite3.connect(str(path), check_same_thread=False)
+
+        columns = [
+            row[1] for row in connection.execute(f"PRAGMA table_info({self.TABLE})")
+        ]
+        if columns and columns != self.COLUMNS:
+            # cache of the former version without records sizes
+            connection.execute(f"DROP TABLE {self.TABLE}")
+
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            "config_hash TEXT NOT NULL, "
+            "name TEXT NOT NULL, "
+            "record TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "used REAL NOT NULL, "
+            "PRIMARY KEY (config_hash, name))"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.TABLE}_used ON {self.TABLE} (used)"
+        )
+        connection.commit()
+        return connection
+
+    def _chunks(self, values: list) -> list[list]:
+        size = self.SQL_CHUNK_SIZE
+        return [values[i : i + size] for i in range(0, len(values), size)]
+
+    def _load(self, config_hash: str, names: list[str]) -> dict[str, dict]:
+        """Return records of names from sqlite file (they are marked as used)"""
+
+        loaded = {}
+        used = time.time()
+        for chunk in self._chunks(names):
+            placeholders = ", ".join(["?"] * len(chunk))
+            where = f"WHERE config_hash = ? AND name IN ({placeholders})"
+            rows = self._connection.execute(
+                f"SELECT name, record FROM {self.TABLE} {where}",
+                [config_hash, *chunk],
+            )
+            for name, record in rows:
+                loaded[name] = json.loads(record)
+
+            self._connection.execute(
+                f"UPDATE {self.TABLE} SET used = ? {where}",
+                [used, config_hash, *chunk],
+            )
+        self._connection.commit()
+        return loaded
+
+    def get_many(self, config_hash: str, names: list[str]) -> dict[str, dict]:
+        """Return records of cached names, missed names are skipped"""
+
+        found = {}
+        not_in_memory = []
+        for name in names:
+            record = self._memory.get((config_hash, name))
+            if record is not None:
+                found[name] = record
+            else:
+                not_in_memory.append(name)
+
+        if self._connection is not None and not_in_memory:
+            loaded = self._load(config_hash, not_in_memory)
+            for name, record in loaded.items():
+                self._memory[(config_hash, name)] = record
+            found.update(loaded)
+
+        self.hits += len(found)
+        self.misses += len(names) - len(found)
+        return found
+
+    def set_many(self, config_hash: str, records: dict[str, dict]) -> None:
+        for name, record in records.items():
+            self._memory[(config_hash, name)] = record
+
+        if self._connection is not None and records:
+            used = time.time()
+            rows = []
+            for name, record in records.items():
+                record = json.dumps(record, ensure_ascii=False)
+                rows.append((config_hash, name, record, len(record), used))
+
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._connection.commit()
+            self.prune()
+
+    @property
+    def size(self) -> int:
+        """Records size of sqlite file in bytes"""
+
+        if self._connection is None:
+            return 0
+
+        (size,) = self._connection.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}"
+        ).fetchone()
+        return size
+
+    def prune(self, max_bytes: int = None) -> int:
+        """
+        Delete least recently used records of sqlite file over max_bytes,
+        return their count
+        """
+
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        excess = self.size - max_bytes
+        if excess <= 0:
+            return 0
+
+        pruned = []
+        rows = self._connection.execute(
+            f"SELECT rowid, size FROM {self.TABLE} ORDER BY used, rowid"
+        )
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            pruned.append(rowid)
+            excess -= size
+
+        for chunk in self._chunks(pruned):
+            placeholders = ", ".join(["?"] * len(chunk))
+            self._connection.execute(
+                f"DELETE FROM {self.TABLE} WHERE rowid IN ({placeholders})",
+                chunk,
+            )
+        self._connection.commit()
+        return len(pruned)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._connection is not None:
+            self._connection.execute(f"DELETE FROM {self.TABLE}")
+            self._connection.commit()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __repr__(self) -> str:
+        return f"FeatureCache(path={self.path}, hits={self.hits}, misses={self.misses})"
@@ -38,10 +38,12 @@ class FeatureUnit(object):
         name: str,
         regex: str,
         weight: int,
+        symbol: str = "",
     ) -> None:
         self.name = name
         self.regex = regex
         self.weight = Decimal(str(weight))
+        self.symbol = symbol
 
     def __repr__(self) -> str:
         return f"{self.name} with weight {self.weight}"
@@ -98,15 +100,19 @@ class NotFoundStatus(object):
         else:  # not_found_mode == FeatureNotFoundMode.STRICT
             self.desicion = 0
 
+    @classmethod
+    def one_not_found_desicion(cls, not_found_mode: FeatureNotFoundMode) -> int:
+        if not_found_mode == cls.ACCEPT:
+            return 1
+        else:  # not_found_mode == cls.DROP:
+            return 0
+
     @property
     def desicion(self) -> int:
         if self.both_not_found:
             return 1
         elif self.one_not_found:
-            if self.not_found_mode == self.ACCEPT:
-                return 1
-            else:  # self.not_found_mode == self.DROP:
-                return 0
+            return self.one_not_found_desicion(self.not_found_mode)
 
     @property
     def status(self) -> str:
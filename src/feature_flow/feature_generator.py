@@ -5,7 +5,8 @@ from pathlib import Path
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from config.measures_config.config_parser import (
     CONFIG,
@@ -188,6 +189,17 @@ class FeatureCreatorTool(object):
 
 
 class FeatureGenerator(object):
+    """
+    Create features from measures config.
+
+    Generation is split in two steps:
+    - compile - walk config and build serializable plan
+    (units regexes, weights, modes and priorities)
+    - load - create features classes from plan
+    """
+
+    PLAN_VERSION = 1
+
     __type_mapper = {
         CONFIG.NUMERIC_MEASURES: NumericUnit,
         CONFIG.STRING_MEASURES: StringUnit,
@@ -200,29 +212,40 @@ class FeatureGenerator(object):
         CONFIG.COMPLEX_MEASURES: FeatureCreatorTool._create_complex,
     }
 
-    def _generate_complex(self, config: dict) -> list[AbstractFeature]:
+    def _compile_feature(
+        self,
+        measure_type: str,
+        measure_record: dict,
+        units: list[dict],
+    ) -> dict:
+        feature_conf = measure_record[MEASURE.TEXT_FEATURES]
+        return {
+            "type": measure_type,
+            "name": measure_record[MEASURE.NAME],
+            "validation_mode": feature_conf[TEXT_FEATURES_CONF.VALIDATION_MODE],
+            "not_found_mode": feature_conf[TEXT_FEATURES_CONF.NOT_FOUND_MODE],
+            "priority": feature_conf[TEXT_FEATURES_CONF.PRIORITY],
+            "units": units,
+        }
+
+    def _compile_complex(self, config: dict) -> list[dict]:
         complex_features = []
-        creator_func = self.__func_mapper[CONFIG.COMPLEX_MEASURES]
         if config[CONFIG.COMPLEX_MEASURES][CONFIG.USE_IT]:
             measure_records = config[CONFIG.COMPLEX_MEASURES][CONFIG.MEASURES]
             for measure_record in measure_records:
-                feature_conf = measure_record[MEASURE.TEXT_FEATURES]
-                feature = creator_func(
-                    measure_record[MEASURE.NAME],
+                feature = self._compile_feature(
+                    CONFIG.COMPLEX_MEASURES,
+                    measure_record,
                     [],
-                    feature_conf[TEXT_FEATURES_CONF.VALIDATION_MODE],
-                    feature_conf[TEXT_FEATURES_CONF.NOT_FOUND_MODE],
-                    feature_conf[TEXT_FEATURES_CONF.PRIORITY],
                 )
                 complex_features.append(feature)
 
         return complex_features
 
-    def _generate_default(self, config: dict) -> list[AbstractFeature]:
+    def _compile_default(self, config: dict) -> list[dict]:
         default_features = []
         for MEASURE_TYPE in CONFIG.MEASURE_TYPES:
             type: Unit = self.__type_mapper[MEASURE_TYPE]
-            creator_func = self.__func_mapper[MEASURE_TYPE]
 
             if config[MEASURE_TYPE][CONFIG.USE_IT]:
                 data = config[MEASURE_TYPE]
@@ -243,31 +266,69 @@ class FeatureGenerator(object):
                                     measure_data[DATA.SPECIAL_VALUE_SEARCH],
                                 )
 
-                                regex = _feature.get_search_regex()
-                                unit = FeatureUnit(
-                                    feature_data[UNIT.NAME],
-                                    regex,
-                                    feature_data[UNIT.RWEIGHT],
-                                )
+                                unit = {
+                                    "name": feature_data[UNIT.NAME],
+                                    "symbol": feature_data[UNIT.SYMBOL],
+                                    "regex": _feature.get_search_regex(),
+                                    "weight": str(feature_data[UNIT.RWEIGHT]),
+                                }
                                 units.append(unit)
 
-                            feature = creator_func(
-                                measure_record[MEASURE.NAME],
+                            feature = self._compile_feature(
+                                MEASURE_TYPE,
+                                measure_record,
                                 units,
-                                feature_conf[TEXT_FEATURES_CONF.VALIDATION_MODE],
-                                feature_conf[TEXT_FEATURES_CONF.NOT_FOUND_MODE],
-                                feature_conf[TEXT_FEATURES_CONF.PRIORITY],
                             )
                             default_features.append(feature)
 
         return default_features
 
-    def generate(self, config: dict) -> list[AbstractFeature]:
-        """Parse config and create dict with Measure objects
-        accorging to parsed rules"""
+    def compile(self, config: dict) -> dict:
+        """Parse config and create serializable features plan"""
+
+        features = []
+        features.extend(self._compile_default(config))
+        features.extend(self._compile_complex(config))
+
+        return {
+            "version": self.PLAN_VERSION,
+            "features": features,
+        }
+
+    def load(self, plan: dict) -> list[AbstractFeature]:
+        """Create features according to compiled plan"""
+
+        if plan.get("version") != self.PLAN_VERSION:
+            raise ValueError(
+                f"Unsupported features plan version: {plan.get('version')}"
+            )
 
         features_list = []
-        features_list.extend(self._generate_default(config))
-        features_list.extend(self._generate_complex(config))
+        for record in plan["features"]:
+            creator_func = self.__func_mapper[record["type"]]
+            units = [
+                FeatureUnit(
+                    unit["name"],
+                    unit["regex"],
+                    unit["weight"],
+                    unit["symbol"],
+                )
+                for unit in record["units"]
+            ]
+
+            feature = creator_func(
+                record["name"],
+                units,
+                record["validation_mode"],
+                record["not_found_mode"],
+                record["priority"],
+            )
+            features_list.append(feature)
 
         return features_list
+
+    def generate(self, config: dict) -> list[AbstractFeature]:
+        """Parse config and create dict with Measure objects
+        accorging to parsed rules"""
+
+        return self.load(self.compile(config))
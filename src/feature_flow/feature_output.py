@@ -0,0 +1,139 @@
+import sys
+import pandas as pd
+from decimal import Decimal
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.notation import FEATURES
+from src.data_io import arrow_strings
+from src.feature_flow.feature_functool import AbstractFeature
+
+ROW_ID = "row_id"
+SIDE = "side"
+FEATURE_NAME = "feature_name"
+UNIT_NAME = "unit"
+CANONICAL_VALUE = "canonical_value"
+
+CLIENT_SIDE = "client"
+SOURCE_SIDE = "source"
+
+FEATURES_TABLE_SUFFIX = "_features"
+
+
+class FeatureOutputMode(object):
+    """
+    FeatureFlow output mode
+
+    Mode can be:
+        - objects : lists of features objects in FEATURES.CLIENT/SOURCE columns
+        - columnar : long features table (row_id, side, feature_name,
+        unit, canonical_value) without objects columns
+
+    Default mode:
+        - objects
+    """
+
+    OBJECTS = "objects"
+    COLUMNAR = "columnar"
+
+    modes = {OBJECTS, COLUMNAR}
+    default = OBJECTS
+
+    @classmethod
+    def checkout(self, mode: str) -> str:
+        if mode not in self.modes:
+            mode = self.default
+        return mode
+
+
+def canonical_value(value) -> str:
+    """String of feature standard value. Equal features have equal strings"""
+
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    if isinstance(value, (set, frozenset)):
+        return "x".join(sorted(canonical_value(v) for v in value))
+    return str(value)
+
+
+def features_table(
+    row_ids: list,
+    sides_keys: dict[str, list[str]],
+    records: dict[str, dict],
+    features: list[AbstractFeature],
+) -> pd.DataFrame:
+    """
+    Create long features table from extraction records
+
+    - row_ids - ids of data rows
+    - sides_keys - {side: names keys of rows}
+    - records - extraction records {key: {feature name: [[unit index, value]]}}
+    - features - features in validation order
+    """
+
+    columns = {
+        ROW_ID: [],
+        SIDE: [],
+        FEATURE_NAME: [],
+        UNIT_NAME: [],
+        CANONICAL_VALUE: [],
+    }
+
+    for side, keys in sides_keys.items():
+        key_rows: dict[str, list[tuple[str]]] = {}
+        for row_id, key in zip(row_ids, keys):
+            if key not in key_rows:
+                rows = []
+                for feature in features:
+                    units = feature.units
+                    for unit_index, value in records[key][feature.NAME]:
+                        unit = units[unit_index]
+                        standard = feature(value, unit).standard_value
+                        rows.append(
+                            (feature.NAME, unit.name, canonical_value(standard))
+                        )
+                key_rows[key] = rows
+
+            for feature_name, unit_name, value in key_rows[key]:
+                columns[ROW_ID].append(row_id)
+                columns[SIDE].append(side)
+                columns[FEATURE_NAME].append(feature_name)
+                columns[UNIT_NAME].append(unit_name)
+                columns[CANONICAL_VALUE].append(value)
+
+    return arrow_strings(pd.DataFrame(columns))
+
+
+def features_table_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + FEATURES_TABLE_SUFFIX + path.suffix)
+
+
+def save_columnar(
+    data: pd.DataFrame,
+    table: pd.DataFrame,
+    path: str | Path,
+) -> None:
+    """
+    Save validated data and features table as parquet files:
+    data (with row_id and decision columns) to path
+    and features table to path with '_features' suffix
+    """
+
+    data = data.drop([FEATURES.CLIENT, FEATURES.SOURCE], axis=1, errors="ignore")
+    data = arrow_strings(data.rename_axis(ROW_ID).reset_index())
+
+    data.to_parquet(path, index=False)
+    table.to_parquet(features_table_path(path), index=False)
+
+
+def read_columnar(path: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Read data and features table saved by save_columnar"""
+
+    data = arrow_strings(pd.read_parquet(path))
+    table = arrow_strings(pd.read_parquet(features_table_path(path)))
+    return data, table
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.code_version import code_version
+from src.feature_flow.feature_functool import AbstractFeature
+from src.feature_flow.feature_generator import FeatureGenerator
+
+PLANS_DIR = PROJECT_DIR / ".cache" / "feature_plans"
+
+# plan compilation code: config parsing, units regexes and features
+PLAN_MODULES = (
+    "config.measures_config.config_parser",
+    "src.functool.measures_functool",
+    "src.feature_flow.feature_functool",
+    "src.feature_flow.complex_features",
+    "src.feature_flow.feature_generator",
+)
+
+
+def config_hash(config: dict) -> str:
+    content = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def save_plan(plan: dict, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # write through temp file, so parallel runs never read half-written plan
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(plan, file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def read_plan(path: str | Path) -> dict:
+    with open(path, "rb") as file:
+        plan = json.loads(file.read())
+    return plan
+
+
+class FeaturePlanCache(object):
+    """
+    On-disk cache of compiled features plans.
+    Plan is keyed by measures config content hash, plan version and
+    version of compilation code, so any config or code change produces new plan.
+
+    - plans_dir - directory for compiled plans
+    """
+
+    def __init__(
+        self,
+        plans_dir: str | Path = PLANS_DIR,
+        generator: FeatureGenerator = None,
+    ) -> None:
+        self.plans_dir = Path(plans_dir)
+        self.generator = generator if generator is not None else FeatureGenerator()
+
+    def plan_path(self, config: dict) -> Path:
+        version = self.generator.PLAN_VERSION
+        code = code_version(*PLAN_MODULES)
+        return self.plans_dir / f"{config_hash(config)}.v{version}.{code}.json"
+
+    def _read_cached(self, path: Path) -> dict | None:
+        if not path.exists():
+            return None
+
+        try:
+            plan = read_plan(path)
+        except (OSError, ValueError):
+            return None
+
+        if plan.get("version") != self.generator.PLAN_VERSION:
+            return None
+        return plan
+
+    def get_plan(self, config: dict) -> dict:
+        path = self.plan_path(config)
+
+        plan = self._read_cached(path)
+        if plan is None:
+            plan = self.generator.compile(config)
+            save_plan(plan, path)
+
+        return plan
+
+    def generate(self, config: dict) -> list[AbstractFeature]:
+        return self.generator.load(self.get_plan(config))
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.feature_flow.feature_functool import FeatureUnit
+from src.functool.regex_literals import ahocorasick, extract_literals
+
+
+class UnitsPrefilter(object):
+    """
+    Literal prefilter for units regexes.
+
+    Literals are extracted from unit symbol alternation and searched
+    with one Aho-Corasick automaton over each string (or with plain substring
+    search, if pyahocorasick isn't installed). The unit regex should be run
+    only on strings, where one of its literals occurs.
+    Units without symbol or without required literals are never filtered.
+
+    - units - list of FeatureUnit (position in list is unit id)
+    """
+
+    def __init__(self, units: list[FeatureUnit]) -> None:
+        self.units = units
+        self.literals = [extract_literals(unit.symbol) for unit in units]
+        self.unfiltered = [i for i, lits in enumerate(self.literals) if not lits]
+
+        self._literal_units = self._map_literals()
+        self._automaton = self._make_automaton()
+
+        self.checked = 0
+        self.skipped = 0
+
+    def _map_literals(self) -> dict[str, tuple[int]]:
+        literal_units: dict[str, list[int]] = {}
+        for unit_id, literals in enumerate(self.literals):
+            for literal in literals:
+                literal_units.setdefault(literal, []).append(unit_id)
+        return {literal: tuple(ids) for literal, ids in literal_units.items()}
+
+    def _make_automaton(self):
+        if ahocorasick is None or not self._literal_units:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for literal, units_ids in self._literal_units.items():
+            automaton.add_word(literal, units_ids)
+        automaton.make_automaton()
+        return automaton
+
+    def _scan(self, text: str) -> set[int]:
+        text = text.casefold()
+        found = set()
+
+        if self._automaton is not None:
+            for _, units_ids in self._automaton.iter(text):
+                found.update(units_ids)
+        else:
+            for literal, units_ids in self._literal_units.items():
+                if literal in text:
+                    found.update(units_ids)
+
+        return found
+
+    def candidates(self, texts: list[str]) -> list[list[int]]:
+        """Return indexes of texts to process for every unit"""
+
+        candidates = [[] for _ in self.units]
+        for index, text in enumerate(texts):
+            for unit_id in self._scan(str(text)):
+                candidates[unit_id].append(index)
+
+        every = list(range(len(texts)))
+        for unit_id in self.unfiltered:
+            candidates[unit_id] = every
+
+        self.checked += len(self.units) * len(texts)
+        self.skipped += sum(len(texts) - len(indexes) for indexes in candidates)
+        return candidates
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.checked if self.checked else 0.0
@@ -1,25 +1,38 @@
 import sys
 import json
 import warnings
+import time
 import multiprocessing
 import regex as re
+import numpy as np
 import pandas as pd
 
 from abc import ABC, abstractmethod
 from typing import Union, Set, Callable
 from pathlib import Path
-from tqdm import tqdm
-from functools import partial
-
-tqdm.pandas()
+from functools import partial, lru_cache
 
 SRC_DIR = Path(__file__).parent.parent
 PROJ_DIR = SRC_DIR.parent
 
-sys.path.append(str(PROJ_DIR))
+if str(PROJ_DIR) not in sys.path:
+    sys.path.append(str(PROJ_DIR))
 
 from src.notation import FEATURES
 from src.feature_flow.feature_generator import FeatureGenerator
+from src.feature_flow.feature_prefilter import UnitsPrefilter
+from src.regx.validation_engine import PatternStats, PATTERN_TIMEOUT
+from src.feature_flow.feature_output import (
+    CLIENT_SIDE,
+    SOURCE_SIDE,
+    FeatureOutputMode,
+    features_table,
+)
+from src.feature_flow.feature_cache import (
+    FeatureCache,
+    features_hash,
+    normalize_name,
+)
 from src.feature_flow.feature_functool import (
     AbstractFeature,
     FeatureUnit,
@@ -44,21 +57,33 @@ class AbstractFeatureFlow(ABC):
         pass
 
 
-def findall_func(cell: str, unit: FeatureUnit) -> list[str]:
-    output = re.findall(unit.regex, str(cell), re.IGNORECASE)
-    return output
+@lru_cache(maxsize=None)
+def compile_unit(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compiled unit regex (once per process)"""
+
+    return re.compile(pattern, flags)
 
 
-def preproccess_func(
-    values: list[str],
-    feature: AbstractFeature,
+def findall_func(
+    cell: str,
     unit: FeatureUnit,
-) -> list[AbstractFeature]:
-    return [feature(value, unit) for value in values]
+    timeout: float = None,
+) -> list[str] | None:
+    """Return unit values of cell (None, if search is timed out)"""
+
+    try:
+        rx = compile_unit(unit.regex, re.IGNORECASE)
+        output = rx.findall(str(cell), timeout=timeout)
+    except TimeoutError:
+        return None
+    return output
 
 
-def del_pattern_func(cell: str, unit: FeatureUnit) -> str:
-    return re.sub(unit.regex, "  ", cell)
+def del_pattern_func(cell: str, unit: FeatureUnit, timeout: float = None) -> str:
+    try:
+        return compile_unit(unit.regex).sub("  ", cell, timeout=timeout)
+    except TimeoutError:
+        return cell
 
 
 class FeatureFlow(AbstractFeatureFlow):
@@ -70,6 +95,10 @@ class FeatureFlow(AbstractFeatureFlow):
         skip_intermediate_validated: bool = True,
         status_callback: Callable = None,
         progress_callback: Callable = None,
+        feature_cache: FeatureCache = None,
+        use_prefilter: bool = True,
+        output_mode: FeatureOutputMode = FeatureOutputMode.OBJECTS,
+        pattern_timeout: float = PATTERN_TIMEOUT,
     ) -> None:
         self.CLIENT_NAME = client_column
         self.SOURCE_NAME = source_column
@@ -77,31 +106,38 @@ class FeatureFlow(AbstractFeatureFlow):
         self.skip_intermediate_validated = skip_intermediate_validated
         self.features = FeatureList(features_list)
 
+        self.feature_cache = (
+            feature_cache if feature_cache is not None else FeatureCache()
+        )
+        self.features_hash = features_hash(self.features.feature_list)
+
+        self.units = [
+            unit for feature in self.features.feature_list for unit in feature.units
+        ]
+        self.prefilter = UnitsPrefilter(self.units) if use_prefilter else None
+
+        self.output_mode = FeatureOutputMode.checkout(output_mode)
+        self.features_table: pd.DataFrame = None
+
+        # units regexes time stats, timed out units are quarantined
+        self.pattern_timeout = pattern_timeout
+        self.pattern_stats = PatternStats()
+
         self.status_callback = status_callback
         self.progress_callback = progress_callback
 
+        # names, which values of quarantined units are unknown
+        self.incomplete: set[str] = set()
+
         self._process_pool = None
         self._stopped = False
 
     def _data_preprocess(self, data: pd.DataFrame) -> pd.DataFrame:
         data[FEATURES.VALIDATED] = 1
 
-        data.loc[:, FEATURES.CLIENT] = [[] for _ in range(len(data))]
-        data.loc[:, FEATURES.SOURCE] = [[] for _ in range(len(data))]
-
-        data.loc[:, FEATURES.CLIENT_NAME] = "  " + data[self.CLIENT_NAME] + "   "
-        data.loc[:, FEATURES.SOURCE_NAME] = "  " + data[self.SOURCE_NAME] + "   "
-
-        return data
-
-    def _data_clean(self, data: pd.DataFrame) -> pd.DataFrame:
-        data = data.drop(
-            [
-                FEATURES.CLIENT_NAME,
-                FEATURES.SOURCE_NAME,
-            ],
-            axis=1,
-        )
+        if self.output_mode == FeatureOutputMode.OBJECTS:
+            data.loc[:, FEATURES.CLIENT] = [[] for _ in range(len(data))]
+            data.loc[:, FEATURES.SOURCE] = [[] for _ in range(len(data))]
 
         return data
 
@@ -110,7 +146,7 @@ class FeatureFlow(AbstractFeatureFlow):
         data: list[str],
         unit: FeatureUnit,
     ) -> list[list[str]]:
-        func = partial(findall_func, unit=unit)
+        func = partial(findall_func, unit=unit, timeout=self.pattern_timeout)
 
         if self._process_pool != None:
             features = self._process_pool.map(func, data)
@@ -119,28 +155,12 @@ class FeatureFlow(AbstractFeatureFlow):
 
         return features
 
-    def _feature_preprocess(
-        self,
-        data: list[list[str]],
-        feature: AbstractFeature,
-        unit: FeatureUnit,
-    ) -> list[AbstractFeature]:
-        func = partial(preproccess_func, feature=feature, unit=unit)
-        features = list(map(lambda x: func(x), data))
-
-        # if self._process_pool:
-        #     features = self._process_pool.map(func, data)
-        # else:
-        #     features = list(map(lambda x: func(x), data))
-
-        return features
-
     def _del_unit(
         self,
         data: list[str],
         unit: FeatureUnit,
     ) -> pd.Series:
-        func = partial(del_pattern_func, unit=unit)
+        func = partial(del_pattern_func, unit=unit, timeout=self.pattern_timeout)
 
         if self._process_pool:
             data = self._process_pool.map(func, data)
@@ -151,45 +171,44 @@ class FeatureFlow(AbstractFeatureFlow):
 
     def _determine_based_intersection(
         self,
-        cif: set,
-        sif: set,
+        ccount: np.ndarray,
+        scount: np.ndarray,
         val_mode: FeatureValidationMode,
-    ) -> int:
+    ) -> np.ndarray:
         if val_mode is FeatureValidationMode.MODEST:
-            based = min(len(cif), len(sif))
+            based = np.minimum(ccount, scount)
         elif val_mode is FeatureValidationMode.CLIENT:
-            based = len(cif)
+            based = ccount
         elif val_mode is FeatureValidationMode.SOURCE:
-            based = len(sif)
+            based = scount
         else:  # val_mode is FeatureValidationMode.STRICT
-            based = max(len(cif), len(sif))
+            based = np.maximum(ccount, scount)
         return based
 
-    def _intermediate_validation_func(
+    def _encode_features(
         self,
-        row: list[Union[int, set]],
-    ) -> list[int]:
-        desicion = row[0]
-        if desicion == 1:
-            cif = row[1]
-            sif = row[2]
-
-            not_found_status = NotFoundStatus(
-                cif,
-                sif,
-                self.__not_found_mode,
-                self.__feature_name,
-            )
-
-            if not_found_status:
-                desicion = not_found_status.desicion
-                return desicion
-
-            based = self._determine_based_intersection(cif, sif, self.__val_mode)
-            intersect = cif.intersection(sif)
-            desicion = desicion if len(intersect) == based else 0
-
-        return desicion
+        massive: list[list[AbstractFeature]],
+        ids: dict[AbstractFeature, int],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Encode features lists as flat arrays of unique (row, feature id) pairs.
+        Equal features (by standard value) share the same id.
+        """
+
+        rows = []
+        values = []
+        encoded = {}
+        for row, features in enumerate(massive):
+            # rows with the same name share the same list object
+            key = id(features)
+            if key not in encoded:
+                encoded[key] = sorted({ids.setdefault(f, len(ids)) for f in features})
+
+            features_ids = encoded[key]
+            rows.extend([row] * len(features_ids))
+            values.extend(features_ids)
+
+        return np.array(rows, dtype=np.int64), np.array(values, dtype=np.int64)
 
     def _intermediate_validation(
         self,
@@ -198,18 +217,43 @@ class FeatureFlow(AbstractFeatureFlow):
         cif_massive: list[list[AbstractFeature]],
         sif_massive: list[list[AbstractFeature]],
     ) -> pd.DataFrame:
-        cif_massive = map(set, cif_massive)
-        sif_massive = map(set, sif_massive)
+        total = len(data)
 
-        intermediate = data[FEATURES.VALIDATED].to_list()
-        massive = zip(intermediate, cif_massive, sif_massive)
+        ids = {}
+        crows, cids = self._encode_features(cif_massive, ids)
+        srows, sids = self._encode_features(sif_massive, ids)
 
-        self.__feature_name = feature.NAME
-        self.__val_mode = feature.VALIDATION_MODE
-        self.__not_found_mode = feature.NOT_FOUND_MODE
+        ccount = np.bincount(crows, minlength=total)
+        scount = np.bincount(srows, minlength=total)
 
-        decisions = list(map(self._intermediate_validation_func, tqdm(massive)))
-        data[FEATURES.VALIDATED] = decisions
+        width = max(len(ids), 1)
+        intersect_rows = np.intersect1d(
+            crows * width + cids,
+            srows * width + sids,
+            assume_unique=True,
+        )
+        intersect = np.bincount(intersect_rows // width, minlength=total)
+
+        based = self._determine_based_intersection(
+            ccount,
+            scount,
+            feature.VALIDATION_MODE,
+        )
+
+        both_not_found = (ccount == 0) & (scount == 0)
+        one_not_found = (ccount == 0) | (scount == 0)
+        decisions = np.where(
+            both_not_found,
+            1,
+            np.where(
+                one_not_found,
+                NotFoundStatus.one_not_found_desicion(feature.NOT_FOUND_MODE),
+                (intersect == based).astype(int),
+            ),
+        )
+
+        intermediate = data[FEATURES.VALIDATED].to_numpy()
+        data[FEATURES.VALIDATED] = np.where(intermediate == 1, decisions, intermediate)
 
         return data
 
@@ -232,12 +276,29 @@ class FeatureFlow(AbstractFeatureFlow):
         if self.status_callback is not None:
             self.status_callback(message)
 
-    def _extract(self, data: pd.DataFrame) -> pd.DataFrame:
-        client = data[FEATURES.CLIENT_NAME].to_list()  # data client
-        source = data[FEATURES.SOURCE_NAME].to_list()  # data source
+    def _prefilter_candidates(self, working: list[str]) -> list[list[int]]:
+        """Return indexes of strings to process for every unit"""
 
-        cfeatures = [[] for _ in range(len(data))]  # client features
-        sfeatures = [[] for _ in range(len(data))]  # source features
+        if self.prefilter is not None:
+            return self.prefilter.candidates(working)
+
+        every = list(range(len(working)))
+        return [every for _ in self.units]
+
+    def _extract_names(self, names: list[str]) -> dict[str, dict]:
+        """
+        Extract features from unique names.
+        Return records {name: {feature name: [[unit index, value], ...]}}
+        Names, which search is timed out, and candidates of quarantined units
+        are added to incomplete (values of other names are kept).
+        """
+
+        records = {name: {} for name in names}
+        working = ["  " + name + "   " for name in names]
+
+        self.call_status("Ищу обозначения величин")
+        candidates = self._prefilter_candidates(working)
+        units_ids = {id(unit): unit_id for unit_id, unit in enumerate(self.units)}
 
         count = 0
         total = len(self.features)
@@ -250,32 +311,138 @@ class FeatureFlow(AbstractFeatureFlow):
             feature: AbstractFeature
             self.call_status(f"Извлекаю {feature.NAME}")
 
-            CI = [[] for _ in range(len(data))]
-            SI = [[] for _ in range(len(data))]
+            extracted = [[] for _ in range(len(names))]
+            for unit_index, unit in enumerate(feature.units):
+                indexes = candidates[units_ids[id(unit)]]
+                if unit.regex in self.pattern_stats.quarantined:
+                    self.incomplete.update(names[index] for index in indexes)
+                    continue
+
+                selected = [working[index] for index in indexes]
+
+                start = time.perf_counter()
+                values = list(self._feature_search(selected, unit))
+                cleaned = self._del_unit(selected, unit)
+                seconds = time.perf_counter() - start
+
+                timed_out = [
+                    index
+                    for index, unit_values in zip(indexes, values)
+                    if unit_values is None
+                ]
+                self.pattern_stats.add(
+                    unit.regex, seconds, len(selected), bool(timed_out)
+                )
+                if timed_out:
+                    self.incomplete.update(names[index] for index in timed_out)
+                    self.call_status(
+                        f"Регулярное выражение отключено: {unit.regex}, "
+                        f"строк без значений: {len(timed_out)}"
+                    )
+
+                for index, unit_values, row in zip(indexes, values, cleaned):
+                    if unit_values is not None:
+                        extracted[index] += [[unit_index, v] for v in unit_values]
+                        working[index] = row
+
+            for name, name_values in zip(names, extracted):
+                records[name][feature.NAME] = name_values
+
+            count += 1
+            self.call_progress(count, total)
+
+        return records
 
-            for unit in feature.units:
-                cif = self._feature_search(client, unit)
-                sif = self._feature_search(source, unit)
+    def _get_records(self, keys: list[str]) -> dict[str, dict]:
+        unique = list(dict.fromkeys(keys))
+        records = self.feature_cache.get_many(self.features_hash, unique)
 
-                cif = self._feature_preprocess(cif, feature, unit)
-                sif = self._feature_preprocess(sif, feature, unit)
+        missed = [key for key in unique if key not in records]
+        if missed:
+            extracted = self._extract_names(missed)
+            complete = {  # records of incomplete names are partial
+                name: record
+                for name, record in extracted.items()
+                if name not in self.incomplete
+            }
+            self.feature_cache.set_many(self.features_hash, complete)
+            records.update(extracted)
 
-                client = self._del_unit(client, unit)
-                source = self._del_unit(source, unit)
+        return records
 
-                CI = self._add_intermediate(CI, cif)
-                SI = self._add_intermediate(SI, sif)
+    def _create_features(
+        self,
+        keys: list[str],
+        records: dict[str, dict],
+        feature: AbstractFeature,
+    ) -> list[list[AbstractFeature]]:
+        units = feature.units
+        created: dict[str, list[AbstractFeature]] = {}
+
+        features = []
+        for key in keys:
+            # rows with the same name share the same features objects
+            if key not in created:
+                created[key] = [
+                    feature(value, units[unit_index])
+                    for unit_index, value in records[key][feature.NAME]
+                ]
+            features.append(created[key])
 
-            cfeatures = self._add_intermediate(cfeatures, CI)
-            sfeatures = self._add_intermediate(sfeatures, SI)
+        return features
+
+    def _extract(self, data: pd.DataFrame) -> pd.DataFrame:
+        client = list(map(normalize_name, data[self.CLIENT_NAME].to_list()))
+        source = list(map(normalize_name, data[self.SOURCE_NAME].to_list()))
+
+        records = self._get_records(client + source)
+        objects_output = self.output_mode == FeatureOutputMode.OBJECTS
+
+        cfeatures = [[] for _ in range(len(data))]  # client features
+        sfeatures = [[] for _ in range(len(data))]  # source features
+
+        count = 0
+        total = len(self.features)
+
+        self.call_status("Сравниваю признаки")
+        self.call_progress(count, total)
+        for feature in self.features:
+            if self._stopped:
+                raise FeatureFlowGracefullExit
+
+            feature: AbstractFeature
+
+            CI = self._create_features(client, records, feature)
+            SI = self._create_features(source, records, feature)
+
+            if objects_output:
+                cfeatures = self._add_intermediate(cfeatures, CI)
+                sfeatures = self._add_intermediate(sfeatures, SI)
 
             data = self._intermediate_validation(data, feature, CI, SI)
 
             count += 1
             self.call_progress(count, total)
 
-        data[FEATURES.CLIENT] = cfeatures
-        data[FEATURES.SOURCE] = sfeatures
+        if objects_output:
+            data[FEATURES.CLIENT] = cfeatures
+            data[FEATURES.SOURCE] = sfeatures
+        else:
+            self.call_status("Собираю таблицу признаков")
+            self.features_table = features_table(
+                data.index.to_list(),
+                {CLIENT_SIDE: client, SOURCE_SIDE: source},
+                records,
+                self.features.feature_list,
+            )
+
+        if self.incomplete:
+            incomplete = [
+                client_name in self.incomplete or source_name in self.incomplete
+                for client_name, source_name in zip(client, source)
+            ]
+            data[FEATURES.INCOMPLETE] = np.array(incomplete, dtype=np.int64)
+            self.call_status(f"Строк с неполными признаками: {sum(incomplete)}")
 
         self.call_status("Закончил валидацию по величинам")
         return data
@@ -296,9 +463,6 @@ class FeatureFlow(AbstractFeatureFlow):
         self.call_status("Начинаю валидацию по величинам")
         data = self._extract(data)
 
-        self.call_status("Начинаю чистку данных")
-        data = self._data_clean(data)
-
         return data
 
 
@@ -1,4 +1,154 @@
 import pandas as pd
+from typing import Iterator
+
+
+class CrossIndex(object):
+    """
+    Deletion-neighbourhood index of rows token sets.
+
+    Rows are grouped by their full token set and every group is indexed
+    by each "set minus one token" signature. Rows A and B have
+    cross-minus pair (B = A + token), if signature of B equals the set of A,
+    and cross-intersect pair (A = C + a, B = C + b), if they share
+    signature C. So all pairs are found exactly without comparing
+    every row with every other row.
+
+    - tokens - token sets of rows (position in list is row position)
+    """
+
+    def __init__(self, tokens: list[set[str]]) -> None:
+        self.groups: dict[frozenset, list[int]] = {}
+        for position, row_tokens in enumerate(tokens):
+            self.groups.setdefault(frozenset(row_tokens), []).append(position)
+
+        self._index_deletions()
+
+    @classmethod
+    def from_groups(cls, groups: dict[frozenset, list[int]]) -> "CrossIndex":
+        """Create index of rows, which are already grouped by token sets"""
+
+        cross_index = cls([])
+        cross_index.groups = groups
+        cross_index._index_deletions()
+        return cross_index
+
+    def _index_deletions(self) -> None:
+        self.deletions: dict[frozenset, list[tuple[frozenset, str]]] = {}
+        for key in self.groups:
+            for token in key:
+                self.deletions.setdefault(key - {token}, []).append((key, token))
+
+        self.signatures = list(self.deletions)
+
+    def _signature_work(self, signature: frozenset) -> int:
+        rows = sum(len(self.groups[key]) for key, _ in self.deletions[signature])
+        current = len(self.groups.get(signature, []))
+        return rows * (rows + current) + 1
+
+    def partitions(self, count: int) -> list[list[frozenset]]:
+        """Split signatures into (at most) count parts of similar work"""
+
+        works = [self._signature_work(signature) for signature in self.signatures]
+        target = sum(works) / max(count, 1)
+
+        partitions = []
+        partition, work = [], 0
+        for signature, signature_work in zip(self.signatures, works):
+            partition.append(signature)
+            work += signature_work
+            if work >= target:
+                partitions.append(partition)
+                partition, work = [], 0
+
+        if partition:
+            partitions.append(partition)
+        return partitions
+
+    def subindex(self, signatures: list[frozenset]) -> "CrossIndex":
+        """Return index with given signatures only (rows positions are kept)"""
+
+        subindex = CrossIndex([])
+        for signature in signatures:
+            entries = self.deletions[signature]
+            subindex.deletions[signature] = entries
+
+            keys = [key for key, _ in entries]
+            if signature in self.groups:
+                keys.append(signature)
+            for key in keys:
+                subindex.groups[key] = self.groups[key]
+
+        subindex.signatures = list(signatures)
+        return subindex
+
+    def cross_positions(self) -> set[int]:
+        """Return positions of rows, which have any cross pair"""
+
+        keys = set()
+        for signature, entries in self.deletions.items():
+            if signature in self.groups:
+                keys.add(signature)
+                keys.update(key for key, _ in entries)
+            elif len(entries) > 1:
+                keys.update(key for key, _ in entries)
+
+        return {position for key in keys for position in self.groups[key]}
+
+    def cross_minus_pairs(
+        self,
+        signatures: list[frozenset] = None,
+    ) -> Iterator[tuple[list[int], list[int], str]]:
+        """Yield (current rows, other rows, token): other set = current set + token"""
+
+        signatures = self.signatures if signatures is None else signatures
+        for signature in signatures:
+            current = self.groups.get(signature)
+            if current is None:
+                continue
+
+            for key, token in self.deletions[signature]:
+                yield current, self.groups[key], token
+
+    def cross_intersect_entries(
+        self,
+        signatures: list[frozenset] = None,
+    ) -> Iterator[list[tuple[list[int], str]]]:
+        """
+        Yield [(rows, token), ...] of signatures with two or more groups.
+        Every two entries of the list are cross-intersect pair.
+        """
+
+        signatures = self.signatures if signatures is None else signatures
+        for signature in signatures:
+            entries = self.deletions[signature]
+            if len(entries) > 1:
+                yield [(self.groups[key], token) for key, token in entries]
+
+    def cross_intersect_pairs(
+        self,
+        signatures: list[frozenset] = None,
+    ) -> Iterator[tuple[list[int], list[int], str, str]]:
+        """
+        Yield (current rows, other rows, current token, other token):
+        current set = signature + current token,
+        other set = signature + other token
+        """
+
+        signatures = self.signatures if signatures is None else signatures
+        for signature in signatures:
+            entries = self.deletions[signature]
+            if len(entries) < 2:
+                continue
+
+            for current_key, current_token in entries:
+                for other_key, other_token in entries:
+                    if current_key is not other_key:
+                        yield (
+                            self.groups[current_key],
+                            self.groups[other_key],
+                            current_token,
+                            other_token,
+                        )
 
 
 class BasicCrosser(object):
@@ -9,10 +9,12 @@ from typing import Callable
 from decimal import Decimal
 from abc import abstractmethod
 from typing import Tuple, List
+from collections import OrderedDict
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.notation import SEMANTIC
 from config.measures_config.config_parser import (
@@ -24,14 +26,104 @@ from config.measures_config.config_parser import (
 )
 
 EXCLUDE_RX_NAME_PREFIX = "Исключ. "
+MATCH_PLAN_NAME_PREFIX = "План "
 EXCLUDE_RX_PATTER = r"(?!.*("
 EXCLUDE_RX_PATTER_CARET = r"^(?!.*("
 
+REGEX_CACHE_SIZE = 100_000
+
 
 class MeasuresGracefullExit(Exception):
     pass
 
 
+class RegexCache(object):
+    """
+    LRU cache of synthesized regexes with hit statistics
+
+    - maxsize - max count of cached regexes
+    """
+
+    def __init__(self, maxsize: int = REGEX_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._regexes: OrderedDict[tuple, str] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> str | None:
+        regex = self._regexes.get(key)
+        if regex is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._regexes.move_to_end(key)
+        return regex
+
+    def set(self, key: tuple, regex: str) -> None:
+        self._regexes[key] = regex
+        if len(self._regexes) > self.maxsize:
+            self._regexes.popitem(last=False)
+
+    def clear(self) -> None:
+        self._regexes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._regexes)
+
+    def __repr__(self) -> str:
+        return f"RegexCache(size={len(self)}, hits={self.hits}, misses={self.misses})"
+
+
+# shared by all extractors, so repeated values are synthesized once
+NUMERIC_REGEX_CACHE = RegexCache()
+
+
+def plan_literal(value: str) -> str | None:
+    """Longest digits part of numeric value, it is contained in every match"""
+
+    if not value:
+        return None
+    return max(value.split("."), key=len)
+
+
+def make_match_plan(required: list[list[list[str]]], exclusions: list[str]) -> dict:
+    """
+    Structured match plan of string, the same as its lookahead regex:
+    - required - sets of alternatives [measure, unit, value],
+    one alternative of every set should be found
+    - exclusions - regexes, which shouldn't be found
+    - literals - digits of every required set alternatives
+    (None, if some alternative hasn't digits), one of them should be in string
+    """
+
+    literals = []
+    for alternatives in required:
+        set_literals = [plan_literal(value) for _, _, value in alternatives]
+        literals.append(None if None in set_literals else sorted(set(set_literals)))
+
+    return {"required": required, "exclusions": exclusions, "literals": literals}
+
+
+def dump_match_plan(plan: dict) -> str:
+    return json.dumps(plan, ensure_ascii=False)
+
+
+def concat_match_plans(plans: list[dict]) -> dict:
+    concatenated = {"required": [], "exclusions": [], "literals": []}
+    for plan in plans:
+        for key in concatenated:
+            concatenated[key].extend(plan[key])
+    return concatenated
+
+
 class SearchMode(object):
     """Measure Search Mode
     Using for determing position of search value (\d+)
@@ -251,8 +343,18 @@ class StringUnit(Unit):
 
         return list(regex_values)
 
+    def plan(
+        self,
+        extracted_values: list[list[str]],
+    ) -> list[list[list[list[str]]]]:
+        """Return required sets of every string: [[[unit name, value], ...], ...]"""
+
+        return [[[[self.name, ""]]] if values else [] for values in extracted_values]
+
 
 class NumericUnit(Unit):
+    regex_cache = NUMERIC_REGEX_CACHE
+
     def _default_search(self) -> str:
         return r"\d*[.,]?\d+"
 
@@ -276,43 +378,74 @@ class NumericUnit(Unit):
                     num = re.sub(r"[.]", r"[.,]", num)
         return num
 
-    def _to_regex(self, numeric_values: list[str]) -> list[str]:
-        regexes = []
-        units: list[AbstractUnit] = self.allocated_units
+    def add_relative(self, units: list[AbstractUnit]) -> None:
+        super().add_relative(units)
+        self._regex_signature = None
+
+    def _signature(self) -> tuple:
+        """Signature of allocated units, which affect value regex"""
+
+        signature = getattr(self, "_regex_signature", None)
+        if signature is None:
+            signature = tuple(
+                (
+                    unit.name,
+                    unit.prefix,
+                    unit.symbol,
+                    unit.postfix,
+                    str(unit.relative_weight),
+                    unit.search_mode,
+                )
+                for unit in self.allocated_units
+            )
+            self._regex_signature = (str(self.relative_weight), signature)
+        return self._regex_signature
+
+    def _value_regex(self, numeric_value: Decimal) -> str:
+        rx_parts = []
+        for unit in self.allocated_units:
+            unit: AbstractUnit
+            num: Decimal = numeric_value * (self.relative_weight / unit.relative_weight)
+            num = self._prepare_num(num)
+
+            if unit.search_mode == SearchMode.BEHIND:
+                rx_part = (
+                    unit.prefix
+                    + num
+                    + r"\s*"
+                    + r"(?:"
+                    + unit.symbol
+                    + r")"
+                    + unit.postfix
+                )
 
-        for numeric_value in numeric_values:
-            rx_parts = []
-            for unit in units:
-                num: Decimal = numeric_value * (
-                    self.relative_weight / unit.relative_weight
+            else:
+                rx_part = (
+                    unit.prefix
+                    + r"(?:"
+                    + unit.symbol
+                    + ")"
+                    + r"\s*"
+                    + num
+                    + unit.postfix
                 )
-                num = self._prepare_num(num)
-
-                if unit.search_mode == SearchMode.BEHIND:
-                    rx_part = (
-                        unit.prefix
-                        + num
-                        + r"\s*"
-                        + r"(?:"
-                        + unit.symbol
-                        + r")"
-                        + unit.postfix
-                    )
 
-                else:
-                    rx_part = (
-                        unit.prefix
-                        + r"(?:"
-                        + unit.symbol
-                        + ")"
-                        + r"\s*"
-                        + num
-                        + unit.postfix
-                    )
+            rx_parts.append(rx_part)
+
+        return "|".join(rx_parts)
+
+    def _to_regex(self, numeric_values: list[str]) -> list[str]:
+        regexes = []
+        signature = self._signature()
 
-                rx_parts.append(rx_part)
+        for numeric_value in numeric_values:
+            key = (self.name, signature, numeric_value)
+            regex = self.regex_cache.get(key)
+            if regex is None:
+                regex = self._value_regex(numeric_value)
+                self.regex_cache.set(key, regex)
 
-            regexes.append("|".join(rx_parts))
+            regexes.append(regex)
 
         return regexes
 
@@ -332,6 +465,142 @@ class NumericUnit(Unit):
 
         return list(regex_values)
 
+    def _plan_alternatives(self, numeric_value: Decimal) -> list[list[str]]:
+        alternatives = []
+        for unit in self.allocated_units:
+            num = numeric_value * (self.relative_weight / unit.relative_weight)
+            num = str(self._prepare_num(num)).replace("[.,]", ".")
+            alternatives.append([unit.name, num])
+        return alternatives
+
+    def plan(
+        self,
+        extracted_values: list[list[str]],
+    ) -> list[list[list[list[str]]]]:
+        """
+        Return required sets of every string (one set per value, as in transform):
+        [[[unit name, number], ...], ...], number has "." as decimal separator
+        """
+
+        return [
+            [
+                self._plan_alternatives(numeric_value)
+                for numeric_value in self._extract_numeric_values(values)
+            ]
+            for values in extracted_values
+        ]
+
+
+class MeasureScanner(object):
+    """
+    One scan of string for all measure units.
+
+    Pattern is gate alternation of units regexes (it finds positions, where
+    any unit matches) followed by optional capturing lookahead of every unit,
+    so each match records all units matches, which start at its position.
+    Matches of adjacent units overlap by separators, so they are taken from
+    the lookaheads: non-overlapping leftmost matches of every unit are
+    the same, as unit own findall returns.
+    Units with backreferences or named groups (their groups numbers
+    can't be shifted) are searched by every unit own findall.
+
+    - units - measure units
+    """
+
+    BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+    def __init__(self, units: list[Unit]) -> None:
+        self.units = units
+        self._lookahead_groups: list[int] = []  # group of every unit match
+        self._value_groups: list[int | tuple] = []  # groups of findall value
+        self._pattern = self._compile(units)
+
+    def _compile(self, units: list[Unit]) -> re.Pattern | None:
+        regexes = [unit.get_search_regex() for unit in units]
+        if not regexes:
+            return None
+
+        counts = []
+        for rx in regexes:
+            if self.BACKREFERENCE.search(rx):
+                return None
+            compiled = re.compile(rx, re.IGNORECASE)
+            if compiled.groupindex:
+                return None
+            counts.append(compiled.groups)
+
+        # gate groups go first, then lookahead group and groups of every unit
+        group = sum(counts) + 1
+        for count in counts:
+            self._lookahead_groups.append(group)
+            if count == 0:
+                self._value_groups.append(group)  # findall returns whole match
+            elif count == 1:
+                self._value_groups.append(group + 1)
+            else:
+                self._value_groups.append(tuple(range(group + 1, group + count + 1)))
+            group += count + 1
+
+        gate = "|".join(f"(?:{rx})" for rx in regexes)
+        lookaheads = "".join(f"(?:(?=({rx})))?" for rx in regexes)
+        return re.compile(f"(?={gate}){lookaheads}", re.IGNORECASE)
+
+    def _scan_by_units(self, extract_from: list[str]) -> list[list[list[str]]]:
+        return [unit.filter_count(unit.extract(extract_from)) for unit in self.units]
+
+    def _scan_matches(self, string: str, matches: list[re.Match]) -> list[list]:
+        """Return values of every unit from matches of string"""
+
+        values = [[] for _ in self.units]
+        ends = [0] * len(self.units)
+        fallback = set()
+
+        groups = self._lookahead_groups
+        for match in matches:
+            spans = match.span(*groups) if len(groups) > 1 else [match.span(*groups)]
+            for index, (start, end) in enumerate(spans):
+                if start < ends[index]:  # not matched here (-1) or overlapped
+                    continue
+
+                if end == start:
+                    fallback.add(index)  # empty matches are stepped by findall
+                ends[index] = end
+
+                value_groups = self._value_groups[index]
+                if isinstance(value_groups, int):
+                    value = match.group(value_groups)
+                    values[index].append("" if value is None else value)
+                else:
+                    value = match.group(*value_groups)
+                    values[index].append(tuple("" if v is None else v for v in value))
+
+        for index in fallback:
+            values[index] = self.units[index]._extract_values(string)
+        return values
+
+    def scan(self, extract_from: list[str]) -> list[list[list[str]]]:
+        """Return values of every unit for every string: [unit][string] -> values"""
+
+        if self._pattern is None:
+            return self._scan_by_units(extract_from)
+
+        extracted = [[] for _ in self.units]
+        finditer = self._pattern.finditer
+        for string in extract_from:
+            matches = list(finditer(string))
+            if matches:
+                values = self._scan_matches(string, matches)
+                for unit_values, string_values in zip(extracted, values):
+                    unit_values.append(string_values)
+            else:
+                for unit_values in extracted:
+                    unit_values.append([])
+
+        return [
+            unit.filter_count(unit_values)
+            for unit, unit_values in zip(self.units, extracted)
+        ]
+
 
 class UnitType(object):
     NUMERIC = "numeric_unit"
@@ -372,6 +641,8 @@ class Measure(object):
         self._sort_units()
         self._allocate_relative_units()
 
+        self.scanner = MeasureScanner(self.units)
+
     def __iter__(self):
         self.__i = 0
         return self
@@ -449,7 +720,9 @@ class Measure(object):
 
                 unit.add_relative(other_units)
 
-    def _make_exclude_rx(self) -> pd.DataFrame:
+    def _exclude_search_rx(self) -> str:
+        """Regex of values, which shouldn't be found in string"""
+
         behind = ""
         front = ""
 
@@ -460,7 +733,7 @@ class Measure(object):
             else:
                 front += unit.symbol
 
-        rx = EXCLUDE_RX_PATTER_CARET
+        rx = ""
         if behind:
             rx += r"(?:[0-9][0-9]\d*|[2-9]\d*?)\s*" + "(?:" + behind + ")"
 
@@ -469,9 +742,11 @@ class Measure(object):
                 rx += "|"
             rx += r"(?:" + front + ")" + r"\s*(?:[0-9][0-9]\d*|[2-9]\d*)"
 
-        rx += r"))"
         return rx
 
+    def _make_exclude_rx(self) -> str:
+        return EXCLUDE_RX_PATTER_CARET + self._exclude_search_rx() + r"))"
+
     def _add_exclude_rx(
         self,
         data: pd.DataFrame,
@@ -488,17 +763,91 @@ class Measure(object):
 
         return data
 
+    @property
+    def plan_name(self) -> str:
+        return MATCH_PLAN_NAME_PREFIX + self.name
+
+    def _match_plans(
+        self,
+        units_values: list[list[list[str]]],
+        count: int,
+    ) -> list[dict]:
+        required = [[] for _ in range(count)]
+        for unit, extracted_values in zip(self.units, units_values):
+            for row_required, unit_required in zip(
+                required, unit.plan(extracted_values)
+            ):
+                for alternatives in unit_required:
+                    row_required.append(
+                        [[self.name, name, value] for name, value in alternatives]
+                    )
+
+        exclusions = []
+        if self.exclude_rx:
+            exclusions = [self._exclude_search_rx()]
+
+        return [
+            make_match_plan(row_required, [] if row_required else exclusions)
+            for row_required in required
+        ]
+
+    def _add_match_plan(
+        self,
+        data: pd.DataFrame,
+        units_values: list[list[list[str]]],
+    ) -> pd.DataFrame:
+        data[self.plan_name] = self._match_plans(units_values, len(data))
+        return data
+
+    def extract_rows(
+        self,
+        extract_from: list[str],
+        match_plan: bool = False,
+    ) -> Tuple[List[str], List[str], List[dict] | None]:
+        """
+        Extract regexes without units columns.
+        Return units regex of every string (units regexes are joined),
+        exclude rx of every string (without caret, "" if it isn't needed)
+        and match plan of every string (None, if match_plan isn't set).
+        """
+
+        units_values = self.scanner.scan(extract_from)
+        units_regexes = [
+            unit.transform(extracted_values)
+            for unit, extracted_values in zip(self.units, units_values)
+        ]
+        rows = list(zip(*units_regexes)) or [()] * len(extract_from)
+
+        regexes = ["".join(row) for row in rows]
+
+        exclusions = [""] * len(extract_from)
+        if self.exclude_rx:
+            exclude_rx = EXCLUDE_RX_PATTER + self._exclude_search_rx() + r"))"
+            exclusions = [
+                "" if any(rx.strip() for rx in row) else exclude_rx for row in rows
+            ]
+
+        plans = None
+        if match_plan:
+            plans = self._match_plans(units_values, len(extract_from))
+        return regexes, exclusions, plans
+
     def extract(
         self,
         data: pd.DataFrame,
         column: str,
+        match_plan: bool = False,
     ) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Write units regexes columns (and match plan column, if match_plan is set).
+        Return data and names of regexes columns.
+        """
+
         units_names = []
         extract_from = data[column].to_list()
 
-        for unit in self.units:
-            extracted_values = unit.extract(extract_from)
-            extracted_values = unit.filter_count(extracted_values)
+        units_values = self.scanner.scan(extract_from)
+        for unit, extracted_values in zip(self.units, units_values):
             rx_patterns = unit.transform(extracted_values)
 
             data.loc[:, unit.name] = rx_patterns
@@ -509,6 +858,9 @@ class Measure(object):
             data = self._add_exclude_rx(data, units_names, new_unit_name)
             units_names.append(new_unit_name)
 
+        if match_plan:
+            data = self._add_match_plan(data, units_values)
+
         return data, units_names
 
 
@@ -521,6 +873,10 @@ class Measures(object):
     config : dict
         Parsed config file for usage
 
+    Regexes are extracted to units columns (units_columns mode)
+    or to per-row buffers, which are concatenated to SEMANTIC.REGEX
+    without creating units columns (lean mode)
+
     """
 
     def __init__(
@@ -536,6 +892,12 @@ class Measures(object):
         self.progress_callback = progress_callback
 
         self.used_units_names = []
+        self.used_plans_names = []
+
+        # lean mode buffers
+        self._regex_buffer: list[str] = None
+        self._exclude_buffer: list[str] = None
+        self._plan_buffer: list[dict] = None
 
         self._stopped = False
 
@@ -617,29 +979,48 @@ class Measures(object):
         data: pd.DataFrame,
         column: str,
         measure_name: str,
-    ) -> pd.Series:
-        """Extract regex by measure name"""
+        match_plan: bool = False,
+    ) -> pd.Series | Tuple[pd.Series, pd.Series]:
+        """
+        Extract regex by measure name.
+        Return regex and json match plan series, if match_plan is set.
+        """
 
         measure = self.measures[measure_name]
-        data, units_names = measure.extract(data, column)
+        data, units_names = measure.extract(data, column, match_plan)
 
         extracted = data[units_names[0]]
         if len(units_names) >= 2:
             for unit_name in units_names[1:]:
                 extracted += data[unit_name]
 
+        if match_plan:
+            plans = data.pop(measure.plan_name)
+            return extracted, plans.apply(dump_match_plan)
         return extracted
 
     def extract_all(
         self,
         data: pd.DataFrame,
         column: str,
+        match_plan: bool = False,
+        units_columns: bool = True,
     ) -> pd.DataFrame:
-        """Extract regex for all measures"""
+        """
+        Extract regex (and match plan, if match_plan is set) for all measures.
+        If units_columns isn't set, regexes are collected to buffers
+        (lean mode) and are written to data by concat_regex only.
+        """
 
         count = 0
         total = len(self.measures_names)
 
+        if not units_columns:
+            extract_from = data[column].to_list()
+            self._regex_buffer = [""] * len(extract_from)
+            self._exclude_buffer = [""] * len(extract_from)
+            self._plan_buffer = [[] for _ in extract_from] if match_plan else None
+
         self.call_status("Начинаю извлечение величин")
         self.call_progress(count, total)
         for measure_name in self.measures_names:
@@ -649,9 +1030,15 @@ class Measures(object):
             self.call_status(self._status(measure_name))
 
             measure = self.measures[measure_name]
-            data, units_names = measure.extract(data, column)
+            if units_columns:
+                data, units_names = measure.extract(data, column, match_plan)
 
-            self.used_units_names.extend(units_names)
+                self.used_units_names.extend(units_names)
+                if match_plan:
+                    self.used_plans_names.append(measure.plan_name)
+
+            else:
+                self._buffer_measure(measure, extract_from, match_plan)
 
             count += 1
             self.call_progress(count, total)
@@ -659,6 +1046,45 @@ class Measures(object):
         self.call_status("Закончил извлечение")
         return data
 
+    def _buffer_measure(
+        self,
+        measure: Measure,
+        extract_from: list[str],
+        match_plan: bool,
+    ) -> None:
+        regexes, exclusions, plans = measure.extract_rows(extract_from, match_plan)
+
+        regex_buffer = self._regex_buffer
+        for row, regex in enumerate(regexes):
+            if regex:
+                regex_buffer[row] += regex
+
+        exclude_buffer = self._exclude_buffer
+        for row, exclusion in enumerate(exclusions):
+            if exclusion:
+                exclude_buffer[row] += exclusion
+
+        if plans is not None:
+            for row_plans, plan in zip(self._plan_buffer, plans):
+                row_plans.append(plan)
+
+    def _concat_buffers(self, data: pd.DataFrame) -> pd.DataFrame:
+        data[SEMANTIC.REGEX] = [
+            "^" + exclusion + regex if exclusion else regex
+            for regex, exclusion in zip(self._regex_buffer, self._exclude_buffer)
+        ]
+
+        if self._plan_buffer is not None:
+            data[SEMANTIC.PLAN] = [
+                dump_match_plan(concat_match_plans(row_plans))
+                for row_plans in self._plan_buffer
+            ]
+
+        self._regex_buffer = None
+        self._exclude_buffer = None
+        self._plan_buffer = None
+        return data
+
     def _concat_exlcude_rx(
         self,
         data: pd.DataFrame,
@@ -699,6 +1125,9 @@ class Measures(object):
         data: pd.DataFrame,
         delete_units_columns: bool = False,
     ) -> pd.DataFrame:
+        if self._regex_buffer is not None:
+            return self._concat_buffers(data)
+
         data[SEMANTIC.REGEX] = ""
         used_units_names = self.used_units_names
 
@@ -710,6 +1139,21 @@ class Measures(object):
         if delete_units_columns:
             data = data.drop(self.used_units_names, axis=1)
 
+        if self.used_plans_names:
+            data = self.concat_plans(data)
+
+        return data
+
+    def concat_plans(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Write json match plan of all measures to SEMANTIC.PLAN column"""
+
+        plans = zip(*[data[plan_name] for plan_name in self.used_plans_names])
+        data[SEMANTIC.PLAN] = [
+            dump_match_plan(concat_match_plans(row_plans)) for row_plans in plans
+        ]
+
+        data = data.drop(self.used_plans_names, axis=1)
+        self.used_plans_names = []
         return data
 
 
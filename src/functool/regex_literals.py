@@ -0,0 +1,183 @@
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional, substring search is used instead
+    ahocorasick = None
+
+QUANTIFIERS = "?*{"
+METACHARS = ".^$"
+ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+
+def skip_escape(symbol: str, index: int) -> int:
+    """Return index right after escape (with its argument), which starts at index"""
+
+    escaped = symbol[index + 1 : index + 2]
+    index += 2
+
+    if escaped in ESCAPE_DIGITS:
+        return index + ESCAPE_DIGITS[escaped]
+    if escaped in ("N", "p", "P") and symbol[index : index + 1] == "{":
+        closing = symbol.find("}", index)
+        return closing + 1 if closing != -1 else len(symbol)
+    if escaped in ("p", "P"):
+        return index + 1
+    if escaped.isdigit():
+        # octal escape or backreference, both take up to 3 digits
+        end = index
+        while end < len(symbol) and end < index + 2 and symbol[end].isdigit():
+            end += 1
+        return end
+    return index
+
+
+def split_alternation(symbol: str) -> list[str]:
+    """Split regex by top-level '|' (groups and char classes are respected)"""
+
+    branches = []
+    current = ""
+    depth = 0
+    in_class = False
+
+    index = 0
+    while index < len(symbol):
+        char = symbol[index]
+
+        if char == "\\":
+            end = skip_escape(symbol, index)
+            current += symbol[index:end]
+            index = end
+            continue
+
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            branches.append(current)
+            current = ""
+            index += 1
+            continue
+
+        current += char
+        index += 1
+
+    branches.append(current)
+    return branches
+
+
+def skip_group(branch: str, index: int) -> int:
+    """Return index right after group, which starts at index"""
+
+    depth = 0
+    in_class = False
+    while index < len(branch):
+        char = branch[index]
+        if char == "\\":
+            index = skip_escape(branch, index)
+            continue
+
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+
+    return index
+
+
+def skip_class(branch: str, index: int) -> int:
+    """Return index right after char class, which starts at index"""
+
+    index += 1
+    while index < len(branch):
+        if branch[index] == "\\":
+            index = skip_escape(branch, index)
+            continue
+        if branch[index] == "]":
+            return index + 1
+        index += 1
+    return index
+
+
+def _branch_literal(branch: str) -> str:
+    """
+    Return the longest literal which is required by regex branch.
+    Empty string means that branch doesn't require any literal.
+    """
+
+    runs = []
+    run = ""
+
+    index = 0
+    while index < len(branch):
+        char = branch[index]
+
+        if char == "\\":
+            # escapes with letters or digits (\\s, \\x41, \\N{...}, \\1) aren't literals
+            escaped = branch[index + 1 : index + 2]
+            atom = escaped if escaped and not escaped.isalnum() else None
+            index = skip_escape(branch, index)
+        elif char == "[":
+            atom = None
+            index = skip_class(branch, index)
+        elif char == "(":
+            atom = None
+            index = skip_group(branch, index)
+        elif char in METACHARS or char.isspace():
+            atom = None
+            index += 1
+        else:
+            atom = char
+            index += 1
+
+        quantifier = branch[index : index + 1]
+        if atom is None:
+            runs.append(run)
+            run = ""
+        elif quantifier and quantifier in QUANTIFIERS:
+            # optional char breaks the literal
+            runs.append(run)
+            run = ""
+        elif quantifier == "+":
+            runs.append(run + atom)
+            run = ""
+        else:
+            run += atom
+
+        # quantifier of any atom is consumed with it
+        if quantifier and quantifier in QUANTIFIERS + "+":
+            if quantifier == "{":
+                closing = branch.find("}", index)
+                index = closing + 1 if closing != -1 else index + 1
+            else:
+                index += 1
+            if branch[index : index + 1] in ("?", "+"):  # lazy or possessive
+                index += 1
+
+    runs.append(run)
+    return max(runs, key=len).casefold()
+
+
+def extract_literals(symbol: str) -> list[str]:
+    """
+    Return literals, one of which is required by each match of unit symbol.
+    Empty list means that symbol can't be prefiltered by literals.
+    """
+
+    if not symbol:
+        return []
+
+    literals = [_branch_literal(branch) for branch in split_alternation(symbol)]
+    if not all(literals):
+        return []
+    return sorted(set(literals))
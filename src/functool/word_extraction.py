@@ -1,4 +1,3 @@
-import nltk
 import sys
 import pandas as pd
 
@@ -6,7 +5,8 @@ from pathlib import Path
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 
 from src.functool.words_functool import LanguageRules, WordsFuncTool
@@ -20,7 +20,9 @@ def words_join(words: pd.Series, joiner="|") -> pd.Series:
 
 
 def words_stemming(words: pd.Series, language="english") -> pd.Series:
-    stemmer = nltk.stem.SnowballStemmer(language)
+    from nltk.stem import SnowballStemmer
+
+    stemmer = SnowballStemmer(language)
     words = words.apply(lambda _words: [stemmer.stem(word) for word in _words])
     return words
 
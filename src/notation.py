@@ -36,6 +36,7 @@ class SEMANTIC(NOTATION):
     PLUS = "Плюс-слова"
     MINUS = "Минус-слова"
     REGEX = "Regex"
+    PLAN = "Regex plan"
     NOTE = "Note"
     BARCODE = "Штрихкод"
     BRAND = "Brand"
@@ -151,6 +152,7 @@ class FEATURES(NOTATION):
     STATUS = "Валидация по текстовым признакам"
     VALIDATED = "features validation"
     NOT_FOUND = "TF not found"
+    INCOMPLETE = "features incomplete"
 
     @classmethod
     @property
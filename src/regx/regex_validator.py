@@ -3,10 +3,23 @@ import re
 import numpy as np
 import sys
 import os
-from fuzzywuzzy import fuzz
+import multiprocessing
+from pathlib import Path
 
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
-from modes import *
+from src.regx.modes import *
+from src.regx.validation_engine import (
+    PatternGroupsValidator,
+    PatternStats,
+    check_group,
+    SEARCH,
+    MATCH,
+    PATTERN_TIMEOUT,
+)
 
 
 def upload_data(
@@ -36,7 +49,14 @@ class RegexValidator(object):
         validate_by: str = "Строка валидации",
         semantic_merge_by: str = "Название",
         validation_merge_by: str = "Наименование",
+        process_pool: multiprocessing.Pool = None,
+        pattern_timeout: float = PATTERN_TIMEOUT,
     ) -> None:
+        """
+        - pattern_timeout - seconds of one regex check (None - without timeout),
+        timed out patterns are quarantined (see pattern_stats)
+        """
+
         self._semantic = semantic
         self._validation = validation
         self._plus_column = plus_column
@@ -46,6 +66,20 @@ class RegexValidator(object):
         self._semantic_merge_by = semantic_merge_by
         self._validation_merge_by = validation_merge_by
 
+        self.pattern_stats = PatternStats()
+        self._searcher = PatternGroupsValidator(
+            SEARCH,
+            process_pool=process_pool,
+            timeout=pattern_timeout,
+            stats=self.pattern_stats,
+        )
+        self._matcher = PatternGroupsValidator(
+            MATCH,
+            process_pool=process_pool,
+            timeout=pattern_timeout,
+            stats=self.pattern_stats,
+        )
+
     def _prepare_minus(self, data: pd.DataFrame) -> pd.DataFrame:
         data["minus_rx"] = np.where(
             data[self._minus_column].isna(),
@@ -54,25 +88,21 @@ class RegexValidator(object):
         )
         return data
 
-    def _validate_by_minus(self, row: pd.Series) -> bool:
-        if re.search(row["minus_rx"], row[self._validate_by], flags=re.IGNORECASE):
-            return 0
-        else:
-            return 1
-
     def validateByMinus(self, data: pd.DataFrame) -> pd.DataFrame:
-        data["_minus_valid"] = 1
+        valid = np.ones(len(data))
         data[self._minus_column] = data[self._minus_column].replace("", np.nan)
-        not_na = list(data[data[self._minus_column].notna()].index)
-        if len(not_na) > 0:
-            to_valid = data.iloc[not_na][[self._validate_by, self._minus_column]]
+        not_na = data[self._minus_column].notna().to_numpy()
+        if not_na.any():
+            to_valid = data.loc[not_na, [self._validate_by, self._minus_column]]
 
             to_valid = self._prepare_minus(to_valid)
-            data.loc[not_na, "_minus_valid"] = to_valid.apply(
-                self._validate_by_minus,
-                axis=1,
+            found = self._searcher.check(
+                to_valid["minus_rx"].to_list(),
+                to_valid[self._validate_by].to_list(),
             )
+            valid[not_na] = 1 - found  # unknown stays NaN
 
+        data["_minus_valid"] = valid
         return data
 
     def _prepare_plus(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -88,46 +118,36 @@ class RegexValidator(object):
         data["plus_rx"] = data["plus_rx"].replace("(?=.*())", np.nan)
         return data
 
-    def _validate_by_plus(self, row: pd.Series) -> bool:
-        if re.search(row["plus_rx"], row[self._validate_by], flags=re.IGNORECASE):
-            return 1
-        else:
-            return 0
-
     def validateByPlus(self, data: pd.DataFrame) -> pd.DataFrame:
-        data["_plus_valid"] = 1
+        valid = np.ones(len(data))
         data[self._plus_column] = data[self._plus_column].replace("", np.nan)
-        not_na = list(data[data[self._plus_column].notna()].index)
-        if len(not_na) > 0:
-            to_valid = data.iloc[not_na][[self._validate_by, self._plus_column]]
+        not_na = data[self._plus_column].notna().to_numpy()
+        if not_na.any():
+            to_valid = data.loc[not_na, [self._validate_by, self._plus_column]]
 
             to_valid = self._prepare_plus(to_valid)
-            data.loc[not_na, "_plus_valid"] = to_valid.apply(
-                self._validate_by_plus,
-                axis=1,
+            found = self._searcher.check(
+                to_valid["plus_rx"].to_list(),
+                to_valid[self._validate_by].to_list(),
             )
+            valid[not_na] = found
 
+        data["_plus_valid"] = valid
         return data
 
-    def _validate_by_regex(self, row: pd.Series) -> bool:
-        if re.match(
-            row[self._regex_column], row[self._validate_by], flags=re.IGNORECASE
-        ):
-            return 1
-        else:
-            return 0
-
     def validateByRegex(self, data: pd.DataFrame) -> pd.DataFrame:
-        data["_regex_valid"] = 1
+        valid = np.ones(len(data))
         data[self._regex_column] = data[self._regex_column].replace("", np.nan)
-        not_na = list(data[data[self._regex_column].notna()].index)
-        if len(not_na) > 0:
-            to_valid = data.iloc[not_na][[self._validate_by, self._regex_column]]
-            data.loc[not_na, "_regex_valid"] = to_valid.apply(
-                self._validate_by_regex,
-                axis=1,
+        not_na = data[self._regex_column].notna().to_numpy()
+        if not_na.any():
+            to_valid = data.loc[not_na, [self._validate_by, self._regex_column]]
+            found = self._matcher.check(
+                to_valid[self._regex_column].to_list(),
+                to_valid[self._validate_by].to_list(),
             )
+            valid[not_na] = found
 
+        data["_regex_valid"] = valid
         return data
 
     def _merge_data(self) -> pd.DataFrame:
@@ -160,19 +180,24 @@ class RegexValidator(object):
         return val_data
 
     def _make_desicion(self, val_data: pd.DataFrame) -> pd.DataFrame:
-        val_data["validation_mark"] = val_data[
-            ["_minus_valid", "_plus_valid", "_regex_valid"]
-        ].sum(axis=1)
-
-        val_data["validation_mark"] = np.where(
-            val_data["validation_mark"] == 3,
-            1,
+        """
+        Row is valid, if all checks are passed, and it is invalid, if one of them
+        is failed. Otherwise mark is NaN: check of quarantined regex is unknown
+        (it is '?' in reason).
+        """
+
+        checks = val_data[["_minus_valid", "_plus_valid", "_regex_valid"]]
+        mark = np.where(
+            (checks == 0).any(axis=1),
             0,
+            np.where(checks.isna().any(axis=1), np.nan, 1),
+        )
+        val_data["validation_mark"] = (
+            mark if np.isnan(mark).any() else mark.astype(np.int64)
         )
 
-        val_data["reason"] = val_data["_minus_valid"].astype(str)
-        val_data["reason"] += val_data["_plus_valid"].astype(str)
-        val_data["reason"] += val_data["_regex_valid"].astype(str)
+        reasons = checks.apply(lambda valid: valid.map({1: "1", 0: "0"}).fillna("?"))
+        val_data["reason"] = reasons.sum(axis=1)
         val_data.drop(
             ["_minus_valid", "_plus_valid", "_regex_valid"], axis=1, inplace=True
         )
@@ -206,10 +231,28 @@ class RegexValidatorPro(RegexValidator):
         validate_by: str = "Строка валидации",
         semantic_merge_by: str = "Название",
         validation_merge_by: str = "Название",
+        batch: bool = True,
+        fuzzy_workers: int = -1,
+        pattern_timeout: float = PATTERN_TIMEOUT,
     ) -> None:
+        """
+        - batch - score rows grouped by patterns (rapidfuzz cdist for fuzzy modes),
+        otherwise every row is scored by apply (fuzzywuzzy for fuzzy modes, as before);
+        rapidfuzz partial_ratio finds the best alignment, fuzzywuzzy one doesn't,
+        so fuzzy marks of the modes can differ
+        - fuzzy_workers - rapidfuzz cdist workers (-1 - all cores)
+        - pattern_timeout - seconds of one regex check in batch mode
+        (None - without timeout), timed out patterns are quarantined
+        """
+
         self._semantic = semantic
         self._validation = validation
 
+        self._batch = batch
+        self._fuzzy_workers = fuzzy_workers
+        self._pattern_timeout = pattern_timeout
+        self.pattern_stats = PatternStats()
+
         self._plus_weight = plus_weight
         self._minus_weight = minus_weight
         self._regex_weight = regex_weight
@@ -265,6 +308,8 @@ class RegexValidatorPro(RegexValidator):
         string: str,
         opposite: str,
     ) -> float:
+        from fuzzywuzzy import fuzz
+
         score = fuzz.partial_ratio(pattern, string) / 100
         if opposite:
             return 1 - score
@@ -287,42 +332,116 @@ class RegexValidatorPro(RegexValidator):
         score = [scorer(pattern, string, opposite) for pattern in row[pattern_column]]
         return sum(score)
 
-    def validateByMinus(self, data: pd.DataFrame) -> pd.DataFrame:
-        mode = FuzzyOn if MinusFuzzy in self._use_fuzzy else FuzzyOff
-        data["_minus_valid"] = data.apply(
+    def _group_scores(
+        self,
+        patterns: list[str],
+        strings: list[str],
+        opposite: bool,
+        mode: FuzzyMode,
+    ) -> np.ndarray:
+        """Return sum of patterns scores for every string of the group"""
+
+        if isinstance(mode(), FuzzyOn):
+            from rapidfuzz import process
+            from rapidfuzz import fuzz as rapid_fuzz
+
+            scores = process.cdist(
+                patterns,
+                strings,
+                scorer=rapid_fuzz.partial_ratio,
+                dtype=np.float64,
+                workers=self._fuzzy_workers,
+            )
+            scores /= 100
+        else:
+            scores = np.array(
+                [self._check_pattern(pattern, strings) for pattern in patterns],
+                dtype=np.float64,
+            )
+
+        if opposite:
+            scores = 1 - scores
+        return scores.sum(axis=0)
+
+    def _check_pattern(self, pattern: str, strings: list[str]) -> list[bool | None]:
+        """Return if pattern is found in strings (None - unknown, it's quarantined)"""
+
+        if pattern in self.pattern_stats.quarantined:
+            return [None] * len(strings)
+
+        found, seconds, timed_out = check_group(
+            (pattern, strings),
+            timeout=self._pattern_timeout,
+            budget=self.pattern_stats.remaining(pattern),
+        )
+        self.pattern_stats.add(pattern, seconds, len(strings), timed_out)
+        return found
+
+    def _validate_batch(
+        self,
+        data: pd.DataFrame,
+        pattern_column: str,
+        opposite: bool,
+        mode: FuzzyMode,
+    ) -> np.ndarray:
+        """
+        Score rows grouped by patterns list (rows of the same semantic row),
+        every group is scored by all (pattern, string) pairs at once
+        """
+
+        groups: dict[tuple[str], list[int]] = {}
+        for position, patterns in enumerate(data[pattern_column].to_list()):
+            groups.setdefault(tuple(patterns), []).append(position)
+
+        valid = np.zeros(len(data))  # NaN - pattern is quarantined
+
+        strings = data[self._validate_by].to_list()
+        for patterns, positions in groups.items():
+            if patterns:
+                group_strings = [strings[position] for position in positions]
+                valid[positions] = self._group_scores(
+                    list(patterns), group_strings, opposite, mode
+                )
+        return valid
+
+    def _validate_column(
+        self,
+        data: pd.DataFrame,
+        pattern_column: str,
+        opposite: bool,
+        mode: FuzzyMode,
+    ) -> np.ndarray | pd.Series:
+        if self._batch:
+            return self._validate_batch(data, pattern_column, opposite, mode)
+
+        return data.apply(
             self._validate,
             axis=1,
             args=(
-                self._minus_column,
-                True,
+                pattern_column,
+                opposite,
                 mode,
             ),
         )
+
+    def validateByMinus(self, data: pd.DataFrame) -> pd.DataFrame:
+        mode = FuzzyOn if MinusFuzzy in self._use_fuzzy else FuzzyOff
+        data["_minus_valid"] = self._validate_column(
+            data, self._minus_column, True, mode
+        )
         return data
 
     def validateByPlus(self, data: pd.DataFrame) -> pd.DataFrame:
         mode = FuzzyOn if PlusFuzzy in self._use_fuzzy else FuzzyOff
-        data["_plus_valid"] = data.apply(
-            self._validate,
-            axis=1,
-            args=(
-                self._plus_column,
-                False,
-                mode,
-            ),
+        data["_plus_valid"] = self._validate_column(
+            data, self._plus_column, False, mode
         )
         return data
 
     def validateByRegex(self, data: pd.DataFrame) -> pd.DataFrame:
         mode = FuzzyOff
-        data["_regex_valid"] = data.apply(
-            self._validate,
-            axis=1,
-            args=(
-                self._regex_column,
-                False,
-                mode,
-            ),
+        data["_regex_valid"] = self._validate_column(
+            data, self._regex_column, False, mode
         )
         return data
 
@@ -332,8 +451,9 @@ class RegexValidatorPro(RegexValidator):
         pattern_col: str,
         score_col: str,
     ) -> pd.DataFrame:
+        # unknown score (quarantined pattern) keeps unknown mark
         data["validation_mark"] = np.where(
-            data[pattern_col].str.len() != data[score_col],
+            data[score_col].notna() & (data[pattern_col].str.len() != data[score_col]),
             0,
             data["validation_mark"],
         )
@@ -349,8 +469,11 @@ class RegexValidatorPro(RegexValidator):
         val_data[self._minus_column] *= self._minus_weight
         val_data[self._regex_column] *= self._regex_weight
 
+        # score of quarantined pattern is unknown, so mark is NaN
         val_data["validation_mark"] = (
-            val_data[["_minus_valid", "_plus_valid", "_regex_valid"]].sum(axis=1)
+            val_data[["_minus_valid", "_plus_valid", "_regex_valid"]].sum(
+                axis=1, skipna=False
+            )
             / val_data["total"]
         )
 
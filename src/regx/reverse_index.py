@@ -0,0 +1,332 @@
+import sys
+import regex as re
+import numpy as np
+import pandas as pd
+import multiprocessing
+from pathlib import Path
+from typing import Iterable, Iterator
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.functool.regex_literals import (
+    QUANTIFIERS,
+    ahocorasick,
+    extract_literals,
+    split_alternation,
+    skip_escape,
+    skip_group,
+)
+from src.regx.validation_engine import (
+    MATCH,
+    PATTERN_TIMEOUT,
+    SEARCH,
+    PatternGroupsValidator,
+    PatternStats,
+)
+
+LOOKAHEAD = "(?="
+# strings of one search batch, their candidates are confirmed at once
+SEARCH_BATCH_ROWS = 10_000
+
+
+def _unwrap(rx: str) -> str:
+    """Strip leading '.*' and groups, which wrap the whole regex"""
+
+    while True:
+        for prefix in (".*?", ".*"):
+            if rx.startswith(prefix):
+                rx = rx[len(prefix) :]
+                break
+
+        if not rx.startswith("(") or skip_group(rx, 0) != len(rx):
+            return rx
+        if rx.startswith("(?:"):
+            rx = rx[3:-1]
+        elif rx.startswith("(?"):
+            return rx
+        else:
+            rx = rx[1:-1]
+
+
+def _lookaheads(rx: str) -> list[str]:
+    """Return inner regexes of top-level positive lookaheads, which are required"""
+
+    if len(split_alternation(rx)) > 1:
+        return []
+
+    lookaheads = []
+    index = 0
+    while index < len(rx):
+        if rx[index] == "\\":
+            index = skip_escape(rx, index)
+        elif rx[index] == "[":
+            index = rx.find("]", index + 2) + 1 or len(rx)
+        elif rx[index] == "(":
+            end = skip_group(rx, index)
+            quantifier = rx[end : end + 1]
+            optional = bool(quantifier) and quantifier in QUANTIFIERS
+            if rx.startswith(LOOKAHEAD, index) and not optional:
+                lookaheads.append(rx[index + len(LOOKAHEAD) : end - 1])
+            index = end
+        else:
+            index += 1
+    return lookaheads
+
+
+def regex_clauses(rx: str) -> list[list[str]]:
+    """
+    Return literals clauses of regex: one of literals of every clause
+    is required by each match of regex.
+    Clauses are extracted from every top-level lookahead group and from regex itself.
+    """
+
+    clauses = [extract_literals(_unwrap(inner)) for inner in _lookaheads(rx)]
+    clauses.append(extract_literals(rx))
+    return [clause for clause in clauses if clause]
+
+
+def _strip_words(words: str) -> str:
+    if not isinstance(words, str):
+        return ""
+    return re.sub(r"^\||\|$", "", words)
+
+
+class SemanticRow(object):
+    """
+    Checks of one semantic row, the same as RegexValidator ones:
+    Regex is matched, all Плюс-слова and no Минус-слова are searched (IGNORECASE).
+    """
+
+    def __init__(self, plus: str, minus: str, regex: str) -> None:
+        plus = _strip_words(plus)
+        self.plus_rx = "(?=.*(" + plus.replace("|", "))(?=.*(") + "))" if plus else ""
+        self.minus_rx = _strip_words(minus)
+        self.regex = regex if isinstance(regex, str) else ""
+
+        self.clauses = regex_clauses(self.regex)
+        if plus:
+            for word in plus.split("|"):
+                clause = extract_literals(word)
+                if clause:
+                    self.clauses.append(clause)
+
+
+class ReverseRegexIndex(object):
+    """
+    Reverse search index: which semantic rows accept raw string.
+
+    Literals clauses of every semantic row (from Regex lookahead groups
+    and Плюс-слова) are searched with one Aho-Corasick automaton over
+    each string (or with plain substring search, if pyahocorasick isn't installed).
+    Every row is indexed by its most selective clause, so only rows, which
+    key literal occurs in string, are shortlisted. Candidates with all clauses
+    satisfied are confirmed by full regexes. Rows without literals are always checked.
+
+    Candidates are confirmed by PatternGroupsValidator (regex module with timeout,
+    quarantine of slow patterns, process pool for big batches) by batches
+    of SEARCH_BATCH_ROWS strings, so memory is bounded by candidates of one batch.
+    Rows with unknown result (quarantined pattern) aren't accepted.
+    Literal scan of strings is serial: at 100k semantic rows and 10M strings
+    expect hours, split strings between processes for such data.
+
+    - semantic - semantic data (SemantiX output)
+    - plus_column, minus_column, regex_column - checks columns
+    - process_pool - pool for big batches of candidates
+    - pattern_timeout - seconds of one check (None - without timeout)
+    - batch_rows - strings of one search batch
+    """
+
+    def __init__(
+        self,
+        semantic: pd.DataFrame,
+        plus_column: str = "Плюс-слова",
+        minus_column: str = "Минус-слова",
+        regex_column: str = "Regex",
+        process_pool: multiprocessing.Pool = None,
+        pattern_timeout: float = PATTERN_TIMEOUT,
+        batch_rows: int = SEARCH_BATCH_ROWS,
+    ) -> None:
+        self.rows = [
+            SemanticRow(plus, minus, regex)
+            for plus, minus, regex in zip(
+                semantic[plus_column].to_list(),
+                semantic[minus_column].to_list(),
+                semantic[regex_column].to_list(),
+            )
+        ]
+
+        self._literals: dict[str, int] = {}
+        self._clauses: list[list[frozenset[int]]] = []
+        self._keys: dict[int, list[int]] = {}
+        self.unfiltered: list[int] = []
+        self._index_rows()
+
+        self._automaton = self._make_automaton()
+
+        self.batch_rows = batch_rows
+        self.pattern_stats = PatternStats()
+        match_validator, search_validator = (
+            PatternGroupsValidator(
+                method,
+                process_pool=process_pool,
+                timeout=pattern_timeout,
+                stats=self.pattern_stats,
+            )
+            for method in (MATCH, SEARCH)
+        )
+        self._checks = [
+            ("regex", match_validator, 1),
+            ("plus_rx", search_validator, 1),
+            ("minus_rx", search_validator, 0),
+        ]
+
+        self.checked = 0
+        self.confirmed = 0
+        self.unknown = 0
+
+    def _index_rows(self) -> None:
+        for row_id, row in enumerate(self.rows):
+            clauses = [
+                frozenset(
+                    self._literals.setdefault(lit, len(self._literals))
+                    for lit in clause
+                )
+                for clause in row.clauses
+            ]
+            self._clauses.append(clauses)
+
+            if not clauses:
+                self.unfiltered.append(row_id)
+                continue
+
+            key = max(row.clauses, key=lambda clause: min(map(len, clause)))
+            for literal in key:
+                self._keys.setdefault(self._literals[literal], []).append(row_id)
+
+    def _make_automaton(self):
+        if ahocorasick is None or not self._literals:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for literal, literal_id in self._literals.items():
+            automaton.add_word(literal, literal_id)
+        automaton.make_automaton()
+        return automaton
+
+    def _scan(self, text: str) -> set[int]:
+        text = text.casefold()
+        if self._automaton is not None:
+            return {literal_id for _, literal_id in self._automaton.iter(text)}
+        return {
+            literal_id
+            for literal, literal_id in self._literals.items()
+            if literal in text
+        }
+
+    def candidates(self, string: str) -> list[int]:
+        """Return rows, which literals clauses are satisfied by string"""
+
+        found = self._scan(string)
+        shortlisted = set(self.unfiltered)
+        for literal_id in found:
+            shortlisted.update(self._keys.get(literal_id, ()))
+
+        return sorted(
+            row_id
+            for row_id in shortlisted
+            if all(not clause.isdisjoint(found) for clause in self._clauses[row_id])
+        )
+
+    def _confirm(
+        self,
+        strings: list[str],
+        candidates: list[list[int]],
+    ) -> list[list[int]]:
+        """Return candidates of every string, which are accepted by full regexes"""
+
+        pairs = [
+            (position, row_id)
+            for position, rows in enumerate(candidates)
+            for row_id in rows
+        ]
+        accepted = np.ones(len(pairs), dtype=bool)
+        unknown = np.zeros(len(pairs), dtype=bool)
+
+        for attribute, validator, required in self._checks:
+            checked = [
+                number
+                for number, (_, row_id) in enumerate(pairs)
+                if accepted[number] and getattr(self.rows[row_id], attribute)
+            ]
+            if not checked:
+                continue
+
+            found = validator.check(
+                [getattr(self.rows[pairs[number][1]], attribute) for number in checked],
+                [strings[pairs[number][0]] for number in checked],
+            )
+            unknown[checked] |= np.isnan(found)
+            accepted[checked] &= found == required
+
+        self.checked += len(pairs)
+        self.confirmed += int(accepted.sum())
+        self.unknown += int(unknown.sum())
+
+        matched = [[] for _ in strings]
+        for (position, row_id), is_accepted in zip(pairs, accepted):
+            if is_accepted:
+                matched[position].append(row_id)
+        return matched
+
+    def match(self, string: str) -> list[int]:
+        """Return positions of semantic rows, which accept string"""
+
+        return next(self.search([string]))
+
+    def search(self, strings: Iterable[str]) -> Iterator[list[int]]:
+        """Yield positions of accepting semantic rows for every string"""
+
+        batch = []
+        for string in strings:
+            if not isinstance(string, str):
+                string = "" if pd.isna(string) else str(string)
+            batch.append(string)
+
+            if len(batch) >= self.batch_rows:
+                yield from self._confirm(batch, list(map(self.candidates, batch)))
+                batch = []
+
+        if batch:
+            yield from self._confirm(batch, list(map(self.candidates, batch)))
+
+    def merge(
+        self,
+        validation: pd.DataFrame,
+        semantic: pd.DataFrame,
+        validate_by: str = "Строка валидации",
+        semantic_name: str = "Название",
+    ) -> pd.DataFrame:
+        """
+        Return validation rows with names of every semantic row, which accepts them
+        (one output row per pair, rows without any match are dropped)
+        """
+
+        positions, names = [], []
+        semantic_names = semantic[semantic_name].to_list()
+        strings = validation[validate_by].to_list()
+        for position, matched in enumerate(self.search(strings)):
+            positions.extend([position] * len(matched))
+            names.extend(semantic_names[row_id] for row_id in matched)
+
+        output = validation.iloc[positions].reset_index(drop=True)
+        output[semantic_name] = names
+        return output
+
+    @property
+    def confirm_rate(self) -> float:
+        """Share of shortlisted candidates, which are confirmed by regexes"""
+
+        return self.confirmed / self.checked if self.checked else 0.0
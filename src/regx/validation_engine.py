@@ -0,0 +1,273 @@
+import os
+import time
+import regex as re
+import numpy as np
+import pandas as pd
+import multiprocessing
+
+from functools import partial
+
+SEARCH = "search"
+MATCH = "match"
+
+POOL_MIN_ROWS = 50_000
+POOL_TASK_ROWS = 10_000
+# tasks of one pattern, which are run at once, its budget is checked between them
+POOL_WAVE_TASKS = os.cpu_count() or 1
+
+# seconds of one pattern check, pattern is quarantined after it
+PATTERN_TIMEOUT = 1.0
+# seconds of all checks of one pattern, pattern is quarantined after them
+PATTERN_BUDGET = 60.0
+
+
+def check_group(
+    task: tuple[str, list[str]],
+    method: str = SEARCH,
+    flags: int = re.IGNORECASE,
+    timeout: float = None,
+    budget: float = None,
+) -> tuple[list[bool | None], float, bool]:
+    """
+    Return if pattern is found in every string of the group, seconds of checks
+    and if pattern is timed out (None for timed out and the rest strings,
+    they aren't checked)
+
+    - timeout - seconds of one string check
+    - budget - seconds of all checks of the group
+    """
+
+    pattern, strings = task
+    check = getattr(re.compile(pattern, flags), method)
+
+    found = []
+    start = time.perf_counter()
+    try:
+        if timeout is None and budget is None:
+            found = [check(string) is not None for string in strings]
+        else:
+            deadline = None if budget is None else start + budget
+            for string in strings:
+                limit = timeout
+                if deadline is not None:
+                    left = deadline - time.perf_counter()
+                    if left <= 0:
+                        raise TimeoutError
+                    limit = left if limit is None else min(limit, left)
+                found.append(check(string, timeout=limit) is not None)
+    except TimeoutError:
+        found += [None] * (len(strings) - len(found))
+        return found, time.perf_counter() - start, True
+
+    return found, time.perf_counter() - start, False
+
+
+def validate_group(
+    task: tuple[str, list[str]],
+    method: str = SEARCH,
+    flags: int = re.IGNORECASE,
+    timeout: float = None,
+) -> list[bool | None]:
+    """Return if pattern is found in every string of the group (None - unknown)"""
+
+    return check_group(task, method, flags, timeout)[0]
+
+
+def check_budget_group(
+    task: tuple[str, list[str], float | None],
+    method: str = SEARCH,
+    flags: int = re.IGNORECASE,
+    timeout: float = None,
+) -> tuple[list[bool | None], float, bool]:
+    """check_group of task with its budget: (pattern, strings, budget)"""
+
+    pattern, strings, budget = task
+    return check_group((pattern, strings), method, flags, timeout, budget)
+
+
+class PatternStats(object):
+    """
+    Cumulative time stats of patterns.
+    Pattern, which is timed out once or spends its time budget, is quarantined.
+
+    - budget - seconds of all checks of one pattern (None - without budget)
+    """
+
+    def __init__(self, budget: float = PATTERN_BUDGET) -> None:
+        self.budget = budget
+        self.seconds: dict[str, float] = {}
+        self.strings: dict[str, int] = {}
+        self.quarantined: set[str] = set()
+
+    def add(self, pattern: str, seconds: float, count: int, timed_out: bool) -> None:
+        self.seconds[pattern] = self.seconds.get(pattern, 0.0) + seconds
+        self.strings[pattern] = self.strings.get(pattern, 0) + count
+        if timed_out or self.remaining(pattern) == 0:
+            self.quarantined.add(pattern)
+
+    def remaining(self, pattern: str) -> float | None:
+        """Return seconds left of pattern budget (None - without budget)"""
+
+        if self.budget is None:
+            return None
+        return max(self.budget - self.seconds.get(pattern, 0.0), 0.0)
+
+    def report(self, top: int = None) -> pd.DataFrame:
+        """Return patterns stats sorted by cumulative time"""
+
+        report = pd.DataFrame(
+            {
+                "pattern": list(self.seconds),
+                "seconds": list(self.seconds.values()),
+                "strings": [self.strings[pattern] for pattern in self.seconds],
+                "quarantined": [
+                    pattern in self.quarantined for pattern in self.seconds
+                ],
+            }
+        )
+        report = report.sort_values("seconds", ascending=False, ignore_index=True)
+        return report if top is None else report.head(top)
+
+
+class PatternGroupsValidator(object):
+    """
+    Validation of strings by rows patterns.
+    Rows are grouped by pattern, so every distinct pattern is compiled once
+    and its strings are checked in a tight loop (or by process pool).
+
+    - method - 'search' or 'match' (re functions)
+    - flags - re flags
+    - process_pool - pool for big data (POOL_MIN_ROWS rows and more)
+    - timeout - seconds of one check (None - without timeout),
+    timed out pattern is quarantined: its rows aren't checked now and later,
+    result of them is unknown
+    - stats - patterns stats (it can be shared by validators), pattern, which
+    spends stats budget, is quarantined as well (pool tasks of one pattern
+    are run by waves of POOL_WAVE_TASKS, budget is shared by tasks of wave)
+    """
+
+    def __init__(
+        self,
+        method: str = SEARCH,
+        flags: int = re.IGNORECASE,
+        process_pool: multiprocessing.Pool = None,
+        timeout: float = PATTERN_TIMEOUT,
+        stats: PatternStats = None,
+    ) -> None:
+        if method not in {SEARCH, MATCH}:
+            raise ValueError(f"Method should be '{SEARCH}' or '{MATCH}'")
+
+        self.method = method
+        self.flags = flags
+        self.process_pool = process_pool
+        self.timeout = timeout
+        self.stats = stats if stats is not None else PatternStats()
+
+    def _groups(self, patterns: list[str]) -> dict[str, list[int]]:
+        """Group positions by pattern, quarantined patterns are skipped"""
+
+        groups: dict[str, list[int]] = {}
+        for position, pattern in enumerate(patterns):
+            groups.setdefault(pattern, []).append(position)
+
+        for pattern in self.stats.quarantined.intersection(groups):
+            del groups[pattern]
+        return groups
+
+    def _tasks(
+        self,
+        groups: dict[str, list[int]],
+    ) -> dict[str, list[list[int]]]:
+        """Split positions of every pattern into tasks of at most POOL_TASK_ROWS"""
+
+        return {
+            pattern: [
+                positions[start : start + POOL_TASK_ROWS]
+                for start in range(0, len(positions), POOL_TASK_ROWS)
+            ]
+            for pattern, positions in groups.items()
+        }
+
+    def _check_pool(
+        self,
+        groups: dict[str, list[int]],
+        strings: list[str],
+        result: np.ndarray,
+    ) -> None:
+        """
+        Check tasks by waves: every wave has at most POOL_WAVE_TASKS tasks of each
+        pattern, which share its budget. Quarantine is checked between waves.
+        """
+
+        pending = self._tasks(groups)
+        while pending:
+            tasks, tasks_positions = [], []
+            for pattern, pattern_tasks in pending.items():
+                wave = pattern_tasks[:POOL_WAVE_TASKS]
+                del pattern_tasks[:POOL_WAVE_TASKS]
+
+                remaining = self.stats.remaining(pattern)
+                budget = None if remaining is None else remaining / len(wave)
+                for positions in wave:
+                    task_strings = [strings[position] for position in positions]
+                    tasks.append((pattern, task_strings, budget))
+                    tasks_positions.append(positions)
+
+            results = self.process_pool.imap(self._check_func(), tasks)
+            for task, positions, checked in zip(tasks, tasks_positions, results):
+                self._add_result(task[0], positions, checked, result)
+
+            pending = {
+                pattern: pattern_tasks
+                for pattern, pattern_tasks in pending.items()
+                if pattern_tasks and pattern not in self.stats.quarantined
+            }
+
+    def _add_result(
+        self,
+        pattern: str,
+        positions: list[int],
+        checked: tuple[list[bool | None], float, bool],
+        result: np.ndarray,
+    ) -> None:
+        found, seconds, timed_out = checked
+        result[positions] = np.array(found, dtype=np.float64)  # None is NaN
+        self.stats.add(pattern, seconds, len(positions), timed_out)
+
+    def check(self, patterns: list[str], strings: list[str]) -> np.ndarray:
+        """
+        Return float array: 1 - pattern of row is found in string of row,
+        0 - it isn't found, NaN - unknown (pattern is timed out or quarantined)
+        """
+
+        result = np.full(len(strings), np.nan)
+        groups = self._groups(patterns)
+
+        if self.process_pool is not None and len(strings) >= POOL_MIN_ROWS:
+            self._check_pool(groups, strings, result)
+            return result
+
+        check = self._check_func()
+        for pattern, positions in groups.items():
+            task_strings = [strings[position] for position in positions]
+            task = (pattern, task_strings, self.stats.remaining(pattern))
+            self._add_result(pattern, positions, check(task), result)
+
+        return result
+
+    def validate(self, patterns: list[str], strings: list[str]) -> np.ndarray:
+        """Return bool array: pattern of row is found in string of row (not unknown)"""
+
+        return self.check(patterns, strings) == 1
+
+    def _check_func(self) -> partial:
+        return partial(
+            check_budget_group,
+            method=self.method,
+            flags=self.flags,
+            timeout=self.timeout,
+        )
+
+    @property
+    def quarantined(self) -> set[str]:
+        return self.stats.quarantined
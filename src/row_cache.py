@@ -0,0 +1,313 @@
+import json
+import time
+import hashlib
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from typing import Callable
+
+from src.code_version import code_version
+
+MAX_BYTES = 1 << 30  # records size of cache file
+
+
+def _normalize(value) -> str:
+    """
+    Cache key of cell: empty values are '', others are strings
+    (they aren't stripped: regexes can depend on padding)
+    """
+
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+def run_hash(config: dict = None, modules: tuple[str] = (), **params) -> str:
+    """
+    Hash of everything that affects results of pipeline run:
+    config content, run parameters (thresholds, columns, etc.)
+    and version of pipeline code
+
+    - modules - names of modules, which results depend on
+    """
+
+    signature = json.dumps(
+        [config, params, code_version(*modules)],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+
+def row_hashes(data: pd.DataFrame, columns: list[str]) -> list[str]:
+    """Hashes of normalized input rows (only columns, which results depend on)"""
+
+    hashes = []
+    for row in zip(*(data[column].to_list() for column in columns)):
+        key = "\x1f".join(map(_normalize, row))
+        hashes.append(hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest())
+    return hashes
+
+
+class RowCache(object):
+    """
+    Persistent cache of per-row pipeline results.
+
+    Key is (pipeline, namespace, row hash): namespace is run_hash of config
+    and parameters, row hash is hash of normalized input row.
+    Record is dict {output column: value}, it is stored as json.
+    Records over max_bytes are pruned, least recently used first.
+
+    - path - sqlite file (memory only if not set)
+    - max_bytes - records size limit
+    """
+
+    TABLE = "rows"
+    SQL_CHUNK_SIZE = 500
+
+    def __init__(self, path: str | Path = None, max_bytes: int = MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = self._connect(path)
+
+    def _connect(self, path: str | Path) -> sqlite3.Connection:
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        connection = sqlite3.connect(str(path) if path else ":memory:")
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            "pipeline TEXT NOT NULL, "
+            "namespace TEXT NOT NULL, "
+            "row_hash TEXT NOT NULL, "
+            "record TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "used REAL NOT NULL, "
+            "PRIMARY KEY (pipeline, namespace, row_hash))"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.TABLE}_used ON {self.TABLE} (used)"
+        )
+        connection.commit()
+        return connection
+
+    def _chunks(self, values: list) -> list[list]:
+        size = self.SQL_CHUNK_SIZE
+        return [values[i : i + size] for i in range(0, len(values), size)]
+
+    def get_many(
+        self,
+        pipeline: str,
+        namespace: str,
+        hashes: list[str],
+    ) -> dict[str, dict]:
+        """Return records of cached rows (they are marked as used)"""
+
+        found = {}
+        used = time.time()
+        for chunk in self._chunks(hashes):
+            placeholders = ", ".join(["?"] * len(chunk))
+            where = (
+                "WHERE pipeline = ? AND namespace = ? "
+                f"AND row_hash IN ({placeholders})"
+            )
+            rows = self._connection.execute(
+                f"SELECT row_hash, record FROM {self.TABLE} {where}",
+                [pipeline, namespace, *chunk],
+            )
+            for row_hash, record in rows:
+                found[row_hash] = json.loads(record)
+
+            self._connection.execute(
+                f"UPDATE {self.TABLE} SET used = ? {where}",
+                [used, pipeline, namespace, *chunk],
+            )
+        self._connection.commit()
+
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def set_many(
+        self,
+        pipeline: str,
+        namespace: str,
+        records: dict[str, dict],
+    ) -> None:
+        used = time.time()
+        rows = []
+        for row_hash, record in records.items():
+            record = json.dumps(record, ensure_ascii=False)
+            rows.append((pipeline, namespace, row_hash, record, len(record), used))
+
+        self._connection.executemany(
+            f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._connection.commit()
+        self.prune()
+
+    @property
+    def size(self) -> int:
+        """Records size in bytes"""
+
+        (size,) = self._connection.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}"
+        ).fetchone()
+        return size
+
+    def prune(self, max_bytes: int = None) -> int:
+        """Delete least recently used records over max_bytes, return their count"""
+
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        excess = self.size - max_bytes
+        if excess <= 0:
+            return 0
+
+        pruned = []
+        rows = self._connection.execute(
+            f"SELECT rowid, size FROM {self.TABLE} ORDER BY used, rowid"
+        )
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            pruned.append(rowid)
+            excess -= size
+
+        for chunk in self._chunks(pruned):
+            placeholders = ", ".join(["?"] * len(chunk))
+            self._connection.execute(
+                f"DELETE FROM {self.TABLE} WHERE rowid IN ({placeholders})",
+                chunk,
+            )
+        self._connection.commit()
+        return len(pruned)
+
+    def invalidate(self, pipeline: str = None) -> int:
+        """Delete records of pipeline (all records if it isn't set), return count"""
+
+        if pipeline is None:
+            cursor = self._connection.execute(f"DELETE FROM {self.TABLE}")
+        else:
+            cursor = self._connection.execute(
+                f"DELETE FROM {self.TABLE} WHERE pipeline = ?",
+                [pipeline],
+            )
+        self._connection.commit()
+        self._connection.execute("VACUUM")
+        return cursor.rowcount
+
+    def stats(self) -> pd.DataFrame:
+        """Records count and size of every pipeline and namespace"""
+
+        stats = pd.read_sql_query(
+            "SELECT pipeline, namespace, COUNT(*) AS rows, SUM(size) AS size, "
+            f"MAX(used) AS used FROM {self.TABLE} "
+            "GROUP BY pipeline, namespace ORDER BY pipeline, used DESC",
+            self._connection,
+        )
+        stats["used"] = pd.to_datetime(stats["used"], unit="s")
+        return stats
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute(
+            f"SELECT COUNT(*) FROM {self.TABLE}"
+        ).fetchone()
+        return count
+
+    def __repr__(self) -> str:
+        return f"RowCache(path={self.path}, hits={self.hits}, misses={self.misses})"
+
+
+def run_incremental(
+    data: pd.DataFrame,
+    key_columns: list[str],
+    compute: Callable[[pd.DataFrame], pd.DataFrame],
+    cache: RowCache,
+    pipeline: str,
+    namespace: str,
+    status_callback: Callable = None,
+    cacheable: Callable[[], bool] = None,
+    cross_row: bool = False,
+) -> pd.DataFrame:
+    """
+    Run row-wise pipeline step only on rows, which aren't cached, and merge
+    their results with cached ones. Equal rows (by key columns) are computed once.
+
+    Step should be row-local: output row depends only on key columns of its row.
+    Results of cross-row steps depend on whole input, so for them set cross_row:
+    hash of all rows is added to namespace and only unchanged input is cached.
+
+    - compute - step, which returns one output row per input row (in the same order),
+    output columns are the columns, which aren't in data, and key columns,
+    which step rewrites (e.g. strips), so cached run gives the same data
+    - key_columns - input columns, which results depend on
+    - cacheable - results of compute are stored only if it returns True
+    - cross_row - output row depends on other rows of data
+    """
+
+    def call_status(message: str) -> None:
+        if status_callback is not None:
+            status_callback(message)
+
+    hashes = row_hashes(data, key_columns)
+    if cross_row:
+        namespace = run_hash(namespace=namespace, rows=hashes)
+    records = cache.get_many(pipeline, namespace, list(set(hashes)))
+
+    missed = {}
+    for position, row_hash in enumerate(hashes):
+        if row_hash not in records:
+            missed.setdefault(row_hash, position)
+    cached = sum(row_hash in records for row_hash in hashes)
+    call_status(f"Строк из кэша: {cached}, к расчету: {len(hashes) - cached}")
+
+    if missed or not len(data):
+        rows = data.iloc[list(missed.values())]
+        computed = compute(rows.copy())
+        columns = [column for column in computed.columns if column not in data]
+        columns += [
+            column
+            for column in key_columns
+            if column in computed
+            and not computed[column]
+            .reset_index(drop=True)
+            .equals(rows[column].reset_index(drop=True))
+        ]
+        computed = computed[columns].to_dict("records")
+        if len(computed) != len(missed):
+            raise ValueError("Pipeline step should return one row per input row")
+
+        computed = dict(zip(missed, computed))
+        if cacheable is None or cacheable():
+            cache.set_many(pipeline, namespace, computed)
+        records.update(computed)
+    else:
+        columns = list(records[hashes[0]])
+
+    # rewritten key columns are stored only by runs, which rewrote them
+    for row_hash in set(hashes):
+        columns += [column for column in records[row_hash] if column not in columns]
+
+    output = pd.DataFrame.from_records(
+        [records[row_hash] for row_hash in hashes],
+        columns=columns,
+        index=data.index,
+    )
+    # rows, which key isn't rewritten by step, keep input values
+    rewritten = {
+        column: output.pop(column).fillna(data[column])
+        for column in key_columns
+        if column in output
+    }
+    return pd.concat([data.assign(**rewritten), output], axis=1)
@@ -5,10 +5,12 @@ import pandas as pd
 
 from pathlib import Path
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 ### SHOUDN'T BE DELETED
 ### IMPORTS THROUGH THIS MODULE
@@ -18,6 +20,8 @@ from src.functool.measures_functool import (
     MergeMode,
     Measures,
     MeasuresGracefullExit,
+    RegexCache,
+    NUMERIC_REGEX_CACHE,
 )
 from src.functool.cross_semantic_functool import BasicCrosser
 from src.functool.words_functool import (
@@ -27,6 +31,8 @@ from src.functool.words_functool import (
     WordsFuncTool,
 )
 
+PATTERN_CACHE_SIZE = 1024
+
 
 def read_config(path: str | Path) -> dict:
     with open(path, "rb") as file:
@@ -49,15 +55,78 @@ def parse_rx(
     return data
 
 
-def del_rx(data: pd.DataFrame, col: str) -> pd.DataFrame:
-    def _del(row):
-        for rx in row["rx_to_del"]:
-            row["row"] = re.sub(rx, "", row["row"], flags=re.IGNORECASE)
-        return row
+class PatternCache(object):
+    """
+    Bounded LRU cache of compiled deletion patterns.
+    Key is tuple of regex fragments, value is tuple of compiled fragments
+    (they are applied in order: fragment can overlap text of the previous one).
+
+    - maxsize - max count of compiled patterns in cache
+    """
+
+    def __init__(self, maxsize: int = PATTERN_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._patterns: OrderedDict[tuple[str], tuple[re.Pattern]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, fragments: tuple[str]) -> tuple[re.Pattern]:
+        pattern = self._patterns.get(fragments)
+        if pattern is not None:
+            self.hits += 1
+            self._patterns.move_to_end(fragments)
+            return pattern
+
+        self.misses += 1
+        pattern = tuple(re.compile(rx, re.IGNORECASE) for rx in fragments)
+
+        self._patterns[fragments] = pattern
+        if len(self._patterns) > self.maxsize:
+            self._patterns.popitem(last=False)
+        return pattern
+
+    def clear(self) -> None:
+        self._patterns.clear()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+DEL_RX_PATTERNS = PatternCache()
+
+
+def del_rx(
+    data: pd.DataFrame,
+    col: str,
+    patterns: PatternCache = DEL_RX_PATTERNS,
+) -> pd.DataFrame:
+    """
+    Delete parsed regex fragments from data[col] into 'row' column.
+    Rows are grouped by identical fragments lists and every distinct
+    list is compiled once, fragments are deleted one by one.
+    (re.sub cached compiled fragments too, the gain is in plain loop over
+    groups of rows instead of row-wise DataFrame.apply, see bench_del_rx)
+    """
 
     data["row"] = data[col].astype(str) + " "
     data = parse_rx(data)
 
-    data = data.apply(_del, axis=1)
+    groups: dict[tuple[str], list[int]] = {}
+    for position, fragments in enumerate(data["rx_to_del"].to_list()):
+        fragments = tuple(fragments)
+        if fragments:
+            groups.setdefault(fragments, []).append(position)
+
+    rows = data["row"].to_list()
+    for fragments, positions in groups.items():
+        compiled = patterns.compile(fragments)
+        for position in positions:
+            row = rows[position]
+            for pattern in compiled:
+                row = pattern.sub("", row)
+            rows[position] = row
+
+    data["row"] = rows
     data.drop("rx_to_del", axis=1, inplace=True)
     return data
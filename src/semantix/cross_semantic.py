@@ -1,17 +1,23 @@
 import sys
 import pandas as pd
+import numpy as np
 import re
 import copy
+import multiprocessing
 
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
+from functools import partial
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
+from src.notation import SEMANTIC
 from src.semantix.common import del_rx, LanguageRules
 from src.semantix.common import BasicCrosser
+from src.functool.cross_semantic_functool import CrossIndex
 from src.functool.word_extraction import (
     words_filter,
     words_join,
@@ -19,11 +25,142 @@ from src.functool.word_extraction import (
     WordsExtractor,
 )
 
+CROSS_PARTITIONS = 64
+
 
 class CrosserGracefullExit(Exception):
     pass
 
 
+def token_checkout(row: str, rx: str, plus: bool) -> bool:
+    if plus:
+        checkout = True if re.search(list(rx)[0], row, re.IGNORECASE) else False
+    else:
+        checkout = False if re.search(list(rx)[0], row, re.IGNORECASE) else True
+    return checkout
+
+
+class TokensPresence(object):
+    """
+    Presence of tokens in rows texts, same as token_checkout with plus=True.
+    Texts are lowered once, so literal tokens (most of words) are checked
+    by substring search instead of regex search for every pair of rows.
+
+    - texts - rows texts by rows positions
+    """
+
+    def __init__(self, texts: list[str] | dict[int, str]) -> None:
+        if isinstance(texts, dict):
+            self.lowered = {position: text.lower() for position, text in texts.items()}
+        else:
+            self.lowered = [text.lower() for text in texts]
+
+        self._literals: dict[str, bool] = {}
+
+    def is_literal(self, token: str) -> bool:
+        literal = self._literals.get(token)
+        if literal is None:
+            literal = re.escape(token) == token
+            self._literals[token] = literal
+        return literal
+
+    def rows(self, positions: list[int], token: str) -> list[int]:
+        """Return positions of rows, which contain token"""
+
+        lowered = self.lowered
+        if self.is_literal(token):
+            token = token.lower()
+            return [position for position in positions if token in lowered[position]]
+
+        return [
+            position
+            for position in positions
+            if re.search(token, lowered[position], re.IGNORECASE)
+        ]
+
+    def contains_any(self, positions: list[int], token: str) -> bool:
+        lowered = self.lowered
+        if self.is_literal(token):
+            token = token.lower()
+            return any(token in lowered[position] for position in positions)
+
+        return any(
+            re.search(token, lowered[position], re.IGNORECASE) for position in positions
+        )
+
+
+def cross_partition(
+    cross_index: CrossIndex,
+    texts: list[str] | dict[int, str] | TokensPresence,
+    signatures: list[frozenset] = None,
+    make_cross_minus: bool = True,
+    make_cross_intersect: bool = True,
+) -> dict[str, tuple[np.ndarray, list[str]]]:
+    """
+    Find cross updates for index signatures (all signatures if not set).
+    Return {cross column: (rows positions, tokens)}.
+
+    - texts - rows texts by positions or their presence (it's shared by partitions)
+    """
+
+    updates = {
+        "cross_minus": ([], []),
+        "cross_plus": ([], []),
+        "cross_intersect": ([], []),
+    }
+
+    def add(column: str, positions: list[int], token: str) -> None:
+        updates[column][0].extend(positions)
+        updates[column][1].extend([token] * len(positions))
+
+    presence = texts if isinstance(texts, TokensPresence) else TokensPresence(texts)
+
+    if make_cross_minus:
+        for current, other, token in cross_index.cross_minus_pairs(signatures):
+            found = set(presence.rows(current, token))
+            add("cross_minus", [pos for pos in current if pos not in found], token)
+            add("cross_plus", presence.rows(other, token), token)
+
+    if make_cross_intersect:
+        for entries in cross_index.cross_intersect_entries(signatures):
+            granted = [False] * len(entries)
+            for current, current_token in entries:
+                add(
+                    "cross_intersect",
+                    presence.rows(current, current_token),
+                    current_token,
+                )
+
+                for other_index, (other, other_token) in enumerate(entries):
+                    if granted[other_index] or other is current:
+                        continue
+
+                    # other token is checked in current row text too
+                    if presence.contains_any(current, other_token):
+                        granted[other_index] = True
+                        add("cross_intersect", other, other_token)
+
+    return {
+        column: (np.array(positions, dtype=np.int64), tokens)
+        for column, (positions, tokens) in updates.items()
+    }
+
+
+def cross_partition_task(
+    task: tuple[CrossIndex, list[str] | dict[int, str] | TokensPresence, list],
+    make_cross_minus: bool = True,
+    make_cross_intersect: bool = True,
+) -> dict[str, tuple[np.ndarray, list[str]]]:
+    cross_index, texts, signatures = task
+    return cross_partition(
+        cross_index,
+        texts,
+        signatures,
+        make_cross_minus,
+        make_cross_intersect,
+    )
+
+
 class Crosser(BasicCrosser):
     """
     This class can perform cross-minus and
@@ -70,44 +207,76 @@ class Crosser(BasicCrosser):
         self.join_words = join_words
         self.delete_rx = delete_rx
 
-    def _checkout(self, row: str, rx: str, plus: bool) -> bool:
-        if plus:
-            checkout = True if re.search(list(rx)[0], row, re.IGNORECASE) else False
-        else:
-            checkout = False if re.search(list(rx)[0], row, re.IGNORECASE) else True
-        return checkout
+    def _cross_progress(self, count: int, total: int) -> None:
+        pass
 
-    def _call_cross_minus(
+    def cross_updates(
         self,
-        data: pd.DataFrame,
-        col: str,
-        current_set: set,
-        other_set: set,
-        index: int,
-        rest_index: int,
-    ) -> None:
-        cross_minus = self.get_cross_minus(current_set, other_set)
-        if cross_minus:
-            if self._checkout(data.at[index, col], cross_minus, plus=False):
-                data.at[index, "cross_minus"].update(cross_minus)
-            if self._checkout(data.at[rest_index, col], cross_minus, plus=True):
-                data.at[rest_index, "cross_plus"].update(cross_minus)
-
-    def _call_cross_intersect(
+        cross_index: CrossIndex,
+        texts: list[str] | dict[int, str],
+        process_pool: multiprocessing.Pool = None,
+    ) -> Iterator[dict[str, tuple[np.ndarray, list[str]]]]:
+        """
+        Yield cross updates of index partitions.
+        Partitions are processed by process pool (if it is set),
+        progress is reported per partition.
+
+        - texts - rows texts by positions, it should contain at least
+        cross_index.cross_positions() (texts of other rows are never used)
+        """
+
+        partitions = cross_index.partitions(CROSS_PARTITIONS)
+
+        func = partial(
+            cross_partition_task,
+            make_cross_minus=self.make_cross_minus,
+            make_cross_intersect=self.make_cross_intersect,
+        )
+        if process_pool is not None:
+            # workers get only rows and texts of their partition
+            tasks = []
+            for signatures in partitions:
+                subindex = cross_index.subindex(signatures)
+                subtexts = {pos: texts[pos] for pos in subindex.cross_positions()}
+                tasks.append((subindex, subtexts, None))
+            results = process_pool.imap_unordered(func, tasks)
+        else:
+            # texts are lowered once for all partitions
+            presence = TokensPresence(texts)
+            tasks = [(cross_index, presence, signatures) for signatures in partitions]
+            results = map(func, tasks)
+
+        count = 0
+        total = len(partitions)
+
+        self._cross_progress(count, total)
+        for updates in results:
+            yield updates
+
+            count += 1
+            self._cross_progress(count, total)
+
+    def _cross(
         self,
         data: pd.DataFrame,
         col: str,
-        current_set: set,
-        other_set: set,
-        index: int,
-        rest_index: int,
-    ) -> None:
-        cross_intersect = self.get_cross_intersect(current_set, other_set)
-        if cross_intersect:
-            if self._checkout(data.at[index, col], cross_intersect[0], plus=True):
-                data.at[index, "cross_intersect"].update(cross_intersect[0])
-            if self._checkout(data.at[index, col], cross_intersect[1], plus=True):
-                data.at[rest_index, "cross_intersect"].update(cross_intersect[1])
+        process_pool: multiprocessing.Pool = None,
+    ) -> pd.DataFrame:
+        """Find cross pairs of rows by tokens index and write cross columns"""
+
+        texts = data[col].to_list()
+        cross_index = CrossIndex(data["tokens"].to_list())
+
+        cross_sets = {column: [set() for _ in texts] for column in self.columns}
+        for updates in self.cross_updates(cross_index, texts, process_pool):
+            for column, (positions, tokens) in updates.items():
+                column_sets = cross_sets[column]
+                for position, token in zip(positions.tolist(), tokens):
+                    column_sets[position].add(token)
+
+        for column in self.columns:
+            data[column] = cross_sets[column]
+        return data
 
     def _setup(self, data: pd.DataFrame) -> pd.DataFrame:
         for col in self.columns:
@@ -165,23 +334,7 @@ class Crosser(BasicCrosser):
         data = self._setup(data)
         data = self._del_rx(data, col)
         data["tokens"] = self.get_tokens(data, "row", self.dop_symbols)
-
-        indexes = set(data.index)
-        for index in indexes:
-            current_set = data.at[index, "tokens"]
-            rest_indexes = indexes - set([index])  # can be profiled
-
-            for rest_index in rest_indexes:
-                other_set = data.at[rest_index, "tokens"]
-
-                if self.make_cross_minus:
-                    self._call_cross_minus(
-                        data, "row", current_set, other_set, index, rest_index
-                    )
-                if self.make_cross_intersect:
-                    self._call_cross_intersect(
-                        data, "row", current_set, other_set, index, rest_index
-                    )
+        data = self._cross(data, "row")
 
         data = self._to_list(data)
         data = self._join(data)
@@ -202,7 +355,6 @@ class CrosserPro(Crosser):
     - make_cross_intersect - run cross-intersect operation
     - delete_rx - if you want do delete elements by rx
     (in this case dataframe should contains 'regex' column)
-    - process_nearest - sort and process nearest N left and right rows
     """
 
     def __init__(
@@ -211,7 +363,6 @@ class CrosserPro(Crosser):
         make_cross_minus: bool = True,
         make_cross_intersect: bool = True,
         delete_rx: bool = True,
-        process_nearest: int = 0,
         status_callback: Callable = None,
         progress_callback: Callable = None,
     ):
@@ -221,7 +372,6 @@ class CrosserPro(Crosser):
         self.make_cross_minus = make_cross_minus
         self.make_cross_intersect = make_cross_intersect
         self.delete_rx = delete_rx
-        self.process_nearest = process_nearest
 
         self.status_callback = status_callback
         self.progress_callback = progress_callback
@@ -253,9 +403,29 @@ class CrosserPro(Crosser):
     def stop_callback(self) -> None:
         self._stopped = True
 
-    def extract(self, data: pd.DataFrame, col: str):
+    def _cross_progress(self, count: int, total: int) -> None:
+        if self._stopped:
+            raise CrosserGracefullExit
+        self.call_progress(count, total)
+
+    def tokens(self, data: pd.DataFrame, col: str) -> list[set[str]]:
+        """Return cross tokens of every row (data isn't changed)"""
+
+        if len(self.extractors) == 0:
+            return [set() for _ in range(len(data))]
+
+        rows = data[[col, SEMANTIC.REGEX]].reset_index(drop=True)
+        rows = self._del_rx(rows, col)
+        rows = self.get_tokens_pro(rows, "row", self.extractors)
+        return rows["tokens"].to_list()
+
+    def extract(
+        self,
+        data: pd.DataFrame,
+        col: str,
+        process_pool: multiprocessing.Pool = None,
+    ):
         if len(self.extractors) > 0:
-            resort_by_index = False
             # self._show_status()
 
             self.call_status("Предобработка для кросс-семантики")
@@ -263,49 +433,8 @@ class CrosserPro(Crosser):
             data = self._del_rx(data, col)
             data = self.get_tokens_pro(data, "row", self.extractors)
 
-            if self.process_nearest:
-                resort_by_index = True
-                data = data.sort_values(by=[col])
-
-            indexes = list(data.index)
-
-            count = 0
-            total = len(indexes)
-
             self.call_status("Извлекаю кросс-семантику")
-            self.call_progress(count, total)
-            for pos_index in range(len(indexes)):
-                if self._stopped:
-                    raise CrosserGracefullExit
-
-                index = indexes[pos_index]
-                current_set = data.at[index, "tokens"]
-
-                rest_indexes = indexes[:]  # or use copy.copy(indexes)
-                if self.process_nearest:
-                    rest_indexes = indexes[
-                        max(0, pos_index - self.process_nearest) : min(
-                            len(indexes), pos_index + self.process_nearest + 1
-                        )
-                    ]
-
-                if index in rest_indexes:
-                    rest_indexes.remove(index)  # can be profiled?
-
-                for rest_index in rest_indexes:
-                    other_set = data.at[rest_index, "tokens"]
-
-                    if self.make_cross_minus:
-                        self._call_cross_minus(
-                            data, col, current_set, other_set, index, rest_index
-                        )
-                    if self.make_cross_intersect:
-                        self._call_cross_intersect(
-                            data, col, current_set, other_set, index, rest_index
-                        )
-
-                count += 1
-                self.call_progress(count, total)
+            data = self._cross(data, col, process_pool)
 
             data = self._to_list(data)
             data = self._join(data)
@@ -313,7 +442,22 @@ class CrosserPro(Crosser):
             data.drop("tokens", axis=1, inplace=True)
             data.drop("row", axis=1, inplace=True)
 
-            if resort_by_index:
-                data = data.sort_index()
-
         return data
+
+
+def setup_language_rules(use_languages: list[str]) -> list[LanguageRules]:
+    """Default cross-semantic rules of languages ('ru', 'eng')"""
+
+    languages = {"ru": "russian", "eng": "english"}
+    return [
+        LanguageRules(
+            languages[language],
+            check_letters=True,
+            with_numbers=True,
+            min_lenght=3,
+            stemming=True,
+            symbols="",
+        )
+        for language in languages
+        if language in use_languages
+    ]
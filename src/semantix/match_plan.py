@@ -0,0 +1,126 @@
+import sys
+import json
+import regex as re
+
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.semantix.common import Measures, SearchMode
+from src.functool.measures_functool import NumericUnit, Unit
+
+NUMBERS_RUN = re.compile(r"[\d.,]+")
+NUMBER = re.compile(r"\d*[.,]?\d+")
+
+
+class UnitTokenizer(object):
+    """
+    Tokenizer of unit values in string.
+    Numeric unit token is every number, which can be matched by unit value regex
+    (prefix and symbol before it, symbol and postfix after it),
+    string unit token is presence of unit search regex.
+
+    - unit - measure unit
+    """
+
+    def __init__(self, unit: Unit) -> None:
+        self.numeric = isinstance(unit, NumericUnit)
+        symbol = rf"(?:{unit.symbol})"
+
+        if not self.numeric:
+            self._search = re.compile(unit.get_search_regex(), re.IGNORECASE)
+
+        elif unit.search_mode == SearchMode.BEHIND:
+            self._head = re.compile(rf"(?<={unit.prefix})", re.IGNORECASE)
+            self._tail = re.compile(rf"\s*{symbol}{unit.postfix}", re.IGNORECASE)
+
+        else:
+            self._head = re.compile(rf"(?<={unit.prefix}{symbol}\s*)", re.IGNORECASE)
+            self._tail = re.compile(unit.postfix, re.IGNORECASE)
+
+    def tokenize(self, line: str) -> set[str]:
+        if not self.numeric:
+            return {""} if self._search.search(line) else set()
+
+        head, tail = self._head.match, self._tail.match
+        tokens = set()
+        for run in NUMBERS_RUN.finditer(line):
+            start, end = run.span()
+            ends = [index for index in range(start + 1, end + 1) if tail(line, index)]
+            if not ends:
+                continue
+
+            for number_start in range(start, end):
+                if not head(line, number_start):
+                    continue
+
+                for number_end in ends:
+                    number = line[number_start:number_end]
+                    if number_end > number_start and NUMBER.fullmatch(number):
+                        tokens.add(number.replace(",", "."))
+        return tokens
+
+
+class MatchPlanMatcher(object):
+    """
+    Matcher of SemantiX match plans (SEMANTIC.PLAN column).
+    Every string line is tokenized once per used unit, then plan
+    required sets are checked by set lookups. Result is the same,
+    as re.search of plan Regex with IGNORECASE flag.
+
+    - config - measures config, which plans were extracted with
+    """
+
+    def __init__(self, config: dict) -> None:
+        self.tokenizers: dict[tuple[str, str], UnitTokenizer] = {}
+        for measure in Measures(config):
+            for unit in measure:
+                self.tokenizers[(measure.name, unit.name)] = UnitTokenizer(unit)
+
+        self._exclusions: dict[str, re.Pattern] = {}
+
+    def _exclusion(self, rx: str) -> re.Pattern:
+        pattern = self._exclusions.get(rx)
+        if pattern is None:
+            pattern = re.compile(rx, re.IGNORECASE)
+            self._exclusions[rx] = pattern
+        return pattern
+
+    def _match_line(self, required: list, literals: list, line: str) -> bool:
+        tokens: dict[tuple[str, str], set[str]] = {}
+        for alternatives, set_literals in zip(required, literals):
+            if set_literals is not None:
+                if not any(literal in line for literal in set_literals):
+                    return False
+
+            for measure_name, unit_name, value in alternatives:
+                key = (measure_name, unit_name)
+                unit_tokens = tokens.get(key)
+                if unit_tokens is None:
+                    unit_tokens = self.tokenizers[key].tokenize(line)
+                    tokens[key] = unit_tokens
+
+                if value in unit_tokens:
+                    break
+            else:
+                return False
+        return True
+
+    def match(self, plan: dict | str, string: str) -> bool:
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        lines = string.split("\n")  # lookaheads '.*' don't cross lines
+
+        exclusions = plan["exclusions"]
+        if exclusions:
+            # regex starts with '^', so only the first line is checked
+            lines = lines[:1]
+            for rx in exclusions:
+                if self._exclusion(rx).search(lines[0]):
+                    return False
+
+        return any(
+            self._match_line(plan["required"], plan["literals"], line) for line in lines
+        )
@@ -10,9 +10,27 @@ from typing import Callable
 
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
-from src.semantix.common import Extractor, Measures, read_config, MeasuresGracefullExit
+from src.semantix.common import (
+    Extractor,
+    Measures,
+    read_config,
+    MeasuresGracefullExit,
+    RegexCache,
+    NUMERIC_REGEX_CACHE,
+)
+
+# shared by all size extractors, so repeated sizes are synthesized once
+SIZE_REGEX_CACHE = RegexCache()
+
+# extraction code, cached rows results depend on it
+EXTRACTION_MODULES = (
+    "src.semantix.common",
+    "src.semantix.measures_extraction",
+    "src.functool.measures_functool",
+)
 
 
 class MeasureExtractor(Extractor):
@@ -25,6 +43,7 @@ class MeasureExtractor(Extractor):
     ) -> None:
         self._add_spaces_flag = add_spaces
         self.enginge = Measures(config, status_callback, progress_callback)
+        self.regex_cache = NUMERIC_REGEX_CACHE
 
         self.status_callback = status_callback
         self.progress_callback = progress_callback
@@ -53,22 +72,36 @@ class MeasureExtractor(Extractor):
         data: pd.DataFrame,
         column: str,
         measure_name: str,
-    ) -> pd.Series:
+        match_plan: bool = False,
+    ) -> pd.Series | tuple[pd.Series, pd.Series]:
+        """
+        Return measure regex series
+        (and json match plan series, if match_plan is set)
+        """
+
         data.loc[:, column] = data.loc[:, column].astype(str)
 
         data.loc[:, column] = self._add_spaces(data[column])
-        output = self.enginge.extract_measure(data, column, measure_name)
+        output = self.enginge.extract_measure(data, column, measure_name, match_plan)
         data.loc[:, column] = self._del_spaces(data[column])
         return output
 
 
 class MeasuresExtractor(MeasureExtractor):
+    """
+    Extractor of all measures regexes.
+
+    - units_columns - write regex column of every unit (debug output),
+    otherwise Regex is concatenated from per-row buffers
+    """
+
     def __init__(
         self,
         config: dict,
         add_spaces: bool = True,
         status_callback: Callable = None,
         progress_callback: Callable = None,
+        units_columns: bool = False,
     ) -> None:
         super().__init__(
             config,
@@ -76,6 +109,7 @@ class MeasuresExtractor(MeasureExtractor):
             status_callback,
             progress_callback,
         )
+        self.units_columns = units_columns
 
     def call_status(self, message: str) -> None:
         if self.status_callback is not None:
@@ -87,10 +121,19 @@ class MeasuresExtractor(MeasureExtractor):
         column: str,
         delete_features_columns: bool = False,
         concat_regex: bool = True,
+        match_plan: bool = False,
     ) -> pd.DataFrame:
+        """
+        Extract regexes of all measures.
+        If match_plan is set, json match plan of Regex is written
+        to SEMANTIC.PLAN column (it is written by concat_regex).
+        Units columns are written, if units_columns is set or regex isn't concatenated.
+        """
+
         data[column] = self._add_spaces(data[column])
 
-        data = self.enginge.extract_all(data, column)
+        units_columns = self.units_columns or not concat_regex
+        data = self.enginge.extract_all(data, column, match_plan, units_columns)
 
         self.call_status("Объединяю регулярные выражения")
         data = (
@@ -104,6 +147,8 @@ class MeasuresExtractor(MeasureExtractor):
 
 
 class SizeExtractor(Extractor):
+    regex_cache = SIZE_REGEX_CACHE
+
     def __init__(
         self,
         basic_sep: bool = True,
@@ -121,11 +166,17 @@ class SizeExtractor(Extractor):
         self.triple_from_double_pos = triple_from_double_pos
 
         self._name = "_extr"
+        self._scanner = self._compile_scanner()
 
     def _show_status(self):
         print("Извлекаю размеры")
 
-    def _extract_size_values(self, df: pd.DataFrame, col: str) -> pd.DataFrame:
+    def _compile_scanner(self) -> re.Pattern:
+        """
+        Scanner of the leftmost triple size or (if there isn't any triple)
+        the leftmost double size by one pattern
+        """
+
         if self.basic_sep:
             sep = r"\D+"
         else:
@@ -135,13 +186,21 @@ class SizeExtractor(Extractor):
         rx_double = rf"({_int})(?:{sep})({_int})"
         rx_triple = rf"({_int})(?:{sep})({_int})(?:{sep})({_int})"
 
-        df[self._name] = df[col].str.findall(rx_triple).str[0]
-        df[self._name] = np.where(
-            df[self._name].isna(),
-            df[col].str.findall(rx_double).str[0],
-            df[self._name],
-        )
+        return re.compile(rf"^(?:.*?{rx_triple}|.*?{rx_double})", re.DOTALL)
+
+    def _scan_size(self, string: str) -> tuple[str] | float:
+        if not isinstance(string, str):
+            return np.nan
+
+        searched = self._scanner.match(string)
+        if searched is None:
+            return np.nan
+
+        groups = searched.groups()
+        return groups[:3] if groups[0] is not None else groups[3:]
 
+    def _extract_size_values(self, df: pd.DataFrame, col: str) -> pd.DataFrame:
+        df[self._name] = [self._scan_size(string) for string in df[col].to_list()]
         return df
 
     def _triple_from_double(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -180,24 +239,6 @@ class SizeExtractor(Extractor):
             value = str(value)
         return value
 
-    def _create_rx(self, values: tuple[int]) -> str:
-        rx = ""
-        kfs = [self._kf1, 1, self._kf2]
-
-        if isinstance(values, tuple):
-            for kf_ind in range(len(kfs)):
-                _rx = r"\D"
-                kf = kfs[kf_ind]
-                for val_ind in range(len(values)):
-                    val = self._prep_value(values[val_ind], kf)
-                    val_end = r"\D+" if val_ind < len(values) - 1 else r"\D"
-                    _rx += rf"{val}{val_end}"
-
-                _sep = "|" if kf_ind < len(kfs) - 1 else ""
-                rx += _rx + _sep
-
-        return rx
-
     def _create_trip_rx(self, values: tuple[int]) -> str:
         rx = ""
         if isinstance(values, tuple):
@@ -215,9 +256,69 @@ class SizeExtractor(Extractor):
 
         return rx
 
+    def _prep_values(self, values: np.ndarray, kf: float) -> list[list[str]]:
+        """Vectorized _prep_value for matrix of values"""
+
+        values = values / kf
+        rounded = np.round(values)
+        # the same as math.isclose
+        close = np.abs(values - rounded) <= 1e-09 * np.maximum(
+            np.abs(values), np.abs(rounded)
+        )
+
+        return [
+            [
+                str(int(rounded_value)) if is_close else str(value)
+                for value, rounded_value, is_close in zip(*row)
+            ]
+            for row in zip(values.tolist(), rounded.tolist(), close.tolist())
+        ]
+
+    def _sizes_rx(self, sizes: list[tuple[str]]) -> list[str]:
+        """Vectorized _create_rx for sizes of the same length"""
+
+        values = np.array(sizes, dtype=np.float64)
+        kfs_values = [self._prep_values(values, kf) for kf in (self._kf1, 1, self._kf2)]
+
+        last = values.shape[1] - 1
+        return [
+            "|".join(
+                r"\D"
+                + "".join(
+                    value + (r"\D+" if index < last else r"\D")
+                    for index, value in enumerate(kf_values[row])
+                )
+                for kf_values in kfs_values
+            )
+            for row in range(len(sizes))
+        ]
+
+    def _create_rxs(self, sizes: list[tuple[str] | float]) -> list[str]:
+        """
+        Return rx of every size ("" if size isn't found).
+        Unique sizes, which aren't cached, are synthesized grouped by length.
+        """
+
+        rxs: dict[tuple[str], str] = {}
+        missed: dict[int, list[tuple[str]]] = {}
+        for size in sizes:
+            if isinstance(size, tuple) and size not in rxs:
+                rx = self.regex_cache.get((size, self._kf1, self._kf2))
+                if rx is None:
+                    missed.setdefault(len(size), []).append(size)
+                    rx = ""
+                rxs[size] = rx
+
+        for same_length in missed.values():
+            for size, rx in zip(same_length, self._sizes_rx(same_length)):
+                self.regex_cache.set((size, self._kf1, self._kf2), rx)
+                rxs[size] = rx
+
+        return [rxs[size] if isinstance(size, tuple) else "" for size in sizes]
+
     def _create_size_rx(self, data: pd.DataFrame) -> pd.DataFrame:
-        data[self._name] = data[self._name].apply(self._create_rx)
-        data["Sizes"] = "(?=.*(" + data[self._name] + "))"
+        rxs = self._create_rxs(data[self._name].to_list())
+        data["Sizes"] = ["(?=.*(" + rx + "))" if rx else "" for rx in rxs]
         return data
 
     def _clean_up(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -227,19 +328,6 @@ class SizeExtractor(Extractor):
             ],
             axis=1,
         )
-
-        data["Sizes"] = np.where(
-            data["Sizes"] == "(?=.*(|))",
-            "",
-            data["Sizes"],
-        )
-
-        data["Sizes"] = np.where(
-            data["Sizes"] == "(?=.*())",
-            "",
-            data["Sizes"],
-        )
-
         return data
 
     def extract(self, data: pd.DataFrame, col: str) -> pd.DataFrame:
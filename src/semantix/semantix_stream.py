@@ -0,0 +1,343 @@
+import sys
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+SRC_DIR = Path(__file__).parent.parent
+PROJECT_DIR = SRC_DIR.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.semantix.common import MeasuresGracefullExit
+from src.semantix.measures_extraction import MeasuresExtractor
+from src.semantix.cross_semantic import CrosserPro
+from src.functool.cross_semantic_functool import CrossIndex
+from src.data_io import ExcelStreamWriter, EXCEL, read_csv_chunks
+
+STREAM_CHUNK_SIZE = 100_000
+SPILL_PART_PATTERN = "part-{:05d}.parquet"
+
+
+def read_chunks(
+    path: str | Path,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read file by chunks of chunk_size rows.
+    Csv and Excel values are read as strings, parquet keeps its own types.
+    """
+
+    path = str(path)
+    if path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    elif path.endswith(".csv"):
+        yield from read_csv_chunks(path, chunk_size=chunk_size)
+
+    elif path.endswith(".xlsx"):
+        yield from _read_excel_chunks(path, chunk_size)
+
+    else:
+        raise ValueError("File should be Excel, csv or parquet")
+
+
+def _read_excel_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = [str(column) for column in next(rows, ())]
+
+        chunk = []
+        for row in rows:
+            chunk.append([None if value is None else str(value) for value in row])
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns, dtype="string")
+                chunk = []
+
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, dtype="string")
+    finally:
+        workbook.close()
+
+
+class SemantixStream(object):
+    """
+    Chunked SemantiX pipeline with bounded memory.
+
+    Measures are extracted chunk by chunk and every chunk is spilled
+    to parquet part file. Only cross tokens of rows are kept in memory
+    (interned token sets and numpy array of rows set ids), so cross-semantic
+    stage reads back texts of rows, which have cross pairs, only.
+    Output is written to parquet (schema is pinned by the first chunk,
+    extracted columns are strings) or Excel (by constant-memory writer)
+    chunk by chunk.
+
+    - extractor - measures extractor
+    - crosser - cross-semantic extractor (cross columns aren't made, if it isn't set)
+    - chunk_size - rows count of chunk for file input
+    - spill_dir - directory for spilled chunks (temporary one, if it isn't set)
+    - match_plan - write match plan column
+
+    Empty chunks are skipped, if input has no rows at all, ValueError is raised
+    and output isn't written.
+    """
+
+    def __init__(
+        self,
+        extractor: MeasuresExtractor,
+        crosser: CrosserPro = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        spill_dir: str | Path = None,
+        match_plan: bool = True,
+        status_callback: Callable = None,
+    ) -> None:
+        self.extractor = extractor
+        self.crosser = crosser
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.match_plan = match_plan
+
+        self.status_callback = status_callback
+
+        self._stopped = False
+
+    def call_status(self, message: str) -> None:
+        if self.status_callback is not None:
+            self.status_callback(message)
+
+    def stop_callback(self) -> None:
+        self._stopped = True
+        self.extractor.stop_callback()
+        if self.crosser is not None:
+            self.crosser.stop_callback()
+
+    def _spill_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        column: str,
+        spill_dir: Path,
+    ) -> tuple[list[Path], dict[frozenset, np.ndarray], list[str]]:
+        """
+        Extract measures and cross tokens by chunks,
+        return spilled parts, rows groups and input columns
+        """
+
+        parts = []
+        input_columns = []
+        keys: dict[frozenset, int] = {}  # token set: set id
+        set_ids: list[np.ndarray] = []  # sets ids of rows, array per chunk
+        vocabulary: dict[str, str] = {}
+
+        for index, chunk in enumerate(chunks):
+            if self._stopped:
+                raise MeasuresGracefullExit("Measures extraction was stopped")
+
+            self.call_status(f"Извлекаю величины, часть {index + 1}")
+
+            if not input_columns:
+                input_columns = list(chunk.columns)
+            if chunk.empty:
+                continue
+
+            chunk = chunk.reset_index(drop=True)
+            chunk[column] = chunk[column].fillna("").astype(str)
+            chunk = self.extractor.extract(
+                chunk,
+                column,
+                concat_regex=True,
+                match_plan=self.match_plan,
+            )
+
+            if self.crosser is not None:
+                chunk_ids = []
+                for tokens in self.crosser.tokens(chunk, column):
+                    key = frozenset(vocabulary.setdefault(t, t) for t in tokens)
+                    chunk_ids.append(keys.setdefault(key, len(keys)))
+                set_ids.append(np.array(chunk_ids, dtype=np.int32))
+
+            part = spill_dir / SPILL_PART_PATTERN.format(len(parts))
+            chunk.to_parquet(part, index=False)
+            parts.append(part)
+
+        return parts, self._group_rows(keys, set_ids), input_columns
+
+    def _group_rows(
+        self,
+        keys: dict[frozenset, int],
+        set_ids: list[np.ndarray],
+    ) -> dict[frozenset, np.ndarray]:
+        """Return positions of rows of every token set (keys are ordered by set id)"""
+
+        if not set_ids:
+            return {}
+
+        set_ids = np.concatenate(set_ids)
+        positions = np.argsort(set_ids, kind="stable")
+        bounds = np.cumsum(np.bincount(set_ids, minlength=len(keys)))[:-1]
+        return dict(zip(keys, np.split(positions, bounds)))
+
+    def _read_texts(
+        self,
+        parts: list[Path],
+        column: str,
+        positions: set[int],
+    ) -> dict[int, str]:
+        texts = {}
+        offset = 0
+        for part in parts:
+            part_texts = pq.read_table(part, columns=[column])[column].to_pylist()
+            for position, text in enumerate(part_texts, offset):
+                if position in positions:
+                    texts[position] = text
+            offset += len(part_texts)
+        return texts
+
+    def _cross(
+        self,
+        parts: list[Path],
+        groups: dict[frozenset, np.ndarray],
+        column: str,
+        process_pool: multiprocessing.Pool = None,
+    ) -> dict[str, dict[int, set[str]]]:
+        """Return cross tokens of rows, which have them: {cross column: {position: tokens}}"""
+
+        self.call_status("Извлекаю кросс-семантику")
+        cross_index = CrossIndex.from_groups(groups)
+        texts = self._read_texts(parts, column, cross_index.cross_positions())
+
+        cross = {cross_column: {} for cross_column in self.crosser.columns}
+        for updates in self.crosser.cross_updates(cross_index, texts, process_pool):
+            for cross_column, (positions, tokens) in updates.items():
+                column_sets = cross[cross_column]
+                for position, token in zip(positions.tolist(), tokens):
+                    column_sets.setdefault(position, set()).add(token)
+        return cross
+
+    def _write_output(
+        self,
+        parts: list[Path],
+        cross: dict[str, dict[int, set[str]]],
+        output_path: Path,
+        input_columns: list[str],
+    ) -> None:
+        self.call_status("Сохраняю результат")
+
+        excel = output_path.suffix.lower() == EXCEL
+        writer = None
+        offset = 0
+        try:
+            for part in parts:
+                chunk = pd.read_parquet(part)
+                positions = range(offset, offset + len(chunk))
+                for cross_column, column_sets in cross.items():
+                    chunk[cross_column] = [
+                        "|".join(column_sets.get(position, ()))
+                        for position in positions
+                    ]
+
+                if excel:
+                    if writer is None:
+                        writer = ExcelStreamWriter(
+                            output_path,
+                            status_callback=self.status_callback,
+                        )
+                    writer.write(chunk)
+                else:
+                    writer = self._write_parquet(
+                        chunk, output_path, input_columns, writer
+                    )
+
+                offset += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _output_schema(
+        self,
+        chunk: pd.DataFrame,
+        input_columns: list[str],
+    ) -> pa.Schema:
+        """
+        Schema of parquet output, it is pinned by the first chunk:
+        extracted, object and empty columns are strings,
+        other input columns keep their types
+        """
+
+        fields = []
+        for field in pa.Schema.from_pandas(chunk, preserve_index=False):
+            values = chunk[field.name]
+            if (
+                field.name not in input_columns
+                or values.dtype == object
+                or values.isna().all()
+            ):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _write_parquet(
+        self,
+        chunk: pd.DataFrame,
+        output_path: Path,
+        input_columns: list[str],
+        writer: pq.ParquetWriter = None,
+    ) -> pq.ParquetWriter:
+        if writer is None:
+            schema = self._output_schema(chunk, input_columns)
+            writer = pq.ParquetWriter(output_path, schema)
+
+        for field in writer.schema:
+            if pa.types.is_string(field.type):
+                chunk[field.name] = chunk[field.name].astype("string")
+
+        table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        return writer
+
+    def run(
+        self,
+        chunks: Iterable[pd.DataFrame] | str | Path,
+        column: str,
+        output_path: str | Path,
+        process_pool: multiprocessing.Pool = None,
+    ) -> Path:
+        """
+        Run pipeline for chunks (or file path, which is read by chunks)
+        and write output to parquet or Excel file (by output path suffix).
+        """
+
+        if isinstance(chunks, (str, Path)):
+            chunks = read_chunks(chunks, self.chunk_size)
+
+        output_path = Path(output_path)
+        temporary = self.spill_dir is None
+        spill_dir = Path(tempfile.mkdtemp() if temporary else self.spill_dir)
+        spill_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            parts, groups, input_columns = self._spill_chunks(chunks, column, spill_dir)
+            if not parts:
+                raise ValueError(f"Input has no rows, {output_path} isn't written")
+
+            cross = {}
+            if self.crosser is not None and parts:
+                cross = self._cross(parts, groups, column, process_pool)
+            del groups
+
+            self._write_output(parts, cross, output_path, input_columns)
+        finally:
+            if temporary:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+
+        return output_path
@@ -3,14 +3,11 @@ import multiprocessing
 import pandas as pd
 from typing import Callable
 from pathlib import Path
-from tqdm import tqdm
 from functools import partial
-from fuzzywuzzy import process as fuzz_process
-
-tqdm.pandas()
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.simfyzer.tokenization import Token, TokenTransformer
 
@@ -24,6 +21,8 @@ def searching_func(
     transformer: TokenTransformer,
     fuzzy_threshold: int,
 ) -> tuple[list[Token]]:
+    from fuzzywuzzy import process as fuzz_process
+
     left_tokens: list[Token] = row[0]
     right_tokens: list[Token] = row[1]
     right_tokens_values = [token.value for token in right_tokens]
@@ -10,7 +10,8 @@ import multiprocessing
 SRC_DIR = Path(__file__).parent.parent
 PROJECT_DIR = SRC_DIR.parent
 
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.notation import JAKKAR, DATA
 from src.simfyzer.preprocessing import Preprocessor
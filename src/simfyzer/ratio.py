@@ -8,7 +8,8 @@ import sys
 from pathlib import Path
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.simfyzer.tokenization import Token
 
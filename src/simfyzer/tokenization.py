@@ -1,13 +1,13 @@
 from abc import ABC, abstractmethod
 import pandas as pd
-from nltk.tokenize import word_tokenize
 from collections import namedtuple
 from typing import Union
 import sys
 from pathlib import Path
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.functool.words_functool import LanguageRules, LanguageType
 from src.functool.word_extraction import WordsExtractor
@@ -122,6 +122,7 @@ class BasicTokenizer(AbstractTokenizer):
         token_column_name: str,
     ) -> pd.DataFrame:
         """Return the dataframe with extra column <token_col_name>"""
+        from nltk.tokenize import word_tokenize
 
         data[token_column_name] = data[column].apply(word_tokenize)
         data[token_column_name] = data[token_column_name].apply(self._create_tokens)
@@ -23,7 +23,8 @@ CHECKOUT = "_checkout_test"
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
 CONFIG_DIR = PROJECT_DIR / "config"
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 
 from config.measures_config.config_parser import (
@@ -0,0 +1,153 @@
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from skylark.cli import main, make_parser
+from src.data_io import read_table, write_table
+from src.feature_flow.feature_cache import FeatureCache
+
+
+class TestCLI(object):
+    def test_help_without_engines(self):
+        code = (
+            "import sys; from skylark.cli import make_parser; make_parser(); "
+            "print(sorted({m.split('.')[0] for m in sys.modules} "
+            "& {'PyQt6', 'gui', 'pandas', 'src'}))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert output.stdout.strip() == "[]"
+
+        output = subprocess.run(
+            [sys.executable, "-m", "skylark", "--help"],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+        )
+        assert output.returncode == 0
+        assert "regex-validate" in output.stdout
+
+    def test_defaults(self):
+        args = make_parser().parse_args(["simfyzer", "pairs.csv", "-w", "2"])
+        assert args.workers == 2
+        assert args.fuzzy_threshold == 0.75
+        assert args.validation_threshold == 0.5
+
+        args = make_parser().parse_args(
+            ["featureflow", "pairs.csv", "--timeout", "none"]
+        )
+        assert args.timeout is None
+
+    def test_semantix(self, tmp_path: Path):
+        path = tmp_path / "data.csv"
+        pd.DataFrame(
+            {"Название клиента": [" Сок яблочный 1 л ", "Чай 100 г  "]}
+        ).to_csv(path, index=False)
+
+        output = tmp_path / "output.parquet"
+        cache = str(tmp_path / "rows.sqlite")
+        assert (
+            main(["semantix", str(path), "-o", str(output), "--row-cache", cache]) == 0
+        )
+
+        data = read_table(output)
+        assert len(data) == 2
+        assert "Regex" in data.columns
+        assert data["Regex"].str.contains("1").iloc[0]
+
+        # the same output without cache and from cache
+        for row_cache in ["", cache]:
+            again = tmp_path / "again.parquet"
+            args = ["semantix", str(path), "-o", str(again), "--row-cache", row_cache]
+            assert main(args) == 0
+            assert read_table(again).equals(data)
+
+    def test_regex_validate(self, tmp_path: Path, capsys):
+        semantic = pd.DataFrame(
+            {
+                "Название": ["Сок", "Вода"],
+                "Плюс-слова": ["|яблоч|", np.nan],
+                "Минус-слова": ["груш", "газ"],
+                "Regex": [r"(?=.*(1\s*л))", r".*0[.,]5\s*л"],
+            }
+        )
+        validation = pd.DataFrame(
+            {
+                "Наименование": ["Сок", "Сок", "Вода"],
+                "Строка валидации": [
+                    "Сок яблочный 1 л",
+                    "Сок грушевый 1 л",
+                    "Вода 0,5 л",
+                ],
+            }
+        )
+        write_table(semantic, tmp_path / "semantic.parquet")
+        write_table(validation, tmp_path / "validation.parquet")
+
+        args = [
+            "regex-validate",
+            str(tmp_path / "semantic.parquet"),
+            str(tmp_path / "validation.parquet"),
+            "-o",
+            str(tmp_path / "output.parquet"),
+            "--stats",
+            str(tmp_path / "stats.csv"),
+            "--row-cache",
+            str(tmp_path / "rows.sqlite"),
+        ]
+        assert main(args) == 0
+
+        output = read_table(tmp_path / "output.parquet")
+        assert output["validation_mark"].to_list() == [1, 0, 1]
+        assert (tmp_path / "stats.csv").exists()
+
+        # edited validation row and edited semantic row are computed only
+        validation.loc[1, "Строка валидации"] = "Сок яблочный 1 л "
+        semantic.loc[1, "Минус-слова"] = "0,5"
+        write_table(semantic, tmp_path / "semantic.parquet")
+        write_table(validation, tmp_path / "validation.parquet")
+
+        capsys.readouterr()
+        assert main(args) == 0
+        assert "Строк из кэша: 1, к расчету: 2" in capsys.readouterr().err
+
+        output = read_table(tmp_path / "output.parquet")
+        assert output["validation_mark"].to_list() == [1, 1, 0]
+        assert list(output.columns) == [
+            "Наименование",
+            "Строка валидации",
+            "Название",
+            "validation_mark",
+            "reason",
+        ]
+
+        features = FeatureCache(tmp_path / "features.sqlite")
+        features.set_many("ns", {"Сок 1 л": {"Объем": [[0, "1"]]}})
+        features.close()
+
+        cache_args = [
+            "--row-cache",
+            str(tmp_path / "rows.sqlite"),
+            "--cache",
+            str(tmp_path / "features.sqlite"),
+        ]
+        assert main(["cache", "stats", *cache_args]) == 0
+        assert "regex-validate" in capsys.readouterr().out
+        assert (
+            main(["cache", "clear", "--pipeline", "regex-validate", *cache_args]) == 0
+        )
+        assert "Удалено строк: 5" in capsys.readouterr().err
+
+        assert main(["cache", "prune", "--max-mb", "0", *cache_args]) == 0
+        assert "Удалено признаков: 1" in capsys.readouterr().err
@@ -0,0 +1,166 @@
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.data_io import (
+    read_table,
+    read_csv_chunks,
+    preview_table,
+    write_table,
+    output_path,
+    ExcelStreamWriter,
+    SPLIT_FILES,
+)
+
+
+class TestDataIO(object):
+    def data(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Название товара": ["Сок 1 л", None, "Чай 100 г"],
+                "Сырые данные": ["сок яблочный 1л", "вода", ""],
+                "Цена": [10.5, np.nan, 3.0],
+                "Количество": [1, 2, 3],
+            }
+        )
+
+    @pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+    def test_columnar_roundtrip(self, tmp_path: Path, suffix: str):
+        path = tmp_path / ("data" + suffix)
+        write_table(self.data(), path)
+
+        data = read_table(path)
+        assert data["Название товара"].dtype == "string[pyarrow]"
+        assert data["Количество"].dtype == np.int64
+
+        write_table(data, tmp_path / ("again" + suffix))
+        assert read_table(tmp_path / ("again" + suffix)).equals(data)
+
+        columns = ["Сырые данные", "Название товара"]
+        projected = read_table(path, columns)
+        assert list(projected.columns) == columns
+        assert projected.equals(data[columns])
+
+        assert preview_table(path, rows=2).shape == (2, 4)
+
+    def test_formats(self, tmp_path: Path):
+        path = tmp_path / "data.CSV"
+        write_table(self.data(), path)
+        # csv numbers are inferred like pandas ones, except text columns
+        data = read_table(path)
+        assert data["Количество"].to_list() == [1, 2, 3]
+        assert data["Цена"].dtype == np.float64
+        assert data["Название товара"].dtype == "string[pyarrow]"
+        assert read_table(path, ["Количество"], text_columns=["Количество"])[
+            "Количество"
+        ].to_list() == ["1", "2", "3"]
+
+        assert output_path("output.xlsx", "data.feather") == Path("output.feather")
+        assert output_path("output.xlsx", "data.csv") == Path("output.xlsx")
+
+        with pytest.raises(ValueError):
+            read_table(tmp_path / "data.csv.txt")
+
+    def test_csv_chunks(self, tmp_path: Path):
+        path = tmp_path / "data.csv"
+        data = pd.concat([self.data()] * 5, ignore_index=True)
+        data.to_csv(path, index=False)
+
+        columns = ["Сырые данные", "Название товара"]
+        chunks = list(
+            read_csv_chunks(path, columns, chunk_size=4, categorical=["Сырые данные"])
+        )
+        assert [len(chunk) for chunk in chunks] == [4, 4, 4, 3]
+
+        output = pd.concat(chunks, ignore_index=True)
+        assert list(output.columns) == columns
+        assert output["Сырые данные"].dtype == "category"
+        assert output["Название товара"].dtype == "string[pyarrow]"
+        assert output["Название товара"].isna().sum() == 5
+        assert output["Сырые данные"].isna().sum() == 5  # empty strings are NA
+
+        assert read_table(path, columns)["Название товара"].equals(
+            output["Название товара"]
+        )
+
+        # chunks types don't differ: numbers aren't inferred
+        chunks = list(read_csv_chunks(path, ["Количество"], chunk_size=4))
+        assert all(chunk["Количество"].dtype == "string[pyarrow]" for chunk in chunks)
+
+    def test_csv_encoding(self, tmp_path: Path):
+        path = tmp_path / "data.csv"
+        self.data().to_csv(path, index=False, encoding="cp1251")
+
+        data = read_table(path, encoding="cp1251")
+        assert list(data.columns) == list(self.data().columns)
+        assert data["Сырые данные"].to_list()[:2] == ["сок яблочный 1л", "вода"]
+
+        chunks = list(read_csv_chunks(path, chunk_size=2, encoding="cp1251"))
+        assert pd.concat(chunks, ignore_index=True)["Название товара"].equals(
+            data["Название товара"]
+        )
+
+
+class TestExcelStreamWriter(object):
+    def data(self, rows: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "name": [f"Товар {index}" for index in range(rows)],
+                "tokens": [{"сок"} if index % 2 else None for index in range(rows)],
+                "price": [index / 2 for index in range(rows)],
+            }
+        )
+
+    def test_split_sheets(self, tmp_path: Path):
+        messages = []
+        data = self.data(10)
+
+        with ExcelStreamWriter(
+            tmp_path / "output.xlsx",
+            max_rows=4,
+            status_callback=messages.append,
+        ) as writer:
+            writer.write(data.iloc[:7])
+            writer.write(data.iloc[7:])
+
+        assert writer.paths == [tmp_path / "output.xlsx"]
+        assert writer.rows == 10 and writer.throughput > 0
+        assert len(messages) == 2
+
+        sheets = pd.read_excel(tmp_path / "output.xlsx", sheet_name=None)
+        assert list(sheets) == ["Sheet", "Sheet2", "Sheet3", "Sheet4"]
+        assert [len(sheet) for sheet in sheets.values()] == [3, 3, 3, 1]
+
+        output = pd.concat(sheets.values(), ignore_index=True)
+        assert output["name"].to_list() == data["name"].to_list()
+        assert output["price"].to_list() == data["price"].to_list()
+        assert output["tokens"].fillna("").to_list() == ["", "{'сок'}"] * 5
+
+    def test_split_files(self, tmp_path: Path):
+        writer = ExcelStreamWriter(tmp_path / "output.xlsx", SPLIT_FILES, max_rows=6)
+        writer.write(self.data(12))
+        paths = writer.close()
+
+        assert [path.name for path in paths] == [
+            "output.xlsx",
+            "output_2.xlsx",
+            "output_3.xlsx",
+        ]
+        assert [len(pd.read_excel(path)) for path in paths] == [5, 5, 2]
+
+    def test_write_table(self, tmp_path: Path):
+        write_table(self.data(0), tmp_path / "empty.xlsx")
+        assert list(pd.read_excel(tmp_path / "empty.xlsx").columns) == [
+            "name",
+            "tokens",
+            "price",
+        ]
+
+        write_table(self.data(3), tmp_path / "output.xlsx")
+        assert read_table(tmp_path / "output.xlsx")["price"].to_list() == [0, 0.5, 1]
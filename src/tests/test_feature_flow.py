@@ -1,4 +1,5 @@
 import sys
+import sqlite3
 import pytest
 import time
 import multiprocessing
@@ -8,7 +9,8 @@ from pathlib import Path
 
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from common_test import (
     NumericDataSet,
@@ -25,6 +27,14 @@ from src.feature_flow.main import (
     FeatureGenerator,
     FEATURES,
 )
+from src.feature_flow.feature_cache import FeatureCache
+from src.feature_flow.feature_plan import FeaturePlanCache
+from src.functool.regex_literals import extract_literals
+from src.feature_flow.feature_output import (
+    FeatureOutputMode,
+    read_columnar,
+    save_columnar,
+)
 
 
 class BaseTestFeatureFlow(object):
@@ -80,6 +90,195 @@ class TestFeatureFlowCustom(BaseTestFeatureFlow):
         self.run_validation_test(data, self.validator())
 
 
+class TestFeatureFlowCache(BaseTestFeatureFlow):
+    def cached_validator(self, cache: FeatureCache) -> FeatureFlow:
+        features = FeatureGenerator().generate(MEASURES_CONFIG)
+        return FeatureFlow(
+            CLIENT_PRODUCT,
+            SOURCE_PRODUCT,
+            features,
+            feature_cache=cache,
+        )
+
+    def test_persistent_feature_cache(self, tmp_path: Path):
+        cache_path = tmp_path / "features.sqlite"
+
+        first_cache = FeatureCache(cache_path)
+        data = CustomFeatureFlowData.get_data()
+        self.run_validation_test(data, self.cached_validator(first_cache))
+        first_cache.close()
+
+        second_cache = FeatureCache(cache_path)
+        data = CustomFeatureFlowData.get_data()
+        self.run_validation_test(data, self.cached_validator(second_cache))
+        second_cache.close()
+
+        assert first_cache.misses > 0
+        assert second_cache.misses == 0
+        assert second_cache.hits == first_cache.misses
+
+    def test_prune_feature_cache(self, tmp_path: Path):
+        cache_path = tmp_path / "features.sqlite"
+
+        # cache of the former version is recreated
+        connection = sqlite3.connect(cache_path)
+        connection.execute(
+            "CREATE TABLE features (config_hash TEXT, name TEXT, record TEXT)"
+        )
+        connection.commit()
+        connection.close()
+
+        cache = FeatureCache(cache_path, max_bytes=100)
+        for index in range(10):
+            cache.set_many("ns", {str(index): {"value": "x" * 20}})
+        assert cache.size <= 100
+        cache.close()
+
+        cache = FeatureCache(cache_path)
+        names = [str(index) for index in range(10)]
+        assert set(cache.get_many("ns", names)) == {"7", "8", "9"}
+        assert cache.prune(0) == 3
+        cache.close()
+
+    def test_raw_names_keys(self):
+        cache = FeatureCache()
+        data = pd.DataFrame(
+            {
+                CLIENT_PRODUCT: ["Сок 1 л", "Сок 1 л "],
+                SOURCE_PRODUCT: ["Сок 1 л", " Сок 1 л"],
+            }
+        )
+        self.cached_validator(cache).validate(data)
+
+        # padding affects units regexes, so names aren't stripped
+        assert len(cache) == 3
+
+
+class TestFeaturePlan(BaseTestFeatureFlow):
+    def test_plan_cache(self, tmp_path: Path):
+        plans = FeaturePlanCache(tmp_path)
+
+        compiled = plans.get_plan(MEASURES_CONFIG)
+        cached = plans.get_plan(MEASURES_CONFIG)
+        assert compiled == cached
+        assert len(list(tmp_path.iterdir())) == 1
+
+        validator = FeatureFlow(
+            CLIENT_PRODUCT,
+            SOURCE_PRODUCT,
+            plans.generate(MEASURES_CONFIG),
+        )
+        self.run_validation_test(CustomFeatureFlowData.get_data(), validator)
+
+
+class TestFeatureFlowPrefilter(BaseTestFeatureFlow):
+    def test_extract_literals(self):
+        assert extract_literals(r"мл|миллилитр(?:ов)?|ml|milliliters?") == [
+            "milliliter",
+            "ml",
+            "миллилитр",
+            "мл",
+        ]
+        assert extract_literals(r"мкг[\\\/](?:доз|сут)") == ["мкг"]
+        assert extract_literals(r"black|ч[её]рн") == ["black", "рн"]
+        assert extract_literals(r"№|\sn|\s[xх]") == []
+        assert extract_literals(r"\x41bc") == ["bc"]
+        assert extract_literals(r"\u0410бв|\U00000041bc") == ["bc", "бв"]
+        assert extract_literals(r"\N{CYRILLIC SMALL LETTER A}бв") == ["бв"]
+        assert extract_literals(r"\p{L}xyz|\pLxy") == ["xy", "xyz"]
+        assert extract_literals(r"(a)\1xyz") == ["xyz"]
+        assert extract_literals(r"\0101xyz") == ["1xyz"]
+
+    def test_prefilter_keeps_features(self):
+        data = pd.concat(
+            [
+                NumericDataSet.all(),
+                StringDataSet.all(),
+                CustomFeatureFlowData.get_data(),
+            ],
+            ignore_index=True,
+        )
+
+        outputs = []
+        for use_prefilter in [True, False]:
+            features = FeatureGenerator().generate(MEASURES_CONFIG)
+            validator = FeatureFlow(
+                CLIENT_PRODUCT,
+                SOURCE_PRODUCT,
+                features,
+                use_prefilter=use_prefilter,
+            )
+            output = validator.validate(data.copy())
+            output[FEATURES.CLIENT] = output[FEATURES.CLIENT].astype(str)
+            output[FEATURES.SOURCE] = output[FEATURES.SOURCE].astype(str)
+            outputs.append(output)
+
+        assert validator.prefilter is None
+        assert outputs[0].equals(outputs[1])
+
+
+class TestFeatureFlowColumnar(BaseTestFeatureFlow):
+    def test_columnar_output(self, tmp_path):
+        data = CustomFeatureFlowData.get_data()
+
+        features = FeatureGenerator().generate(MEASURES_CONFIG)
+        validator = FeatureFlow(CLIENT_PRODUCT, SOURCE_PRODUCT, features)
+        objects = validator.validate(data.copy())
+
+        features = FeatureGenerator().generate(MEASURES_CONFIG)
+        validator = FeatureFlow(
+            CLIENT_PRODUCT,
+            SOURCE_PRODUCT,
+            features,
+            output_mode=FeatureOutputMode.COLUMNAR,
+        )
+        columnar = validator.validate(data.copy())
+        table = validator.features_table
+
+        assert FEATURES.CLIENT not in columnar.columns
+        assert columnar[FEATURES.VALIDATED].equals(objects[FEATURES.VALIDATED])
+
+        # every extracted feature object has its row in the table
+        for side, column in [("client", FEATURES.CLIENT), ("source", FEATURES.SOURCE)]:
+            side_table = table[table["side"] == side]
+            assert len(side_table) == objects[column].map(len).sum()
+
+        path = tmp_path / "output.parquet"
+        save_columnar(columnar, table, path)
+
+        saved, saved_table = read_columnar(path)
+        assert saved[FEATURES.VALIDATED].to_list() == objects[FEATURES.VALIDATED].to_list()
+        assert saved_table.equals(table)
+
+
+class TestFeatureFlowTimeout(BaseTestFeatureFlow):
+    def test_slow_unit_quarantined(self):
+        features = FeatureGenerator().generate(MEASURES_CONFIG)
+        slow_unit = features[0].units[0]
+        slow_unit.regex = r"(a|aa)+$"
+        slow_unit.symbol = ""  # not prefiltered
+
+        validator = FeatureFlow(
+            CLIENT_PRODUCT,
+            SOURCE_PRODUCT,
+            features,
+            feature_cache=FeatureCache(),
+            pattern_timeout=0.05,
+        )
+        data = pd.DataFrame(
+            {
+                CLIENT_PRODUCT: ["a" * 40 + "b", "Сок 1 л"],
+                SOURCE_PRODUCT: ["Сок 1 л", "Сок 1 л"],
+            }
+        )
+        validator.validate(data)
+
+        assert validator.pattern_stats.quarantined == {slow_unit.regex}
+        report = validator.pattern_stats.report()
+        assert report.loc[report["quarantined"], "pattern"].to_list() == [slow_unit.regex]
+        assert report["seconds"].is_monotonic_decreasing
+
+
 class FeatureFlowGenericsTestsDebug(TestFeatureFlowGenerics):
     def __init__(self) -> None:
         super().__init__()
@@ -0,0 +1,260 @@
+import re
+import sys
+import pytest
+import multiprocessing
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.regx.regex_validator import RegexValidator, RegexValidatorPro
+from src.regx.modes import PlusFuzzy, MinusFuzzy, RegexStrict
+from src.regx.reverse_index import ReverseRegexIndex, regex_clauses
+from src.regx import validation_engine
+from src.regx.validation_engine import PatternGroupsValidator, PatternStats, MATCH
+
+
+class BaseTestRegexValidator(object):
+    def semantic(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Название": ["Сок", "Чай", "Вода", "Кофе"],
+                "Плюс-слова": ["|яблоч|", "черн|лист", np.nan, ""],
+                "Минус-слова": ["груш", np.nan, "газ|сладк", ""],
+                "Regex": [r"(?=.*(1\s*л))", "", r".*0[.,]5\s*л", np.nan],
+            }
+        )
+
+    def validation(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Наименование": ["Сок", "Сок", "Сок", "Чай", "Чай", "Вода", "Вода"]
+                + ["Кофе"],
+                "Строка валидации": [
+                    "Сок яблочный 1 л",
+                    "Сок яблочный 2 л",
+                    "Сок грушевый яблочный 1 л",
+                    "Чай черный листовой",
+                    "Чай черный пакетированный",
+                    "Вода 0,5 л",
+                    "Вода газированная 0.5 л",
+                    "Кофе",
+                ],
+            }
+        )
+
+
+class TestRegexValidator(BaseTestRegexValidator):
+    def test_package_imports(self):
+        # modes classes are compared by identity, so they are imported once
+        assert "modes" not in sys.modules
+        assert "validation_engine" not in sys.modules
+
+    def test_validate(self):
+        output = RegexValidator(self.semantic(), self.validation()).validate()
+
+        assert output["reason"].to_list() == [
+            "111",
+            "110",
+            "011",
+            "111",
+            "101",
+            "111",
+            "011",
+            "111",
+        ]
+        assert output["validation_mark"].to_list() == [1, 0, 0, 1, 0, 1, 0, 1]
+        assert list(output.columns) == [
+            "Наименование",
+            "Строка валидации",
+            "Название",
+            "validation_mark",
+            "reason",
+        ]
+
+    def test_engine_equals_re(self):
+        patterns = [r"\d+\s*л", "^сок", r"\d+\s*л", "чай"] * 10
+        strings = ["сок 1 л", "Сок", "чай", "ЧАЙ черный"] * 10
+
+        for method in ["search", "match"]:
+            expected = [
+                getattr(re, method)(pattern, string, re.IGNORECASE) is not None
+                for pattern, string in zip(patterns, strings)
+            ]
+            validator = PatternGroupsValidator(method)
+            assert validator.validate(patterns, strings).tolist() == expected
+
+        with pytest.raises(ValueError):
+            PatternGroupsValidator("fullmatch")
+
+        assert PatternGroupsValidator(MATCH).validate([], []).tolist() == []
+
+    def test_timeout_quarantine(self):
+        slow = r"(a|aa)+$"
+        patterns = [slow, "сок", slow, "сок"]
+        strings = ["a" * 40 + "b", "сок", "aa", "чай"]
+
+        validator = PatternGroupsValidator(timeout=0.05)
+        assert validator.validate(patterns, strings).tolist() == [0, 1, 0, 0]
+        assert validator.quarantined == {slow}
+        # quarantined pattern isn't checked again, its result is unknown
+        assert validator.validate([slow], ["aa"]).tolist() == [False]
+
+        report = validator.stats.report()
+        assert report["pattern"].to_list() == [slow, "сок"]
+        assert report["strings"].to_list() == [2, 2]
+        assert report["quarantined"].to_list() == [True, False]
+
+        np.testing.assert_array_equal(
+            validator.check(patterns, strings), [np.nan, 1, np.nan, 0]
+        )
+
+    def test_budget_quarantine(self, monkeypatch):
+        # every check is fast, but all checks of pattern spend its budget
+        slow = r"(?:a|aa)+$"
+        patterns = [slow] * 400 + ["сок"]
+        strings = ["a" * 18 + "b"] * 400 + ["сок"]
+
+        stats = PatternStats(budget=0.05)
+        validator = PatternGroupsValidator(timeout=1.0, stats=stats)
+        result = validator.check(patterns, strings)
+        assert validator.quarantined == {slow}
+        assert stats.seconds[slow] < 0.2
+        assert np.isnan(result[-2]) and result[-1] == 1
+        assert (result[:-1] == 0).sum() < 200
+
+        monkeypatch.setattr(validation_engine, "POOL_MIN_ROWS", 1)
+        monkeypatch.setattr(validation_engine, "POOL_TASK_ROWS", 10)
+        monkeypatch.setattr(validation_engine, "POOL_WAVE_TASKS", 2)
+        stats = PatternStats(budget=0.05)
+        with multiprocessing.Pool(2) as pool:
+            validator = PatternGroupsValidator(
+                timeout=1.0, process_pool=pool, stats=stats
+            )
+            result = validator.check(patterns, strings)
+        # tasks of the next waves aren't run after quarantine
+        assert validator.quarantined == {slow}
+        assert stats.strings[slow] < 400
+        assert np.isnan(result[-2]) and result[-1] == 1
+
+    def test_quarantined_is_unknown(self):
+        # rows of slow regex aren't passed as not found or found
+        semantic = self.semantic()
+        semantic.loc[0, "Regex"] = r"(?=.*(1\s*л))(?=.*((a|aa)+$))"
+        validation = self.validation()
+        validation.loc[[0, 1], "Строка валидации"] = [
+            "Сок яблочный 1 л " + "a" * 40 + "b",
+            "Сок яблочный 2 л",
+        ]
+
+        output = RegexValidator(semantic, validation, pattern_timeout=0.05).validate()
+        # the rest strings of timed out regex aren't checked too
+        assert output["reason"].to_list()[:4] == ["11?", "11?", "01?", "111"]
+        np.testing.assert_array_equal(
+            output["validation_mark"].to_numpy()[:4], [np.nan, np.nan, 0, 1]
+        )
+
+        output = RegexValidatorPro(
+            semantic.fillna(""),
+            validation,
+            plus_weight=1,
+            minus_weight=1,
+            regex_weight=1,
+            strict=[RegexStrict],
+            validation_merge_by="Наименование",
+            pattern_timeout=0.05,
+        ).validate()
+        assert output["validation_mark"].isna().to_list()[:4] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+
+    def test_pro_batch_equals_apply(self):
+        def validate(batch: bool, use_fuzzy: list) -> pd.DataFrame:
+            return RegexValidatorPro(
+                self.semantic().fillna(""),
+                self.validation(),
+                plus_weight=1,
+                minus_weight=1,
+                regex_weight=1,
+                use_fuzzy=use_fuzzy,
+                validation_merge_by="Наименование",
+                batch=batch,
+            ).validate()
+
+        output = validate(True, [])
+        assert output.equals(validate(False, []))
+
+        # rapidfuzz partial_ratio finds the best alignment, fuzzywuzzy one doesn't:
+        # "сладк" in "Вода 0,5 л" is 33.3 by rapidfuzz and 20 by fuzzywuzzy
+        fuzzy = [PlusFuzzy, MinusFuzzy]
+        batch_marks = validate(True, fuzzy)["validation_mark"]
+        apply_marks = validate(False, fuzzy)["validation_mark"]
+        assert not batch_marks.equals(output["validation_mark"])
+        np.testing.assert_allclose(batch_marks, apply_marks, atol=0.05)
+
+
+class TestReverseRegexIndex(BaseTestRegexValidator):
+    def test_regex_clauses(self):
+        assert regex_clauses(r"^(?=.*(\d+\s*мл))(?=.*((?:сок|нектар)))") == [
+            ["мл"],
+            ["нектар", "сок"],
+        ]
+        assert regex_clauses(r"(?=.*(мл))?|кг") == []
+
+    def test_search_equals_validator(self):
+        semantic = self.semantic()
+        strings = self.validation()["Строка валидации"].to_list()
+
+        pairs = pd.DataFrame(
+            [(name, string) for string in strings for name in semantic["Название"]],
+            columns=["Наименование", "Строка валидации"],
+        )
+        output = RegexValidator(semantic.copy(), pairs).validate()
+        expected = (
+            output.loc[output["validation_mark"] == 1]
+            .groupby("Строка валидации", sort=False)["Название"]
+            .agg(list)
+        )
+
+        index = ReverseRegexIndex(semantic)
+        names = semantic["Название"].to_list()
+        pairs = []
+        for string, matched in zip(strings, index.search(strings)):
+            assert [names[row_id] for row_id in matched] == expected.get(string, [])
+            pairs.extend((string, names[row_id]) for row_id in matched)
+
+        merged = index.merge(self.validation(), semantic)
+        assert list(zip(merged["Строка валидации"], merged["Название"])) == pairs
+        assert 0 < index.confirm_rate <= 1
+
+        # batches of search are confirmed separately
+        batched = ReverseRegexIndex(semantic, batch_rows=3)
+        assert list(batched.search(strings)) == list(index.search(strings))
+
+    def test_escaped_literal_row_matches(self):
+        semantic = self.semantic()
+        semantic.loc[1, "Regex"] = r"(?=.*(\x41bc))"
+        assert regex_clauses(semantic.loc[1, "Regex"]) == [["bc"]]
+
+        index = ReverseRegexIndex(semantic)
+        assert list(index.search(["Чай черный лист Abc", "Чай черный лист bc"])) == [
+            [1, 3],
+            [3],
+        ]
+
+    def test_slow_regex_is_quarantined(self):
+        semantic = self.semantic()
+        semantic.loc[0, "Regex"] = r"(?=.*(1\s*л))(?=.*((a|aa)+$))"
+        strings = ["Сок яблочный 1 л " + "a" * 40 + "b", "Вода 0,5 л"]
+
+        index = ReverseRegexIndex(semantic, pattern_timeout=0.05)
+        # row 3 has no checks, it accepts every string
+        assert list(index.search(strings)) == [[3], [2, 3]]
+        assert index.pattern_stats.quarantined == {semantic.loc[0, "Regex"]}
+        assert index.unknown == 1
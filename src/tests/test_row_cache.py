@@ -0,0 +1,136 @@
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from src.row_cache import RowCache, run_incremental, run_hash, row_hashes
+
+
+class TestRowCache(object):
+    def data(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "name": ["Сок 1 л", "Чай", "Сок 1 л", None, "Вода"],
+                "price": [1, 2, 3, 4, 5],
+            }
+        )
+
+    def compute(self, computed: list):
+        def step(data: pd.DataFrame) -> pd.DataFrame:
+            computed.extend(data["name"].to_list())
+            data["length"] = data["name"].fillna("").str.len()
+            data["upper"] = data["name"].str.upper()
+            return data
+
+        return step
+
+    def test_hashes(self):
+        assert run_hash({"a": 1, "b": 2}, threshold=0.5) == run_hash(
+            {"b": 2, "a": 1}, threshold=0.5
+        )
+        assert run_hash({"a": 1}, threshold=0.5) != run_hash({"a": 1}, threshold=0.6)
+        assert run_hash({"a": 1}) != run_hash({"a": 1}, modules=("src.row_cache",))
+
+        hashes = row_hashes(pd.DataFrame({"a": ["x", None, np.nan, " x"]}), ["a"])
+        assert hashes[1] == hashes[2]
+        assert len(set(hashes)) == 3
+
+    def test_incremental(self, tmp_path: Path):
+        path = tmp_path / "rows.sqlite"
+        data = self.data()
+
+        computed = []
+        cache = RowCache(path)
+        output = run_incremental(
+            data, ["name"], self.compute(computed), cache, "test", "ns"
+        )
+        cache.close()
+
+        assert computed == ["Сок 1 л", "Чай", None, "Вода"]  # equal rows once
+        assert output["length"].to_list() == [7, 3, 7, 0, 4]
+        assert list(output.columns) == ["name", "price", "length", "upper"]
+        assert output["price"].equals(data["price"])
+
+        computed.clear()
+        data.loc[1, "name"] = "Чай черный"
+        cache = RowCache(path)
+        again = run_incremental(
+            data, ["name"], self.compute(computed), cache, "test", "ns"
+        )
+        assert computed == ["Чай черный"]
+        assert again["length"].to_list() == [7, 10, 7, 0, 4]
+        assert cache.hits == 3 and cache.misses == 1  # unique rows
+
+        computed.clear()
+        run_incremental(data, ["name"], self.compute(computed), cache, "test", "ns")
+        assert computed == []
+
+        run_incremental(data, ["name"], self.compute(computed), cache, "test", "other")
+        assert len(computed) == 4
+
+        assert cache.stats()["rows"].to_list() == [4, 5]  # recently used first
+        assert cache.invalidate("test") == 9
+        assert len(cache) == 0
+
+    def test_rewritten_key(self):
+        def strip(data: pd.DataFrame) -> pd.DataFrame:
+            data["name"] = data["name"].str.strip()
+            data["length"] = data["name"].str.len()
+            return data
+
+        data = pd.DataFrame({"name": [" Сок 1 л ", "Чай", None, "Вода  "]})
+        expected = strip(data.copy())
+
+        cache = RowCache()
+        first = run_incremental(data, ["name"], strip, cache, "test", "ns")
+        data.loc[1, "name"] = "Чай "  # only stripped row is computed again
+        again = run_incremental(data, ["name"], strip, cache, "test", "ns")
+
+        assert first.equals(expected)
+        assert again.equals(expected)
+        assert data.loc[0, "name"] == " Сок 1 л "  # input isn't changed
+
+    def test_not_cacheable(self):
+        cache = RowCache()
+        run_incremental(
+            self.data(),
+            ["name"],
+            self.compute([]),
+            cache,
+            "test",
+            "ns",
+            cacheable=lambda: False,
+        )
+        assert len(cache) == 0
+
+    def test_cross_row(self):
+        cache = RowCache()
+        data = self.data()
+
+        computed = []
+        step = self.compute(computed)
+        run_incremental(data, ["name"], step, cache, "test", "ns", cross_row=True)
+        run_incremental(data, ["name"], step, cache, "test", "ns", cross_row=True)
+        assert len(computed) == 4
+
+        # any changed row changes results of all rows
+        data.loc[4, "name"] = "Вода 1 л"
+        run_incremental(data, ["name"], step, cache, "test", "ns", cross_row=True)
+        assert len(computed) == 8
+
+    def test_prune(self):
+        cache = RowCache(max_bytes=100)
+        for index in range(10):
+            cache.set_many("test", "ns", {str(index): {"value": "x" * 20}})
+
+        assert cache.size <= 100
+        assert set(cache.get_many("test", "ns", [str(i) for i in range(10)])) == {
+            "7",
+            "8",
+            "9",
+        }
+        assert cache.prune(0) == 3
@@ -1,12 +1,19 @@
 import sys
+import json
+import random
 import pytest
+import multiprocessing
 import regex as re
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from common_test import (
     NumericDataSet,
@@ -21,7 +28,22 @@ from common_test import (
     MEASURES_CONFIG,
     DataTypes,
 )
-from src.semantix.measures_extraction import MeasureExtractor, MeasuresExtractor
+from src.semantix.measures_extraction import (
+    MeasureExtractor,
+    MeasuresExtractor,
+    SizeExtractor,
+)
+from src.functool.cross_semantic_functool import BasicCrosser, CrossIndex
+from src.semantix.common import PatternCache, del_rx, Measures
+from src.semantix.cross_semantic import (
+    CrosserPro,
+    LanguageRules,
+    TokensPresence,
+    token_checkout,
+)
+from src.semantix.match_plan import MatchPlanMatcher
+from src.semantix.semantix_stream import SemantixStream, read_chunks
+from src.notation import SEMANTIC
 from custom_data import CustomData, CustomUncreationData
 
 EMPTY = "_test_empty"
@@ -247,6 +269,482 @@ class TestSemantixUncreation(BaseTestSemantix):
         )
 
 
+# units, which matches are adjacent (they share separators)
+ADJACENT_UNITS = [
+    "Витамин 1 мг 500 мкг",
+    "Сок 2 шт 10 мл",
+    "Вода 1 л 500 мл",
+    "Чай 100 г 20 г",
+]
+
+
+class TestMeasureScanner(object):
+    def test_scanner_equals_units_search(self):
+        data = pd.concat([NumericDataSet.all(), StringDataSet.all()])
+        data = data.sample(5000, random_state=0)
+        extract_from = ("  " + data[CLIENT_PRODUCT].astype(str) + "  ").to_list()
+        extract_from += ["  " + string + "  " for string in ADJACENT_UNITS]
+
+        for measure in Measures(MEASURES_CONFIG):
+            assert measure.scanner._pattern is not None  # one scan of all units
+            expected = [
+                unit.filter_count(unit.extract(extract_from)) for unit in measure
+            ]
+            assert measure.scanner.scan(extract_from) == expected
+
+
+class TestNumericRegexCache(object):
+    def test_cache_is_shared(self):
+        data = NumericDataSet.volume_data()[[CLIENT_PRODUCT]].head(200)
+
+        measure_extractor = MeasureExtractor(MEASURES_CONFIG)
+        measures_extractor = MeasuresExtractor(MEASURES_CONFIG, units_columns=True)
+        assert measure_extractor.regex_cache is measures_extractor.regex_cache
+
+        cache = measures_extractor.regex_cache
+        cache.clear()
+
+        expected = measure_extractor.extract(data.copy(), CLIENT_PRODUCT, "Объем")
+        assert cache.misses > 0
+
+        hits = cache.hits
+        output = measures_extractor.extract(data.copy(), CLIENT_PRODUCT)
+        assert cache.hits > hits
+        assert output["Миллилитр"].add(output["Литр"]).equals(expected)
+
+
+class TestLeanConcatRegex(object):
+    def test_lean_equals_units_columns(self):
+        data = pd.concat([NumericDataSet.all(), StringDataSet.all()])
+        data = data[[CLIENT_PRODUCT]].sample(3000, random_state=0)
+        data = pd.concat(
+            [data, pd.DataFrame({CLIENT_PRODUCT: ADJACENT_UNITS})], ignore_index=True
+        )
+
+        expected = MeasuresExtractor(MEASURES_CONFIG, units_columns=True).extract(
+            data.copy(), CLIENT_PRODUCT, match_plan=True
+        )
+        output = MeasuresExtractor(MEASURES_CONFIG).extract(
+            data.copy(), CLIENT_PRODUCT, match_plan=True
+        )
+
+        assert list(output.columns) == [CLIENT_PRODUCT, SEMANTIC.REGEX, SEMANTIC.PLAN]
+        assert output[SEMANTIC.REGEX].str.startswith("^").any()
+        assert output[SEMANTIC.REGEX].equals(expected[SEMANTIC.REGEX])
+        assert output[SEMANTIC.PLAN].equals(expected[SEMANTIC.PLAN])
+
+        vitamin = output[SEMANTIC.REGEX].iloc[-len(ADJACENT_UNITS)]
+        assert "[^0-9]500\\s*(?:мкг" in vitamin and "[^0-9]1\\s*(?:мг" in vitamin
+
+
+class TestCrossIndex(object):
+    def brute_force_pairs(self, tokens: list[set]) -> tuple[set, set]:
+        crosser = BasicCrosser()
+        minus, intersect = set(), set()
+        for index, current_set in enumerate(tokens):
+            for rest_index, other_set in enumerate(tokens):
+                if index == rest_index:
+                    continue
+
+                cross_minus = crosser.get_cross_minus(current_set, other_set)
+                if cross_minus:
+                    minus.add((index, rest_index, *cross_minus))
+
+                cross_intersect = crosser.get_cross_intersect(current_set, other_set)
+                if cross_intersect:
+                    tokens_pair = (*cross_intersect[0], *cross_intersect[1])
+                    intersect.add((index, rest_index, *tokens_pair))
+        return minus, intersect
+
+    def index_pairs(self, tokens: list[set]) -> tuple[set, set]:
+        cross_index = CrossIndex(tokens)
+
+        minus = set()
+        for current, other, token in cross_index.cross_minus_pairs():
+            minus.update((i, j, token) for i in current for j in other)
+
+        intersect = set()
+        for current, other, *tokens_pair in cross_index.cross_intersect_pairs():
+            intersect.update((i, j, *tokens_pair) for i in current for j in other)
+        return minus, intersect
+
+    def test_cross_index_pairs(self):
+        rnd = random.Random(0)
+        words = ["a", "b", "c", "d", "e", "f"]
+        tokens = [set(rnd.sample(words, rnd.randint(0, 4))) for _ in range(300)]
+
+        assert self.index_pairs(tokens) == self.brute_force_pairs(tokens)
+
+    def test_cross_index_partitions(self):
+        rnd = random.Random(1)
+        words = ["a", "b", "c", "d", "e", "f"]
+        tokens = [set(rnd.sample(words, rnd.randint(0, 4))) for _ in range(300)]
+        cross_index = CrossIndex(tokens)
+
+        minus, intersect = set(), set()
+        for signatures in cross_index.partitions(7):
+            subindex = cross_index.subindex(signatures)
+            for current, other, token in subindex.cross_minus_pairs():
+                minus.update((i, j, token) for i in current for j in other)
+            for current, other, *pair in subindex.cross_intersect_pairs():
+                intersect.update((i, j, *pair) for i in current for j in other)
+
+        assert (minus, intersect) == self.index_pairs(tokens)
+
+    def test_tokens_presence(self):
+        texts = ["Крем для РУК 50мл", "wi-fi адаптер", "Плитка 30x30", "кабель USB-C"]
+        tokens = ["рук", "крем", "wi-fi", "usb-c", "30x30", "мл", "адапт", "ы"]
+        presence = TokensPresence(texts)
+
+        positions = list(range(len(texts)))
+        for token in tokens:
+            expected = [
+                position
+                for position in positions
+                if token_checkout(texts[position], {token}, plus=True)
+            ]
+            assert presence.rows(positions, token) == expected
+            assert presence.contains_any(positions, token) == bool(expected)
+
+    def test_presence_is_shared(self, monkeypatch):
+        created = []
+        init = TokensPresence.__init__
+
+        def counted_init(presence, texts):
+            created.append(len(texts))
+            init(presence, texts)
+
+        monkeypatch.setattr(TokensPresence, "__init__", counted_init)
+
+        tokens = [{"сок", "яблоч"}, {"сок"}, {"сок", "груш"}, {"чай"}] * 50
+        texts = [" ".join(row) for row in tokens]
+        crosser = CrosserPro([LanguageRules("russian")])
+        updates = list(crosser.cross_updates(CrossIndex(tokens), texts))
+
+        assert len(updates) > 1
+        assert created == [len(texts)]  # serial partitions share one presence
+
+    def test_cross_updates_of_cross_rows_texts(self):
+        tokens = [{"сок", "яблоч"}, {"сок"}, {"кофе", "зерн", "молот"}, {"чай"}] * 5
+        cross_index = CrossIndex(tokens)
+        texts = {pos: " ".join(tokens[pos]) for pos in cross_index.cross_positions()}
+        assert len(texts) < len(tokens)
+
+        def collect(updates) -> set:
+            found = set()
+            for update in updates:
+                for column, (positions, words) in update.items():
+                    found.update(zip([column] * len(words), positions.tolist(), words))
+            return found
+
+        crosser = CrosserPro([LanguageRules("russian")])
+        serial = collect(crosser.cross_updates(cross_index, texts))
+        with multiprocessing.Pool(2) as process_pool:
+            parallel = collect(crosser.cross_updates(cross_index, texts, process_pool))
+        assert serial and serial == parallel
+
+    def test_crosser_process_pool(self):
+        data = NumericDataSet.all()[[CLIENT_PRODUCT]].sample(2000, random_state=0)
+        data["Regex"] = ""
+        rules = [LanguageRules("russian", min_lenght=3, stemming=True, symbols="")]
+
+        serial = CrosserPro(rules).extract(data.copy(), CLIENT_PRODUCT)
+        with multiprocessing.Pool(2) as process_pool:
+            crosser = CrosserPro(rules)
+            parallel = crosser.extract(data.copy(), CLIENT_PRODUCT, process_pool)
+
+        for column in crosser.columns:
+            serial[column] = serial[column].str.split("|").map(sorted)
+            parallel[column] = parallel[column].str.split("|").map(sorted)
+        assert serial.equals(parallel)
+
+
+class TestSemantixStream(object):
+    def crosser(self) -> CrosserPro:
+        return CrosserPro(
+            [
+                LanguageRules(
+                    "russian",
+                    check_letters=True,
+                    with_numbers=True,
+                    min_lenght=3,
+                    stemming=True,
+                    symbols="",
+                )
+            ]
+        )
+
+    def test_stream_equals_in_memory(self, tmp_path):
+        names = [
+            "Сок яблочный 1 л",
+            "Сок яблочный зеленый 1 л",
+            "Сок грушевый 1 л",
+            "Сок грушевый 500 мл",
+            "Чай черный 100 г",
+            "Чай зеленый 100 г",
+            "Чай черный листовой 100 г",
+            "Кружка белая",
+        ]
+        data = pd.DataFrame({"name": names * 3, "id": range(len(names) * 3)})
+        data.to_csv(tmp_path / "input.csv", index=False)
+
+        expected = MeasuresExtractor(MEASURES_CONFIG).extract(
+            data.copy(), "name", match_plan=True
+        )
+        expected = self.crosser().extract(expected, "name")
+
+        stream = SemantixStream(
+            MeasuresExtractor(MEASURES_CONFIG),
+            self.crosser(),
+            chunk_size=5,
+            spill_dir=tmp_path / "spill",
+        )
+        output = stream.run(tmp_path / "input.csv", "name", tmp_path / "output.parquet")
+        output = pd.read_parquet(output)
+
+        assert list(output.columns) == list(expected.columns)
+        assert len(list((tmp_path / "spill").iterdir())) == 5
+        for column in ["name", "Regex", "Regex plan"]:
+            assert output[column].to_list() == expected[column].to_list()
+
+        for column in stream.crosser.columns:
+            words = [set(row.split("|")) - {""} for row in output[column]]
+            assert words == [set(row.split("|")) - {""} for row in expected[column]]
+        assert output["cross_minus"].ne("").any()
+
+    def test_stream_process_pool(self, tmp_path):
+        # rows without cross pairs are in partitions too
+        names = ["Сок яблочный 1 л", "Сок 1 л", "Кофе зерновой молотый", "Чай 100 г"]
+        data = pd.DataFrame({"name": names * 3})
+
+        outputs = []
+        for use_pool in [False, True]:
+            stream = SemantixStream(
+                MeasuresExtractor(MEASURES_CONFIG), self.crosser(), chunk_size=5
+            )
+            output = tmp_path / f"output_{use_pool}.parquet"
+            if use_pool:
+                with multiprocessing.Pool(2) as process_pool:
+                    stream.run([data[:5], data[5:]], "name", output, process_pool)
+            else:
+                stream.run([data[:5], data[5:]], "name", output)
+            outputs.append(pd.read_parquet(output))
+
+        serial, parallel = outputs
+        for column in self.crosser().columns:
+            serial[column] = serial[column].str.split("|").map(sorted)
+            parallel[column] = parallel[column].str.split("|").map(sorted)
+        assert serial.equals(parallel)
+        assert serial["cross_plus"].map(any).any()
+
+    def test_stream_schema(self, tmp_path):
+        # types of the first chunk columns don't break writing of the next ones
+        chunks = [
+            pd.DataFrame({"name": ["Кружка белая"], "count": [1], "note": [np.nan]}),
+            pd.DataFrame({"name": ["Сок 1 л"], "count": [np.nan], "note": ["x"]}),
+        ]
+        stream = SemantixStream(
+            MeasuresExtractor(MEASURES_CONFIG, units_columns=True),
+            self.crosser(),
+        )
+        output = stream.run(chunks, "name", tmp_path / "output.parquet")
+
+        schema = pq.read_schema(output)
+        assert schema.field("count").type == pa.int64()
+        assert schema.field("note").type == pa.string()
+        assert schema.field("Литр").type == pa.string()
+
+        output = pd.read_parquet(output)
+        assert output["note"].to_list() == [None, "x"]
+        assert output["Литр"].str.len().to_list()[0] == 0
+
+    def test_read_chunks(self, tmp_path):
+        data = pd.DataFrame({"name": ["a", None, "c"], "count": [1, 2, 3]})
+        data.to_csv(tmp_path / "input.csv", index=False)
+        data.to_parquet(tmp_path / "input.parquet", index=False)
+
+        chunks = list(read_chunks(tmp_path / "input.csv", chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert chunks[0]["count"].to_list() == ["1", "2"]
+
+        chunks = list(read_chunks(tmp_path / "input.parquet", chunk_size=2))
+        assert pd.concat(chunks, ignore_index=True).equals(data)
+
+    def test_stream_excel_output(self, tmp_path):
+        data = pd.DataFrame({"name": ["Сок яблочный 1 л", "Чай черный 100 г"] * 3})
+
+        stream = SemantixStream(MeasuresExtractor(MEASURES_CONFIG), chunk_size=4)
+        output = stream.run([data[:4], data[4:]], "name", tmp_path / "output.xlsx")
+
+        output = pd.read_excel(output)
+        assert output["name"].to_list() == data["name"].to_list()
+        assert output["Regex"].str.contains("л").all()
+
+    def test_stream_empty_input(self, tmp_path):
+        data = pd.DataFrame({"name": ["Сок яблочный 1 л", "Чай черный 100 г"]})
+        stream = SemantixStream(MeasuresExtractor(MEASURES_CONFIG), self.crosser())
+
+        # empty chunks are skipped
+        output = stream.run([data[:0], data, data[:0]], "name", tmp_path / "out.parquet")
+        assert pd.read_parquet(output)["name"].to_list() == data["name"].to_list()
+
+        data.iloc[:0].to_csv(tmp_path / "empty.csv", index=False)
+        for chunks in ([], [data[:0]], tmp_path / "empty.csv"):
+            with pytest.raises(ValueError, match="no rows"):
+                stream.run(chunks, "name", tmp_path / "empty.parquet")
+            assert not (tmp_path / "empty.parquet").exists()
+
+
+class TestDelRx(object):
+    def test_del_rx(self):
+        data = pd.DataFrame(
+            {
+                CLIENT_PRODUCT: ["Сок 1 л яблоко", "Сок 1 Л груша", "Вода 500 мл", "Чай"],
+                "Regex": [
+                    r"(?=.*(1\s?л))(?=.*(яблок))",
+                    r"(?=.*(1\s?л))(?=.*(яблок))",
+                    r"(?=.*(500\s?мл|0[.,]5\s?л))",
+                    "",
+                ],
+            }
+        )
+        patterns = PatternCache(maxsize=1)
+        output = del_rx(data, CLIENT_PRODUCT, patterns)
+
+        assert output["row"].to_list() == ["Сок  о ", "Сок  груша ", "Вода  ", "Чай "]
+        assert "rx_to_del" not in output.columns
+        assert (patterns.misses, patterns.hits, len(patterns)) == (2, 0, 1)
+
+    def test_overlapping_fragments(self):
+        # fragments are deleted one by one, as re.sub of every fragment does
+        data = pd.DataFrame(
+            {
+                CLIENT_PRODUCT: ["Вода 12 500 мл", "Вода 12 500 мл"],
+                "Regex": [
+                    r"(?=.*(500\s?мл))(?=.*(12 5))",
+                    r"(?=.*(12 5))(?=.*(500\s?мл))",
+                ],
+            }
+        )
+        output = del_rx(data, CLIENT_PRODUCT, PatternCache())
+        assert output["row"].to_list() == ["Вода 12  ", "Вода 00 мл "]
+
+
+class TestMatchPlan(object):
+    @pytest.fixture(scope="class")
+    def matcher(self) -> MatchPlanMatcher:
+        return MatchPlanMatcher(MEASURES_CONFIG)
+
+    def checkout(
+        self,
+        matcher: MatchPlanMatcher,
+        regexes: pd.Series,
+        plans: pd.Series,
+        strings: pd.Series,
+    ) -> None:
+        strings = ("   " + strings.astype(str) + "   ").to_list()
+        for regex, plan, string in zip(regexes, plans, strings):
+            searched = bool(re.search(regex, string, flags=re.IGNORECASE))
+            assert matcher.match(plan, string) == searched, (regex, plan, string)
+
+    @pytest.mark.parametrize(
+        "dataset, measure_name",
+        [
+            (NumericDataSet.weight_data, DataTypes.weight),
+            (NumericDataSet.volume_data, DataTypes.volume),
+            (NumericDataSet.quantity_data, DataTypes.quantity),
+            (NumericDataSet.memory_capacity_data, DataTypes.memory_capacity),
+            (
+                NumericDataSet.concentration_per_dose_data,
+                DataTypes.concentration_per_dose,
+            ),
+            (NumericDataSet.length_data, DataTypes.lenght),
+            (StringDataSet.color_data, DataTypes.color),
+        ],
+    )
+    def test_plan_equals_regex(self, matcher, dataset, measure_name):
+        data = dataset()
+        data = data.sample(min(len(data), 3000), random_state=0)
+
+        regexes, plans = MeasureExtractor(MEASURES_CONFIG).extract(
+            data, CLIENT_PRODUCT, measure_name, match_plan=True
+        )
+        self.checkout(matcher, regexes, plans, data[SOURCE_PRODUCT])
+
+    def test_adjacent_units(self, matcher):
+        data = pd.DataFrame({CLIENT_PRODUCT: ADJACENT_UNITS})
+        output = MeasuresExtractor(MEASURES_CONFIG).extract(
+            data.copy(), CLIENT_PRODUCT, match_plan=True
+        )
+
+        plan = json.loads(output[SEMANTIC.PLAN].iloc[0])
+        assert len(plan["required"]) == 2  # 1 мг and 500 мкг
+
+        regexes, plans = output[SEMANTIC.REGEX], output[SEMANTIC.PLAN]
+        sources = pd.Series(ADJACENT_UNITS)
+        self.checkout(matcher, regexes, plans, sources)
+        self.checkout(matcher, regexes, plans, sources.str.replace("500", "200"))
+
+    def test_concatenated_plan_equals_regex(self, matcher):
+        data = pd.concat([NumericDataSet.all(), StringDataSet.all()])
+        data = data.sample(3000, random_state=0)
+
+        output = MeasuresExtractor(MEASURES_CONFIG).extract(
+            data, CLIENT_PRODUCT, match_plan=True
+        )
+        assert not [column for column in output.columns if column.startswith("План ")]
+        self.checkout(
+            matcher,
+            output[SEMANTIC.REGEX],
+            output[SEMANTIC.PLAN],
+            output[SOURCE_PRODUCT],
+        )
+
+    def test_plan_literals(self, matcher):
+        plan = {
+            "required": [[["Объем", "Миллилитр", "500"], ["Объем", "Литр", "0.5"]]],
+            "exclusions": [],
+            "literals": [["0", "5", "500"]],
+        }
+        assert matcher.match(plan, "  Вода 0,5 л  ")
+        assert matcher.match(plan, "  Вода 0.500 мл  ")
+        assert not matcher.match(plan, "  Вода 1500 мл  ")
+        assert not matcher.match(plan, "  Вода 0.5 кг  ")
+
+
+class TestSizeExtractor(object):
+    def test_sizes_rx(self):
+        data = pd.DataFrame(
+            {
+                CLIENT_PRODUCT: [
+                    "Коробка 10x20x30 см",
+                    "Плед 150/200 и 1x2x3",
+                    "Чай",
+                    "Лист 0.5x1 м",
+                    "Коробка 10х20х30",
+                ]
+            }
+        )
+        extractor = SizeExtractor(basic_sep=False)
+        extractor.regex_cache.clear()
+        output = extractor.extract(data, CLIENT_PRODUCT)
+
+        triple = r"(?=.*(\D1\D+2\D+3\D|\D10\D+20\D+30\D|\D100\D+200\D+300\D))"
+        assert output["Sizes"].to_list() == [
+            triple,
+            r"(?=.*(\D0.1\D+0.2\D+0.3\D|\D1\D+2\D+3\D|\D10\D+20\D+30\D))",
+            "",
+            r"(?=.*(\D0.05\D+0.1\D|\D0.5\D+1\D|\D5\D+10\D))",
+            triple,
+        ]
+        assert "_extr" not in output.columns
+        assert (extractor.regex_cache.misses, extractor.regex_cache.hits) == (3, 0)
+
+        repeated = extractor.extract(output.drop("Sizes", axis=1), CLIENT_PRODUCT)
+        assert repeated["Sizes"].equals(output["Sizes"])
+        assert (extractor.regex_cache.misses, extractor.regex_cache.hits) == (3, 3)
+
+
 class AutosemUncreationTestsDebug(TestSemantixUncreation):
     def __init__(self) -> None:
         super().__init__()
@@ -10,7 +10,8 @@ import cProfile
 
 
 PROJECT_DIR = Path(__file__).parent.parent.parent
-sys.path.append(str(PROJECT_DIR))
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
 
 from src.simfyzer.main import setup_SimFyzer, SimFyzer
 from src.notation import JAKKAR
@@ -0,0 +1,67 @@
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+
+# seconds of cumulative import time (-X importtime), with margin for slow machines
+CLI_BUDGET = 0.5
+ENGINE_BUDGET = 3.0
+
+LAZY_MODULES = {"nltk", "fuzzywuzzy", "rapidfuzz", "tqdm", "PyQt6", "gui"}
+
+
+def import_times(code: str) -> dict[str, float]:
+    """Return cumulative import seconds of every module imported by code"""
+
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def summary(times: dict[str, float], top: int = 10) -> str:
+    heaviest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:top]
+    return "\n".join(f"{seconds:8.3f}s {module}" for module, seconds in heaviest)
+
+
+class TestStartup(object):
+    def test_cli(self):
+        times = import_times("import skylark.cli")
+        assert "pandas" not in times
+        assert times["skylark.cli"] < CLI_BUDGET, summary(times)
+
+    @pytest.mark.parametrize(
+        "module",
+        [
+            "src.semantix.semantix_stream",
+            "src.feature_flow.main",
+            "src.simfyzer.main",
+            "src.regx.regex_validator",
+        ],
+    )
+    def test_engines(self, module: str):
+        times = import_times(f"import {module}")
+
+        loaded = {name.split(".")[0] for name in times}
+        assert not loaded & LAZY_MODULES, summary(times)
+        assert times[module] < ENGINE_BUDGET, summary(times)
+
+    def test_main_in_workers(self):
+        # pool workers import main.py as __mp_main__, GUI isn't imported by them
+        times = import_times(
+            "import runpy; runpy.run_path('main.py', run_name='__mp_main__')"
+        )
+        assert not {name.split(".")[0] for name in times} & LAZY_MODULES